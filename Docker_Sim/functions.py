@@ -17,9 +17,6 @@ from param import (
     h_silicon,
     isolation_shape,
     n_electrodes,
-    onamehead,
-    pathfem,
-    pos_centre,
 )
 from scipy.spatial import ConvexHull, KDTree, cKDTree
 from scipy.spatial.distance import cdist
@@ -366,7 +363,7 @@ def run_simulation(S, electrode_surfaces):
     tdcslist.cond[9 - 1].value = c["Blood"]
     tdcslist.cond[10 - 1].value = c["Muscle"]  # muscle
 
-    filename = onamehead.split(".")[0] + "_TDCS_1"
+    filename = param.onamehead.split(".")[0] + "_TDCS_1"
     fn_simu = S.pathfem + '/' + filename
     tdcslist._prepare()
     mesh_elec = mesh_tools.read_msh(S.pathfem + '/' + S.fnamehead)
@@ -568,7 +565,7 @@ def find_corners(mesh):
     # Initalize a session
     s = sim_struct.SESSION()
     # Name of head mesh
-    s.fnamehead = onamehead
+    s.fnamehead = param.onamehead
     # Output folder
     s.pathfem = 'rect_example_outputs/'
 
@@ -597,7 +594,7 @@ def find_corners(mesh):
     cathode.thickness = [h_electrode]
 
     # Electrode Position
-    cathode.centre = pos_centre
+    cathode.centre = param.pos_centre
 
     # Electrode direction
     cathode.pos_ydir = ydir_centre
@@ -621,7 +618,7 @@ def find_corners(mesh):
     isolation.thickness = [h_silicon]
 
     # Isolation position
-    isolation.centre = pos_centre
+    isolation.centre = param.pos_centre
 
     # Isolation pos_ydir
     isolation.pos_ydir = ydir_centre
@@ -868,13 +865,90 @@ def volumes_subtraction(vol1_name: pathlib.Path, vol2_name: pathlib.Path, output
     mrmeshpy.saveMesh(diff_mesh, mrmeshpy.Path(output_name))
 
 
+# Position-independent parts of the last head model, kept for the following electrodes of a batch or worker jobs
+_head_model = {}
+
+
+def load_head_model(pathfem_modif):
+    """
+    Load the head mesh and split it into skin, refined skull and the remaining tissues.
+
+    The head mesh is only located, read, cropped, retagged and refined for
+    the first electrode simulated by the process with that mesh. The
+    following electrodes of a batch (see param.electrode_batch) or jobs of a
+    warm worker (see worker.py) reuse the parts kept in memory; they get
+    copies of the skin and skull meshes, as the electrode placement modifies
+    them. Only the last head mesh is kept.
+
+    Parameters
+    ----------
+    pathfem_modif : pathlib.Path
+        The output directory of the current simulation. Its parent directory
+        holds the refined skull mesh of previous runs.
+
+    Returns
+    -------
+    tuple
+        (mesh_skin_surf, mesh_core, mesh_without_skull_and_skin), where
+        mesh_core is the refined skull, retagged as skin.
+    """
+    meshname = param.onamehead
+    if _head_model.get("name") != meshname:
+        # Release the previous head model before reading the next one
+        _head_model.clear()
+        # manipulate head model if declared in param.py
+        original_mesh_path = None
+
+        volume_dir = pathlib.Path(param.volume_path)
+        for path in volume_dir.rglob(meshname):
+            if path.is_file():
+                original_mesh_path = path
+                logger.info(f"Found {meshname} in {path}!")
+
+        if original_mesh_path is None:
+            logger.error(f"Unable to locate {meshname} file in data directory {volume_dir}.")
+            raise FileNotFoundError(f"Unable to locate {meshname} file in {volume_dir}.")
+
+        mesh = mesh_tools.read_msh(original_mesh_path)
+
+        # mesh = mesh_tools.read_msh(requirements_path + meshname)
+
+        # Extract skin surface and skull core
+        mesh_skin_surf = mesh.crop_mesh([5, 1005])
+        logger.info("Extracted skin surface")
+
+        mesh_core = mesh.crop_mesh([7, 1007])
+        logger.info("Extracted skull surface")
+
+        mesh_without_skull_and_skin = mesh.remove_from_mesh([5, 1005, 7, 1007])
+        del mesh
+
+        # Retag the mesh to adjest the element labels
+        retag(mesh_core, 1007, 1005)
+        retag(mesh_core, 7, 5)
+
+        # Check if we already refined and saved skull using simnibs (decrease read time)
+        mesh_file_path = pathfem_modif.parent / f"skull_surf_refined_{meshname}"
+
+        if mesh_file_path.exists():
+            mesh_core = mesh_tools.read_msh(mesh_file_path)
+        else:
+            mesh_core = refine(mesh_core, pathfem_modif.parent, f"skull_surf_refined_{meshname}")
+
+        _head_model.update(name=meshname, skin=mesh_skin_surf, core=mesh_core, rest=mesh_without_skull_and_skin)
+    else:
+        logger.info(f"Reusing the head model {meshname} of the previous electrode")
+
+    return copy.deepcopy(_head_model["skin"]), copy.deepcopy(_head_model["core"]), _head_model["rest"]
+
+
 def create_elec_and_iso():
     """
     Create electrodes and isolation geometry, refine the skull mesh, and perform volume subtractions.
 
     This function performs a multi-step mesh manipulation pipeline to:
         1. Create a new output directory for the simulation.
-        2. Locate and read the original head mesh.
+        2. Locate and read the original head mesh (only once per process, see load_head_model()).
         3. Separate the mesh into skin, skull, and the remaining tissues, applying tag changes if needed.
         4. Optionally refine the skull mesh if a refined version doesn't already exist.
         5. Calculate electrode positions using 'find_corners()', then place the electrodes with 'electrode_placement()'.
@@ -891,57 +965,20 @@ def create_elec_and_iso():
     """
     start_time = time.time()
 
-    # Simplified path creation
+    # Take the first free Simulation_<i> directory. mkdir() fails if the directory
+    # exists, so two simulations of the same electrode never share one
     i = 0
     while True:
-        pathfem_modif = pathlib.Path(pathfem[:-2] + str(i))
-        if pathfem_modif.exists():
-            i += 1
-            continue
-        else:
-            pathfem_modif.mkdir(exist_ok=True, parents=True)
+        pathfem_modif = pathlib.Path(param.pathfem[:-2] + str(i))
+        try:
+            pathfem_modif.mkdir(parents=True)
             break
+        except FileExistsError:
+            i += 1
 
-    # manipulate head model if declared in param.py
-    meshname = onamehead
-    original_mesh_path = None
-
-    volume_dir = pathlib.Path(param.volume_path)
-    for path in volume_dir.rglob(meshname):
-        if path.is_file():
-            original_mesh_path = path
-            logger.info(f"Found {meshname} in {path}!")
-
-    if original_mesh_path is None:
-        logger.error(f"Unable to locate {meshname} file in data directory {volume_dir}.")
-        raise FileNotFoundError(f"Unable to locate {meshname} file in {volume_dir}.")
-
-    mesh = mesh_tools.read_msh(original_mesh_path)
-
-    # mesh = mesh_tools.read_msh(requirements_path + meshname)
-
-    # Extract skin surface and skull core
-    mesh_skin_surf = mesh.crop_mesh([5, 1005])
-    logger.info("Extracted skin surface")
-
-    mesh_core = mesh.crop_mesh([7, 1007])
-    logger.info("Extracted skull surface")
-
-    mesh_without_skull_and_skin = mesh.remove_from_mesh([5, 1005, 7, 1007])
+    mesh_skin_surf, mesh_core, mesh_without_skull_and_skin = load_head_model(pathfem_modif)
     mesh_without_skull_and_skin.write(str(pathfem_modif / "mesh_without_skull_and_skin.msh"))
 
-    # Retag the mesh to adjest the element labels
-    retag(mesh_core, 1007, 1005)
-    retag(mesh_core, 7, 5)
-
-    # Check if we already refined and saved skull using simnibs (decrease read time)
-    mesh_file_path = pathfem_modif.parent / f"skull_surf_refined_{meshname}"
-
-    if mesh_file_path.exists():
-        mesh_core = mesh_tools.read_msh(mesh_file_path)
-    else:
-        mesh_core = refine(mesh_core, pathfem_modif.parent, f"skull_surf_refined_{meshname}")
-
     logger.info(f"Mesh preparation took {time.time() - start_time:.2f} seconds")
 
     # Electrode placement
@@ -963,7 +1000,7 @@ def create_elec_and_iso():
             mesh_elec_outsurf_n = mesh_get_outer_surface(mesh_elec_n, 1003)
 
             closest_point_n = mesh_elec_outsurf_n.nodes.find_closest_node(
-                pos_centre if i == 0 else peripheral_coord[i - 1], return_index=True
+                param.pos_centre if i == 0 else peripheral_coord[i - 1], return_index=True
             )
 
             all_nodes_normals_n = mesh_elec_outsurf_n.nodes_normals(mesh_elec_outsurf_n.elm.elm_number)
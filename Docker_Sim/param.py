@@ -1,19 +1,27 @@
 # !!!Parameters to change by user !!!
+import json
 import os
 
 # ----------------------------------------------------------------------
 # File and Path Configurations
 # ----------------------------------------------------------------------
 
-# Original mesh name (must be inside the main folder containing simulation.py)
-# onamehead = "ernie_my.msh"
-onamehead = os.environ["MESH_NAME"] + ".msh"
-
 # Environment variables for paths
 code_path = os.environ["PYTHONPATH"]
 volume_path = os.environ["VOLUME_PATH"]
-ensemble_name = os.environ["ENSEMBLE_NAME"]
-electrode_name = os.environ["ELECTRODE_NAME"]
+
+# Electrodes simulated one after another in this container. In batch mode,
+# ELECTRODE_BATCH holds a JSON list of {"name", "X", "Y", "Z"}; otherwise the
+# single electrode is given by ELECTRODE_NAME and ELECTRODE_POSITION_X/Y/Z
+if "ELECTRODE_BATCH" in os.environ:
+    electrode_batch = json.loads(os.environ["ELECTRODE_BATCH"])
+else:
+    electrode_batch = [{
+        "name": os.environ["ELECTRODE_NAME"],
+        "X": os.environ.get("ELECTRODE_POSITION_X", ""), # "0" for documentation builds, "" for running
+        "Y": os.environ.get("ELECTRODE_POSITION_Y", ""),
+        "Z": os.environ.get("ELECTRODE_POSITION_Z", ""),
+    }]
 
 # # Path to requirements folder (derived from volume_path)
 # requirements_path = f"{volume_path}/requirements/"
@@ -21,9 +29,11 @@ electrode_name = os.environ["ELECTRODE_NAME"]
 # Edited headmodel filename (head model with implanted electrodes and isolation, without simulation results)
 fnamehead = "edited_mesh.msh"
 
-# Simulation output directory path (must end with a "/")
-# Format: folder_contains_main.py/results/original_mesh_name/Simulation №/
-pathfem = f"{volume_path}/{ensemble_name}/{electrode_name}/results/{onamehead[:-4]}/Simulation_n/"
+# The job-specific parameters (onamehead and ensemble_name, set by set_job())
+# and the electrode-specific parameters (electrode_name, pathfem and
+# pos_centre, set by set_electrode()) are set at the end of this file from the
+# environment variables. A warm worker (see worker.py) changes them for every
+# job, so other modules must read them as param.<name>
 
 # Info file will be saved in pathfem
 infofile = "data.info"
@@ -45,13 +55,6 @@ currents = [0.001, -0.00025, -0.00025, -0.00025, -0.00025]
 # Names of the electrodes
 names = ["center", "lateral_1", "lateral_2", "lateral_3", "lateral_4"]
 
-# Center position of the central electrode (from environment variables)
-pos_centre = [
-    float(os.environ.get("ELECTRODE_POSITION_X", "")), # "0" for documentation builds, "" for running
-    float(os.environ.get("ELECTRODE_POSITION_Y", "")),
-    float(os.environ.get("ELECTRODE_POSITION_Z", ""))
-]
-
 # Orientation for pad (standard values: [0, 0, 100])
 orientation = [0, 0, 100]
 
@@ -112,4 +115,56 @@ d_outerAct = 10
 d_border = 6  # For new electrode design (EASEE)
 
 # Side length of the square inscribed in the circle (from center of central to peripheral electrode) [mm]
-d_rect = 32.5
\ No newline at end of file
+d_rect = 32.5
+
+
+def set_job(mesh_name, ensemble):
+    """
+    Set the job-specific parameters for the simulations of another ensemble or head mesh.
+
+    Parameters
+    ----------
+    mesh_name : str
+        Name of the head mesh, without the .msh extension.
+    ensemble : str
+        Name of the ensemble (configuration) the simulations belong to.
+
+    Returns
+    -------
+    None
+    """
+    global onamehead, ensemble_name
+
+    # Original mesh name (must be inside the main folder containing simulation.py)
+    # onamehead = "ernie_my.msh"
+    onamehead = mesh_name + ".msh"
+    ensemble_name = ensemble
+
+
+def set_electrode(electrode):
+    """
+    Set the electrode-specific parameters for the next simulation of the batch.
+
+    Parameters
+    ----------
+    electrode : dict
+        An entry of electrode_batch, with the keys name, X, Y and Z.
+
+    Returns
+    -------
+    None
+    """
+    global electrode_name, pathfem, pos_centre
+
+    electrode_name = electrode["name"]
+
+    # Simulation output directory path (must end with a "/")
+    # Format: folder_contains_main.py/results/original_mesh_name/Simulation №/
+    pathfem = f"{volume_path}/{ensemble_name}/{electrode_name}/results/{onamehead[:-4]}/Simulation_n/"
+
+    # Center position of the central electrode
+    pos_centre = [float(electrode["X"]), float(electrode["Y"]), float(electrode["Z"])]
+
+
+set_job(os.environ["MESH_NAME"], os.environ["ENSEMBLE_NAME"])
+set_electrode(electrode_batch[0])
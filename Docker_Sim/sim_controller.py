@@ -6,7 +6,9 @@ import os
 import sys
 import warnings
 from pathlib import Path
+from typing import Callable, Optional
 
+import param
 import simulation
 
 import logging_utils
@@ -41,12 +43,12 @@ def print_environment_info() -> None:
     logger.info(f"Conda Environment: {conda_env}\nPython version: {python_version}")
 
 
-def create_sim_info_file(running: bool, success: bool) -> None:
+def create_sim_info_file(running: bool, success: bool, electrode: dict) -> None:
     """
     Create or update a JSON file with simulation status information.
 
-    This function uses environment variables (VOLUME_PATH, ENSEMBLE_NAME, ELECTRODE_NAME,
-    ELECTRODE_POSITION_X/Y/Z) to construct a JSON file named 'sim_info_<electrode>.json'.
+    This function uses the volume path and ensemble name of the current job (see param.py)
+    and the electrode (name and position) to construct a JSON file named 'sim_info_<electrode>.json'.
     It updates the file with details about the simulation status (running/success).
 
     Parameters
@@ -55,18 +57,17 @@ def create_sim_info_file(running: bool, success: bool) -> None:
         A boolean indicating whether the simulation is currently running.
     success : bool
         A boolean indicating whether the simulation has completed successfully.
+    electrode : dict
+        An entry of param.electrode_batch, with the keys name, X, Y and Z.
 
     Returns
     -------
     None
         The JSON file is written to disk.
     """
-    volume_path = os.environ.get("VOLUME_PATH", "")
-    ensemble_name = os.environ.get("ENSEMBLE_NAME", "")
-    electrode_name = os.environ.get("ELECTRODE_NAME", "")
-    electrode_pos_x = os.environ.get("ELECTRODE_POSITION_X", "")
-    electrode_pos_y = os.environ.get("ELECTRODE_POSITION_Y", "")
-    electrode_pos_z = os.environ.get("ELECTRODE_POSITION_Z", "")
+    volume_path = param.volume_path
+    ensemble_name = param.ensemble_name
+    electrode_name = electrode["name"]
 
     file_path = Path(volume_path) / ensemble_name / f"sim_info_{electrode_name}.json"
     file_path.parent.mkdir(parents=True, exist_ok=True)
@@ -78,9 +79,9 @@ def create_sim_info_file(running: bool, success: bool) -> None:
         "Environment": os.environ.get("CONDA_DEFAULT_ENV", "Not in a Conda environment"),
         "Electrode": {
             "name": electrode_name,
-            "X": electrode_pos_x,
-            "Y": electrode_pos_y,
-            "Z": electrode_pos_z,
+            "X": str(electrode["X"]),
+            "Y": str(electrode["Y"]),
+            "Z": str(electrode["Z"]),
         }
     }
 
@@ -92,34 +93,97 @@ def create_sim_info_file(running: bool, success: bool) -> None:
         logger.info(f"Error saving JSON to file: {file_path}, Error: {str(e)}")
 
 
+def simulate_electrodes(electrodes: list, batch_mode: bool, is_current: Optional[Callable[[], bool]] = None) -> list:
+    """
+    Simulate electrodes one after another and report each in its simulation info file.
+
+    For every electrode, a simulation info file indicating the simulation is
+    running is written, the simulation logic (simulation.simulate()) is
+    called and the info file is updated upon completion.
+
+    If `is_current` returns False, e.g. because a warm worker's job was given
+    to another worker, the remaining electrodes are not simulated and the
+    info files are left to the other worker.
+
+    Parameters
+    ----------
+    electrodes : list
+        Entries like param.electrode_batch, with the keys name, X, Y and Z.
+    batch_mode : bool
+        If True, a failed electrode is logged and marked as failed in its info
+        file, and the next electrode is simulated. Otherwise, the exception
+        is raised.
+    is_current : Callable, optional
+        Called before an info file is written; returns whether the results
+        of this process are still wanted. Defaults to always.
+
+    Returns
+    -------
+    list
+        The names of the failed electrodes.
+    """
+    failed = []
+    for electrode in electrodes:
+        if is_current is not None and not is_current():
+            logger.warning(f"Results are no longer wanted, not simulating {electrode['name']}")
+            break
+        param.set_electrode(electrode)
+        create_sim_info_file(True, False, electrode)
+
+        if not batch_mode:
+            simulation.simulate()
+            create_sim_info_file(False, True, electrode)
+            continue
+
+        logger.info(f"Simulating {electrode['name']} ({len(failed)} failed so far)")
+        try:
+            simulation.simulate()
+        except Exception:
+            logger.exception(f"Simulation of {electrode['name']} failed")
+            success = False
+            failed.append(electrode["name"])
+        else:
+            success = True
+        if is_current is not None and not is_current():
+            logger.warning(f"Results are no longer wanted, discarding the status of {electrode['name']}")
+            break
+        create_sim_info_file(False, success, electrode)
+
+    return failed
+
+
 def main():
     """
     Main entry point for the simulation script.
 
     This function:
         - Registers a custom excepthook for global exception handling.
-        - Logs an initial simulation info file indicating the simulation is running.
         - Prints environment information.
-        - Calls the simulation logic (simulation.simulate()).
-        - Updates the simulation info file upon completion.
+        - Simulates every electrode of the batch (param.electrode_batch, a
+          single electrode unless ELECTRODE_BATCH is set) with simulate_electrodes().
         - Unregisters the custom excepthook.
 
+    In batch mode, the head mesh is read and prepared only once (see
+    functions.load_head_model()). A failed electrode is logged and marked as
+    failed in its info file, and the batch continues with the next one; the
+    process then exits with code 1.
+
     Returns
     -------
     None
     """
     logging_utils.register_excepthook(logger)
 
-    create_sim_info_file(True, False)
-
     print_environment_info()
 
-    simulation.simulate()
-
-    create_sim_info_file(False, True)
+    failed = simulate_electrodes(param.electrode_batch, len(param.electrode_batch) > 1)
 
     logging_utils.unregister_excepthook()
 
+    if failed:
+        logger.error(f"Failed electrodes: {', '.join(failed)}")
+        sys.exit(1)
+
 
 if __name__ == "__main__":
     main()
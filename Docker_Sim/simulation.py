@@ -186,6 +186,10 @@ def simulate():
     None
         Results are written to files in the path returned by create_elec_and_iso().
     """
+    # Time every electrode of a batch on its own
+    global start_time
+    start_time = time.time()
+
     pathfem_modif = f.create_elec_and_iso()
     run_simulation(pathfem_modif)
     f.write_info(pathfem_modif)
@@ -0,0 +1,398 @@
+"""
+Warm simulation worker, serving jobs from a queue directory on the data volume.
+
+Starting a container for every simulation pays for the conda wrapper, the
+Python start-up and the imports of simnibs, gmsh, meshlib and scipy each time.
+A worker container instead runs this script, which imports everything once
+and then simulates job after job; the head mesh of the previous job is kept in
+memory as well (see functions.load_head_model()).
+
+Jobs are JSON files in the queue directory (VOLUME_PATH/worker_queue):
+    - pending/<job_id>.json: submitted jobs. A job has the keys job_id,
+      mesh_name, ensemble_name, electrodes (a list of {"name", "X", "Y", "Z"}),
+      priority and submitted_at. Jobs are taken by priority (highest first);
+      within a priority, the ensembles take turns (see get_pending_jobs()).
+      The jobs of one ensemble are taken in the order of their names, i.e.
+      of submission.
+    - claimed/<worker>/<job_id>.json: the job a worker is simulating. A job is
+      claimed by renaming it, so only one worker can take it. The worker
+      touches the file every WORKER_HEARTBEAT_INTERVAL seconds; the
+      coordinator puts jobs without a recent heartbeat back into pending.
+      The claimed file is the worker's claim: before writing the result, the
+      worker renames it to claimed/<worker>/.<job_id>.json.finishing (see
+      end_claim()). If the coordinator requeued the job in the meantime, the
+      rename fails and the worker discards its results, so a job is only
+      ever reported by the worker holding its claim.
+    - done/<job_id>.json: the result, with the keys job_id, worker, success,
+      failed (the names of the failed electrodes), error and waited (the
+      seconds between the submission and the start of the job).
+    - workers/<worker>.json: the heartbeat of a worker, with the keys worker,
+      host, job and heartbeat, so the coordinator knows which workers are alive.
+
+The queue is filled by utils.worker_pool on the coordinator. Workers on other
+nodes can serve it as long as they mount the same data directory (see the
+README). The directory names are repeated here, as the container cannot
+import the utils package.
+
+Environment variables:
+    - VOLUME_PATH, PYTHONPATH: the data and code directories, as for sim_controller.py.
+    - WORKER_NAME: the unique name of the worker (default: host name and process ID).
+    - WORKER_POLL_INTERVAL: seconds between two looks into the queue (default 1).
+    - WORKER_IDLE_TIMEOUT: seconds without jobs after which the worker exits,
+      releasing its memory (default 0, never).
+    - WORKER_HEARTBEAT_INTERVAL: seconds between two heartbeats (default 10).
+"""
+
+
+import gc
+import json
+import os
+import socket
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+# A worker gets its jobs from the queue; param.py only needs placeholders
+# (the defaults of the Docker image) when the worker runs outside of it
+for name, value in (("MESH_NAME", "NO_NAME"), ("ENSEMBLE_NAME", "DEFAULT"), ("ELECTRODE_NAME", "NO_NAME"),
+                    ("ELECTRODE_POSITION_X", "0"), ("ELECTRODE_POSITION_Y", "0"), ("ELECTRODE_POSITION_Z", "0")):
+    os.environ.setdefault(name, value)
+
+import param
+import sim_controller
+
+import logging_utils
+
+logger = sim_controller.logger
+
+QUEUE_PATH = Path(param.volume_path) / "worker_queue"
+PENDING_PATH = QUEUE_PATH / "pending"
+CLAIMED_PATH = QUEUE_PATH / "claimed"
+DONE_PATH = QUEUE_PATH / "done"
+WORKERS_PATH = QUEUE_PATH / "workers"
+
+WORKER_NAME = os.environ.get("WORKER_NAME") or f"{socket.gethostname()}-{os.getpid()}"
+POLL_INTERVAL = float(os.environ.get("WORKER_POLL_INTERVAL", "1"))
+IDLE_TIMEOUT = float(os.environ.get("WORKER_IDLE_TIMEOUT", "0"))
+HEARTBEAT_INTERVAL = float(os.environ.get("WORKER_HEARTBEAT_INTERVAL", "10"))
+
+# The claimed job file of the job being simulated, read by the heartbeat thread
+_current_job = {"file": None}
+
+
+def requeue_claimed_jobs(claimed_dir: Path) -> None:
+    """
+    Return the jobs a previous run of this worker claimed but did not finish.
+
+    A worker killed while simulating (e.g. for running out of memory) leaves
+    its job in its claimed directory. When the container is restarted, the
+    job is put back into the queue, so another worker can take it.
+
+    Parameters
+    ----------
+    claimed_dir : Path
+        The claimed directory of this worker.
+
+    Returns
+    -------
+    None
+    """
+    for job_file in sorted(claimed_dir.glob("*.json")):
+        logger.info(f"Requeuing unfinished job {job_file.stem}")
+        os.replace(job_file, PENDING_PATH / job_file.name)
+    # Jobs whose claim ended, but whose result was not written
+    for marker in sorted(claimed_dir.glob(".*.json.finishing")):
+        job_name = marker.name[1:-len(".finishing")]
+        if (DONE_PATH / job_name).exists():
+            marker.unlink(missing_ok=True)
+            continue
+        logger.info(f"Requeuing unreported job {Path(job_name).stem}")
+        os.replace(marker, PENDING_PATH / job_name)
+
+
+def read_job_order(job_file: Path):
+    """
+    Return the priority and the ensemble of a job, for choosing the next one.
+
+    Parameters
+    ----------
+    job_file : Path
+        A pending or claimed job file.
+
+    Returns
+    -------
+    tuple
+        (priority, ensemble name). Jobs that cannot be parsed count as
+        (0, None), so they are claimed and reported as invalid by run_job().
+
+    Raises
+    ------
+    FileNotFoundError
+        If another worker took or finished the job in the meantime.
+    """
+    try:
+        job = json.loads(job_file.read_text())
+        return int(job.get("priority", 0)), job.get("ensemble_name")
+    except FileNotFoundError:
+        raise
+    except (OSError, ValueError, TypeError, AttributeError):
+        return 0, None
+
+
+def get_pending_jobs() -> list:
+    """
+    Return the pending job files in the order they should be served.
+
+    Jobs with a higher priority come first. Among jobs of equal priority,
+    the ensembles take turns (fair share): the n-th pending job of an
+    ensemble is ranked by n plus the number of jobs of the ensemble claimed
+    by any worker, so an ensemble submitted later is not queued behind all
+    jobs of the earlier ones. Ties go to the oldest job.
+
+    Returns
+    -------
+    list
+        The pending job files.
+    """
+    running = Counter()
+    for job_file in CLAIMED_PATH.glob("*/*.json"):
+        try:
+            running[read_job_order(job_file)[1]] += 1
+        except FileNotFoundError:
+            continue
+
+    pending = []
+    for job_file in sorted(PENDING_PATH.glob("*.json")):
+        try:
+            priority, ensemble = read_job_order(job_file)
+        except FileNotFoundError:
+            continue
+        pending.append((-priority, running[ensemble], job_file.name, job_file))
+        running[ensemble] += 1
+    return [job_file for *_, job_file in sorted(pending)]
+
+
+def claim_next_job(claimed_dir: Path):
+    """
+    Take the next pending job (see get_pending_jobs()).
+
+    Parameters
+    ----------
+    claimed_dir : Path
+        The claimed directory of this worker.
+
+    Returns
+    -------
+    Path or None
+        The claimed job file, or None if no job is pending.
+    """
+    for job_file in get_pending_jobs():
+        claimed_file = claimed_dir / job_file.name
+        try:
+            # Renaming is atomic, only one worker succeeds
+            os.rename(job_file, claimed_file)
+            # The first heartbeat; the file kept the time it was submitted
+            os.utime(claimed_file)
+        except FileNotFoundError:
+            continue
+        return claimed_file
+    return None
+
+
+def end_claim(job_file: Path):
+    """
+    End the claim of a job before its result is written.
+
+    The claimed file is renamed, which is atomic: either the coordinator
+    requeues the job (see utils.worker_pool.requeue_stale_worker_jobs()) or
+    the worker keeps it, never both.
+
+    Parameters
+    ----------
+    job_file : Path
+        The claimed job file.
+
+    Returns
+    -------
+    Path or None
+        The renamed file, to be removed once the result is written, or None
+        if the job was given to another worker and the results must be discarded.
+    """
+    marker = job_file.with_name(f".{job_file.name}.finishing")
+    try:
+        os.rename(job_file, marker)
+    except FileNotFoundError:
+        return None
+    return marker
+
+
+def write_result(job_id: str, success: bool, failed: list, error=None, waited=None) -> None:
+    """
+    Write the result of a job to the done directory.
+
+    The result is written to a temporary file first and then renamed, so the
+    host never reads a partial result.
+
+    Parameters
+    ----------
+    job_id : str
+        The ID of the job.
+    success : bool
+        True if all electrodes of the job were simulated successfully.
+    failed : list
+        The names of the failed electrodes.
+    error : str, optional
+        A description of an error that prevented running the job.
+    waited : float, optional
+        The seconds the job waited in the queue, if known.
+
+    Returns
+    -------
+    None
+    """
+    content = {
+        "job_id": job_id, "worker": WORKER_NAME, "success": success, "failed": failed, "error": error, "waited": waited
+    }
+    temp_file = DONE_PATH / f".{job_id}.{WORKER_NAME}.tmp"
+    with temp_file.open("w") as file:
+        json.dump(content, file, indent=4)
+    os.replace(temp_file, DONE_PATH / f"{job_id}.json")
+
+
+def write_heartbeat() -> None:
+    """
+    Report that the worker is alive, and touch the claimed file of its current job.
+
+    Returns
+    -------
+    None
+    """
+    job_file = _current_job["file"]
+    if job_file is not None:
+        try:
+            os.utime(job_file)
+        except FileNotFoundError:
+            # The job was finished or given to another worker in the meantime
+            pass
+
+    content = {
+        "worker": WORKER_NAME,
+        "host": socket.gethostname(),
+        "job": job_file.stem if job_file is not None else None,
+        "heartbeat": time.time(),
+    }
+    temp_file = WORKERS_PATH / f".{WORKER_NAME}.tmp"
+    with temp_file.open("w") as file:
+        json.dump(content, file, indent=4)
+    os.replace(temp_file, WORKERS_PATH / f"{WORKER_NAME}.json")
+
+
+def send_heartbeats(stop: threading.Event) -> None:
+    """
+    Write a heartbeat every HEARTBEAT_INTERVAL seconds until `stop` is set. Runs in its own thread.
+
+    Parameters
+    ----------
+    stop : threading.Event
+        Set when the worker exits.
+
+    Returns
+    -------
+    None
+    """
+    while not stop.wait(HEARTBEAT_INTERVAL):
+        try:
+            write_heartbeat()
+        except OSError as e:
+            logger.warning(f"Unable to write the heartbeat of {WORKER_NAME}: {str(e)}")
+
+
+def run_job(job_file: Path) -> None:
+    """
+    Simulate the electrodes of a claimed job and report the result.
+
+    Parameters
+    ----------
+    job_file : Path
+        The claimed job file.
+
+    Returns
+    -------
+    None
+    """
+    job_id = job_file.stem
+    try:
+        job = json.loads(job_file.read_text())
+        electrodes = job["electrodes"]
+        param.set_job(job["mesh_name"], job["ensemble_name"])
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.error(f"Invalid job {job_id}: {str(e)}")
+        marker = end_claim(job_file)
+        if marker is not None:
+            write_result(job_id, False, [], f"Invalid job: {str(e)}")
+            marker.unlink(missing_ok=True)
+        return
+
+    _current_job["file"] = job_file
+    write_heartbeat()
+    start_time = time.time()
+    waited = start_time - job["submitted_at"] if "submitted_at" in job else None
+    logger.info(f"Job {job_id}: {len(electrodes)} electrode(s) of {job['ensemble_name']} on {param.onamehead}"
+                + (f", after {waited:.2f} seconds in the queue" if waited is not None else ""))
+    # The claimed file disappears if the coordinator missed the heartbeats and gave the job to another worker
+    failed = sim_controller.simulate_electrodes(electrodes, batch_mode=True, is_current=job_file.exists)
+    logger.info(f"Job {job_id} finished in {time.time() - start_time:.2f} seconds, {len(failed)} failed")
+
+    marker = end_claim(job_file)
+    _current_job["file"] = None
+    if marker is None:
+        logger.warning(f"Job {job_id} was given to another worker, discarding the results")
+    else:
+        write_result(job_id, not failed, failed, waited=waited)
+        marker.unlink(missing_ok=True)
+    gc.collect()
+
+
+def main():
+    """
+    Serve jobs from the queue until the worker has been idle for WORKER_IDLE_TIMEOUT seconds.
+
+    Returns
+    -------
+    None
+    """
+    logging_utils.register_excepthook(logger)
+
+    sim_controller.print_environment_info()
+
+    claimed_dir = CLAIMED_PATH / WORKER_NAME
+    for path in (PENDING_PATH, claimed_dir, DONE_PATH, WORKERS_PATH):
+        path.mkdir(parents=True, exist_ok=True)
+    requeue_claimed_jobs(claimed_dir)
+
+    write_heartbeat()
+    stop = threading.Event()
+    threading.Thread(target=send_heartbeats, args=(stop,), daemon=True).start()
+
+    logger.info(f"Worker {WORKER_NAME} waiting for jobs in {QUEUE_PATH}")
+    idle_since = time.monotonic()
+    while True:
+        job_file = claim_next_job(claimed_dir)
+        if job_file is not None:
+            run_job(job_file)
+            idle_since = time.monotonic()
+            continue
+
+        if IDLE_TIMEOUT > 0 and time.monotonic() - idle_since >= IDLE_TIMEOUT:
+            logger.info(f"Worker {WORKER_NAME} idle for {IDLE_TIMEOUT:g} seconds, exiting")
+            break
+        time.sleep(POLL_INTERVAL)
+
+    stop.set()
+    (WORKERS_PATH / f"{WORKER_NAME}.json").unlink(missing_ok=True)
+    logging_utils.unregister_excepthook()
+
+
+if __name__ == "__main__":
+    main()
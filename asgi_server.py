@@ -0,0 +1,278 @@
+"""
+ASGI entry point for the REST server.
+
+The routes are the ones of the Flask app in ```server```. With waitress, a
+worker thread is held for the whole duration of a request, including the time
+it takes to send a large mesh to a slow client. Enough parallel downloads
+therefore block every worker, and even `/reached` times out.
+
+This module wraps the Flask app into an ASGI application. Only the blocking
+parts of a request run in a thread pool:
+    - writing the request body to disk, once it exceeds MAX_MEMORY_BODY_SIZE,
+    - dispatching the request to Flask, including parsing JSON files in the handlers, and
+    - reading every chunk of the response body (e.g. the next block of a .zlib file).
+
+Files sent with send_file() are read through the `wsgi.file_wrapper` of the
+environ (see FileWrapper) in blocks of RESPONSE_BLOCK_SIZE, so a large mesh
+costs a few hundred hops to the thread pool instead of one per 8 KB block.
+
+While a chunk is sent to the client, no thread is held, so many concurrent
+viewers share a small thread pool.
+
+Examples
+--------
+::
+
+    $ python start_backend.py -S --asgi
+    $ uvicorn asgi_server:app --host 0.0.0.0 --port 5000
+
+Notes
+-----
+Dependencies:
+    - asyncio and concurrent.futures for the thread pool
+    - server for the Flask app
+    - uvicorn (optional) for serving the ASGI application
+"""
+
+
+import asyncio
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import server
+
+# Request bodies larger than this are spooled to a temporary file
+MAX_MEMORY_BODY_SIZE = 1024 * 1024
+
+# Minimum size of the blocks read from files sent with send_file(), i.e. per hop to the thread pool
+RESPONSE_BLOCK_SIZE = 1024 * 1024
+
+
+class FileWrapper:
+    """
+    The `wsgi.file_wrapper` of the environ, iterating over a file in large blocks.
+
+    Werkzeug asks for blocks of 8 KB; every block costs a hop to the thread
+    pool, so blocks of at least RESPONSE_BLOCK_SIZE are read instead.
+
+    Parameters
+    ----------
+    file : file-like object
+        The file to send, opened in binary mode.
+    block_size : int, optional
+        The requested block size; smaller sizes are raised to RESPONSE_BLOCK_SIZE.
+    """
+    def __init__(self, file, block_size: int = RESPONSE_BLOCK_SIZE):
+        self.file = file
+        self.block_size = max(block_size, RESPONSE_BLOCK_SIZE)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        block = self.file.read(self.block_size)
+        if not block:
+            raise StopIteration
+        return block
+
+    def close(self) -> None:
+        """Close the file."""
+        if hasattr(self.file, "close"):
+            self.file.close()
+
+
+def build_environ(scope: dict, body) -> dict:
+    """
+    Build a WSGI environ from an ASGI HTTP scope.
+
+    Parameters
+    ----------
+    scope : dict
+        The ASGI connection scope of type 'http'.
+    body : file-like object
+        The request body, positioned at the start.
+
+    Returns
+    -------
+    dict
+        The WSGI environ.
+    """
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf8").decode("latin1"),
+        "PATH_INFO": scope["path"].encode("utf8").decode("latin1"),
+        "QUERY_STRING": scope["query_string"].decode("ascii"),
+        "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        # The body was read completely from ASGI, also for chunked uploads without Content-Length
+        "wsgi.input_terminated": True,
+        "wsgi.file_wrapper": FileWrapper,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+
+    host, port = scope.get("server") or ("localhost", 80)
+    environ["SERVER_NAME"] = host
+    environ["SERVER_PORT"] = str(port)
+
+    if scope.get("client"):
+        environ["REMOTE_ADDR"] = scope["client"][0]
+        environ["REMOTE_PORT"] = str(scope["client"][1])
+
+    for name, value in scope["headers"]:
+        name = name.decode("latin1")
+        if name == "content-length":
+            key = "CONTENT_LENGTH"
+        elif name == "content-type":
+            key = "CONTENT_TYPE"
+        else:
+            key = "HTTP_" + name.upper().replace("-", "_")
+        value = value.decode("latin1")
+        if key in environ:
+            value = f"{environ[key]},{value}"
+        environ[key] = value
+
+    return environ
+
+
+class AsgiApp:
+    """
+    ASGI application running a WSGI app with non-blocking response streaming.
+
+    Parameters
+    ----------
+    wsgi_app : Callable
+        The WSGI application, e.g. the Flask app of ```server```.
+    threads : int, optional
+        The number of threads used for dispatching requests and reading
+        response chunks. Defaults to the default of ThreadPoolExecutor.
+    on_startup : Callable, optional
+        A function called when the ASGI server starts.
+    """
+    def __init__(self, wsgi_app: Callable, threads: Optional[int] = None, on_startup: Optional[Callable] = None):
+        self.wsgi_app = wsgi_app
+        self.on_startup = on_startup
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="asgi")
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self.handle_http(scope, receive, send)
+        else:
+            raise ValueError(f"Unsupported ASGI scope type {scope['type']}.")
+
+    async def run_in_thread(self, function: Callable, *args):
+        """Run a blocking function in the thread pool."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def lifespan(self, receive: Callable, send: Callable) -> None:
+        """Handle the startup and shutdown messages of the ASGI server."""
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                if self.on_startup is not None:
+                    await self.run_in_thread(self.on_startup)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def handle_http(self, scope: dict, receive: Callable, send: Callable) -> None:
+        """
+        Handle a single HTTP request.
+
+        Parameters
+        ----------
+        scope : dict
+            The ASGI connection scope.
+        receive : Callable
+            The ASGI receive channel.
+        send : Callable
+            The ASGI send channel.
+
+        Returns
+        -------
+        None
+        """
+        body = tempfile.SpooledTemporaryFile(max_size=MAX_MEMORY_BODY_SIZE)
+        body_size = 0
+        try:
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    return
+                chunk = message.get("body", b"")
+                body_size += len(chunk)
+                # Small bodies stay in memory; writes to the spooled file on disk block
+                if body_size <= MAX_MEMORY_BODY_SIZE:
+                    body.write(chunk)
+                else:
+                    await self.run_in_thread(body.write, chunk)
+                if not message.get("more_body", False):
+                    break
+            body.seek(0)
+
+            environ = build_environ(scope, body)
+            status, headers, app_iter = await self.run_in_thread(self.run_wsgi_app, environ)
+            try:
+                await send({
+                    "type": "http.response.start",
+                    "status": status,
+                    "headers": [(name.lower().encode("latin1"), value.encode("latin1")) for name, value in headers],
+                })
+                chunks = iter(app_iter)
+                while True:
+                    chunk = await self.run_in_thread(next, chunks, None)
+                    if chunk is None:
+                        break
+                    if chunk:
+                        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+            finally:
+                if hasattr(app_iter, "close"):
+                    await self.run_in_thread(app_iter.close)
+        finally:
+            body.close()
+
+    def run_wsgi_app(self, environ: dict) -> tuple:
+        """
+        Call the WSGI app. Runs in the thread pool.
+
+        Parameters
+        ----------
+        environ : dict
+            The WSGI environ.
+
+        Returns
+        -------
+        tuple
+            The status code, the response headers and the response iterable.
+        """
+        response_start = {}
+
+        def start_response(status: str, headers: list, exc_info=None):
+            if exc_info and response_start:
+                raise exc_info[1].with_traceback(exc_info[2])
+            response_start["status"] = int(status.split(" ", 1)[0])
+            response_start["headers"] = headers
+            return self.write_not_supported
+
+        app_iter = self.wsgi_app(environ, start_response)
+        return response_start["status"], response_start["headers"], app_iter
+
+    @staticmethod
+    def write_not_supported(data: bytes) -> None:
+        """The legacy WSGI write() callable, which is not supported."""
+        raise NotImplementedError("The WSGI write() callable is not supported, return an iterable instead.")
+
+
+#: ASGI application of the REST server, e.g. for `uvicorn asgi_server:app`
+app = AsgiApp(server.app, on_startup=server.start_job_workers)
@@ -8,22 +8,23 @@ Functions
     - map_geometry_to_vertex : Map geometry objects to their corresponding vertices, including their indices.
     - create_tag_to_new_index_mapping : Create a mapping from tags to new indices.
     - create_tag_based_dictionary_for_volumes : Create a dictionary based on volume tags.
+    - create_tag_artifacts : Create one compressed file per tag so tissues can be retrieved individually.
+    - get_3d_data_source_path : Get the path of the file recording the electrode the 3D data was created from.
+    - get_3d_data_source : Get the index of the electrode the 3D data was created from.
     - create_3d_data : Create 3D data files for a given ensemble and patient.
 
 Dependencies
 ------------
-    - json : For reading and writing JSON files.
     - os : For file and directory operations.
-    - zlib : For compressing data.
     - collections.defaultdict : For creating default dictionaries.
     - numpy : For numerical operations and statistics.
     - database_params : Custom module for database parameters and paths.
     - process_simulations.process_helper_functions : Custom module for creating tag-based dictionaries and lookup tables.
 """
 
-import json
-import zlib
 from collections import defaultdict
+from pathlib import Path
+from typing import Optional
 
 import numpy as np
 from simnibs import mesh_tools
@@ -33,6 +34,8 @@ from process_simulations.process_helper_functions import (
     create_tag_based_dictionary,
     create_tag_look_up_table,
     is_valid_tag,
+    publish_artifact_version,
+    start_artifact_version,
 )
 
 
@@ -134,10 +137,107 @@ def create_tag_based_dictionary_for_volumes(_volume_tags: list, _tetras: list) -
     return volume_dict, list(map(str, used_tags))
 
 
-def create_3d_data(_current_ensemble: str, _current_mesh: mesh_tools.Msh, _patient_id: str) -> int:
+def create_tag_artifacts(_save_dir, _current_ensemble: str, _merged_data: dict) -> None:
+    """
+    Create one compressed file per tag so tissues can be retrieved individually.
+
+    The files are written to a new version directory in '<ensemble>_3d_tags/'
+    next to the other 3D data (see start_artifact_version()):
+        - <version>/vertices.zlib : The vertex coordinates shared by all tags.
+        - <version>/tag_<tag>.zlib : The 'meshes' (surface tags) or 'volumes' and 'volumes_raw' (volume tags) of one tag.
+        - index.json : The current version, the available tags, their descriptions and sizes.
+
+    Parameters
+    ----------
+    _save_dir : Path
+        Directory of the ensemble's processed data.
+    _current_ensemble : str
+        Current ensemble ID.
+    _merged_data : dict
+        The complete 3D data as created by create_3d_data.
+
+    Returns
+    -------
+    None
+    """
+    tag_dir = _save_dir / f"{_current_ensemble}_3d_tags"
+    version_dir = start_artifact_version(tag_dir)
+
+    utils.save_compressed_json(_merged_data["vertices"], version_dir / "vertices.zlib")
+
+    tag_sizes = {}
+    for tag in _merged_data["mesh_tags"]:
+        tag_data = {"meshes": {tag: _merged_data["meshes"][tag]}}
+        tag_sizes[tag] = utils.save_compressed_json(tag_data, version_dir / f"tag_{tag}.zlib")["decompressed_size"]
+
+    for tag in _merged_data["volume_tags"]:
+        tag_data = {
+            "volumes": {tag: _merged_data["volumes"][tag]},
+            "volumes_raw": {tag: _merged_data["volumes_raw"][tag]},
+        }
+        tag_sizes[tag] = utils.save_compressed_json(tag_data, version_dir / f"tag_{tag}.zlib")["decompressed_size"]
+
+    index = {key: _merged_data[key] for key in (
+        "mesh_tags", "volume_tags", "all_tags", "mesh_descriptions", "volume_descriptions"
+    )}
+    index["decompressed_sizes"] = tag_sizes
+    publish_artifact_version(tag_dir, version_dir, index)
+
+
+def get_3d_data_source_path(_current_ensemble: str, _patient_id: str) -> Path:
+    """
+    Get the path of the file recording the electrode the 3D data was created from.
+
+    Parameters
+    ----------
+    _current_ensemble : str
+        Current ensemble ID.
+    _patient_id : str
+        Patient ID.
+
+    Returns
+    -------
+    Path
+        The path of `{ensemble}_3d_data_source.json`.
+    """
+    return utils.DATABASE_PATHS["process"] / _patient_id / _current_ensemble / f"{_current_ensemble}_3d_data_source.json"
+
+
+def get_3d_data_source(_current_ensemble: str, _patient_id: str) -> Optional[int]:
+    """
+    Get the index of the electrode the 3D data was created from.
+
+    The 3D data is created from the simulated mesh of an electrode, which
+    includes the placed electrode, so it is only current if it was created
+    from the first successful electrode.
+
+    Parameters
+    ----------
+    _current_ensemble : str
+        Current ensemble ID.
+    _patient_id : str
+        Patient ID.
+
+    Returns
+    -------
+    int or None
+        The electrode index, or None if the 3D data does not exist, was not
+        completely written, or was created without recording its source.
+    """
+    path = get_3d_data_source_path(_current_ensemble, _patient_id)
+    if not path.exists():
+        return None
+    return utils.load_json(path).get("electrode_index")
+
+
+def create_3d_data(_current_ensemble: str, _current_mesh: mesh_tools.Msh, _patient_id: str,
+                   _electrode_index: Optional[int] = None) -> int:
     """
     Create 3D data files for a given ensemble and patient.
 
+    The electrode the mesh belongs to is recorded once all files were
+    written (see get_3d_data_source).
+
     Parameters
     ----------
     _current_ensemble : str
@@ -146,6 +246,8 @@ def create_3d_data(_current_ensemble: str, _current_mesh: mesh_tools.Msh, _patie
         Mesh object containing simulation data.
     _patient_id : str
         Patient ID.
+    _electrode_index : int, optional
+        Index of the electrode whose simulated mesh `_current_mesh` is.
 
     Returns
     -------
@@ -217,8 +319,9 @@ def create_3d_data(_current_ensemble: str, _current_mesh: mesh_tools.Msh, _patie
     print("Creating JSON Files...")
     save_dir = utils.DATABASE_PATHS["process"] / _patient_id / _current_ensemble
     save_dir.mkdir(parents=True, exist_ok=True)
-
-    utils.save_json(merged_data, save_dir / f"{_current_ensemble}_3d_data.json")
+    # Files of different electrodes are mixed until all of them were written
+    source_path = get_3d_data_source_path(_current_ensemble, _patient_id)
+    source_path.unlink(missing_ok=True)
 
     print("Creating JSON Files for individual data...")
     print("tetras_per_vertex...")
@@ -234,8 +337,28 @@ def create_3d_data(_current_ensemble: str, _current_mesh: mesh_tools.Msh, _patie
     utils.save_json(tag_length_dict, save_dir / f"{_current_ensemble}_tag_length_dict.json")
 
     print("Compressed JSON...")
-    compressed_data = zlib.compress(json.dumps(merged_data).encode())
-    compressed_file = save_dir / f"{_current_ensemble}_compressed_3d_data.zlib"
-    compressed_file.write_bytes(compressed_data)
+    utils.save_compressed_json(
+        merged_data,
+        save_dir / f"{_current_ensemble}_compressed_3d_data.zlib",
+        save_dir / f"{_current_ensemble}_3d_data.json",
+        keep_json=utils.KEEP_UNCOMPRESSED_JSON
+    )
+
+    print("Tag files...")
+    create_tag_artifacts(save_dir, _current_ensemble, merged_data)
+
+    if utils.WRITE_BINARY_ARTIFACTS:
+        print("Binary container...")
+        arrays = {"vertices": (vertices, "float32")}
+        arrays.update(utils.tag_arrays("meshes", meshes_dict, "uint32"))
+        arrays.update(utils.tag_arrays("volumes", volume_dict, "uint32"))
+        arrays.update(utils.tag_arrays("volumes_raw", volume_raw_dict, "uint32"))
+        metadata = {key: merged_data[key] for key in (
+            "mesh_tags", "volume_tags", "all_tags", "mesh_descriptions", "volume_descriptions"
+        )}
+        utils.save_compressed_binary(arrays, metadata, save_dir / f"{_current_ensemble}_compressed_3d_data.bin.zlib")
+
+    if _electrode_index is not None:
+        utils.save_json({"electrode_index": _electrode_index}, source_path)
 
     return _max_index
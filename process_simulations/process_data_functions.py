@@ -10,23 +10,23 @@ Functions
 
 Dependencies
 ------------
-    - json : For reading and writing JSON files.
     - os : For file and directory operations.
     - shutil : For high-level file operations.
-    - zlib : For compressing data.
     - numpy : For numerical operations and statistics.
     - database_params : Custom module for database parameters and paths.
     - process_simulations.process_helper_functions : Custom module for creating tag-based dictionaries.
 """
 
-import json
 import shutil
-import zlib
 
 import numpy as np
 
 import utils
-from process_simulations.process_helper_functions import create_tag_based_dictionary
+from process_simulations.process_helper_functions import (
+    create_electrode_artifacts,
+    create_tag_based_dictionary,
+    load_electrode_artifacts,
+)
 
 
 def convert_data_to_json(_mesh, _config_id: str, _current_electrode: str, _patient_id: str):
@@ -85,6 +85,10 @@ def create_one_json_data_file(_config_id: str, _patient_id: str, _successful_ind
     """
     Create a single JSON data file from multiple simulation outputs for a given configuration and patient.
 
+    Electrodes without converted files ('Electrode_<index>/'), e.g. because
+    they were not simulated again, are taken from the current per-electrode
+    files of the previous run (see load_electrode_artifacts).
+
     Parameters
     ----------
     _config_id : str
@@ -107,6 +111,14 @@ def create_one_json_data_file(_config_id: str, _patient_id: str, _successful_ind
     tags = ["1001", "1002", "1003", "1006", "1008", "1009", "1010", "1", "2", "3", "6", "8", "9", "10"]  # 1005 , 5 , 7
 
     for i in _successful_indices:
+        if not (path / f"Electrode_{i}").is_dir():
+            electrode_data = load_electrode_artifacts(path / f"{_config_id}_electrodes", f"Electrode_{i}")
+            if electrode_data is None:
+                print(f"Error, no converted data of Electrode_{i}")
+                return
+            Electrodes[f"Electrode_{i}"] = electrode_data
+            continue
+
         Magnitude = {}
         Vectorfield = {}
 
@@ -134,14 +146,26 @@ def create_one_json_data_file(_config_id: str, _patient_id: str, _successful_ind
         "Metadata": {}
     }
 
-    print("Creating JSON...")
-    utils.save_json(merged_data, path / f"{_config_id}_data.json")
-
     # Compress JSON data with zlib
-    print("Compressing JSON...")
-    compressed_data = zlib.compress(json.dumps(merged_data).encode())
-    compressed_file = path / f"{_config_id}_compressed_data.zlib"
-    compressed_file.write_bytes(compressed_data)
+    print("Creating and compressing JSON...")
+    utils.save_compressed_json(
+        merged_data,
+        path / f"{_config_id}_compressed_data.zlib",
+        path / f"{_config_id}_data.json",
+        keep_json=utils.KEEP_UNCOMPRESSED_JSON
+    )
+
+    print("Creating per-electrode files...")
+    create_electrode_artifacts(path / f"{_config_id}_electrodes", Electrodes)
+
+    if utils.WRITE_BINARY_ARTIFACTS:
+        print("Creating binary container...")
+        arrays = {}
+        for electrode, electrode_data in Electrodes.items():
+            arrays.update(utils.tag_arrays(f"{electrode}/Magnitude", electrode_data["Magnitude"], "float32"))
+            arrays.update(utils.tag_arrays(f"{electrode}/Vectorfield", electrode_data["Vectorfield"], "float32"))
+        metadata = {"Electrodes": list(Electrodes.keys()), "Metadata": merged_data["Metadata"]}
+        utils.save_compressed_binary(arrays, metadata, path / f"{_config_id}_compressed_data.bin.zlib")
 
     # Delete individual files
     print("Deleting...")
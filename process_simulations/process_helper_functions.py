@@ -12,14 +12,33 @@ Functions
     - custom_switch : Return the description for a given tag.
     - custom_switch_default : Return the default description for a given tag.
     - check_for_ndarrays : Recursively check for numpy ndarrays in a data structure.
+    - start_artifact_version : Create the directory of a new version of per-electrode or per-tag artifacts.
+    - publish_artifact_version : Make a new artifact version the current one and remove outdated versions.
+    - create_electrode_artifacts : Create one compressed file per electrode and tag so electrodes can be retrieved individually.
+    - load_electrode_artifacts : Load the data of one electrode from the current version of the per-electrode files.
+    - create_skin_artifact : Create the compressed skin mesh, optionally with only the vertices it uses.
 
 Dependencies
 ------------
+    - os, tempfile : For moving the skin mesh into place atomically.
+    - shutil : For removing the files of outdated runs.
+    - time : For naming the versions of the artifacts.
+    - zlib : For recognizing corrupted per-electrode files.
     - numpy : For numerical operations and handling numpy ndarrays.
+    - utils : Custom module for saving and loading compressed JSON files.
 """
 
+import os
+import shutil
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
 import numpy as np
 
+import utils
+
 
 def is_valid_tag(str_tag: str) -> bool:
     """
@@ -193,3 +212,211 @@ def custom_switch_default(x: str) -> str:
         "1009": "Blood",
         "1010": "Muscle",
     }.get(x, f"{x} NOT FOUND")
+
+
+def start_artifact_version(_artifact_dir):
+    """
+    Create the directory of a new version of per-electrode or per-tag artifacts.
+
+    The artifacts of every post-processing run are written to a new version
+    directory '<_artifact_dir>/v<time>/', so the files of the current version
+    are never changed or deleted while the server may be sending them. The
+    new version is only served once publish_artifact_version() replaced the
+    index.
+
+    Parameters
+    ----------
+    _artifact_dir : Path
+        Directory of the artifacts.
+
+    Returns
+    -------
+    Path
+        The new, empty version directory.
+    """
+    version_dir = _artifact_dir / f"v{time.time_ns()}"
+    version_dir.mkdir(parents=True)
+    return version_dir
+
+
+def publish_artifact_version(_artifact_dir, _version_dir, _index: dict) -> None:
+    """
+    Make a new artifact version the current one and remove outdated versions.
+
+    '<_artifact_dir>/index.json' is replaced atomically by `_index` with the
+    key 'version' naming `_version_dir`. The previous version is kept, so
+    requests that read the old index can still send its files; older versions
+    (and the unversioned files of earlier layouts, once they are not the
+    previous version anymore) are removed.
+
+    Parameters
+    ----------
+    _artifact_dir : Path
+        Directory of the artifacts.
+    _version_dir : Path
+        The version directory returned by start_artifact_version().
+    _index : dict
+        The index of the new version.
+
+    Returns
+    -------
+    None
+    """
+    index_path = _artifact_dir / "index.json"
+    try:
+        previous_version = utils.load_json(index_path).get("version")
+        previous_layout = previous_version is None
+    except (OSError, ValueError):
+        previous_version, previous_layout = None, False
+
+    utils.save_json_batch({index_path: {**_index, "version": _version_dir.name}})
+
+    keep = {index_path.name, _version_dir.name, previous_version}
+    for entry in _artifact_dir.iterdir():
+        if entry.name in keep or entry.name.startswith("."):
+            continue
+        is_version = entry.name[:1] == "v" and entry.name[1:].isdigit()
+        # The unversioned files of an earlier layout are the previous version
+        if previous_layout and not is_version:
+            continue
+        if entry.is_dir():
+            # Files still opened by a request (on Windows) are removed next time
+            shutil.rmtree(entry, ignore_errors=True)
+        else:
+            entry.unlink(missing_ok=True)
+
+
+def create_electrode_artifacts(_electrode_dir, _electrodes: dict) -> None:
+    """
+    Create one compressed file per electrode and tag so electrodes can be retrieved individually.
+
+    The files are written to a new version directory in `_electrode_dir`
+    (see start_artifact_version()):
+        - <version>/<electrode>/tag_<tag>.zlib : The 'Magnitude' and 'Vectorfield' of one electrode and tag.
+        - index.json : The current version, the available electrodes, their tags and sizes.
+
+    Parameters
+    ----------
+    _electrode_dir : Path
+        Directory for the per-electrode files. Outdated versions are removed.
+    _electrodes : dict
+        The 'Electrodes' dictionary of the simulated or ROI data, mapping electrode
+        names to {"Magnitude": {tag: ...}, "Vectorfield": {tag: ...}}.
+
+    Returns
+    -------
+    None
+    """
+    version_dir = start_artifact_version(_electrode_dir)
+
+    decompressed_sizes = {}
+    for electrode, electrode_data in _electrodes.items():
+        (version_dir / electrode).mkdir()
+        decompressed_sizes[electrode] = {}
+        for tag in electrode_data["Magnitude"]:
+            tag_data = {
+                "Magnitude": {tag: electrode_data["Magnitude"][tag]},
+                "Vectorfield": {tag: electrode_data["Vectorfield"].get(tag, {})},
+            }
+            metadata = utils.save_compressed_json(tag_data, version_dir / electrode / f"tag_{tag}.zlib")
+            decompressed_sizes[electrode][tag] = metadata["decompressed_size"]
+
+    index = {
+        "electrodes": list(_electrodes.keys()),
+        "decompressed_sizes": decompressed_sizes,
+    }
+    publish_artifact_version(_electrode_dir, version_dir, index)
+
+
+def load_electrode_artifacts(_electrode_dir, _electrode: str):
+    """
+    Load the data of one electrode from the current version of the per-electrode files.
+
+    This is the inverse of create_electrode_artifacts(), so electrodes that
+    were not simulated again can be merged without converting them again.
+
+    Parameters
+    ----------
+    _electrode_dir : Path
+        Directory of the per-electrode files.
+    _electrode : str
+        Name of the electrode (e.g. 'Electrode_0').
+
+    Returns
+    -------
+    dict or None
+        {"Magnitude": {tag: ...}, "Vectorfield": {tag: ...}} of the electrode,
+        or None if the current version does not contain it.
+    """
+    try:
+        index = utils.load_json(_electrode_dir / "index.json")
+    except (OSError, ValueError):
+        return None
+    if _electrode not in index.get("electrodes", []):
+        return None
+
+    magnitude = {}
+    vectorfield = {}
+    version_dir = _electrode_dir / index.get("version", "")
+    for tag in index["decompressed_sizes"][_electrode]:
+        try:
+            tag_data = utils.load_compressed_json(version_dir / _electrode / f"tag_{tag}.zlib")
+        except (OSError, ValueError, zlib.error):
+            return None
+        magnitude.update(tag_data["Magnitude"])
+        vectorfield.update(tag_data["Vectorfield"])
+    return {"Magnitude": magnitude, "Vectorfield": vectorfield}
+
+
+def create_skin_artifact(_vertices, _triangles, _compressed_path, _reindex: bool = True) -> dict:
+    """
+    Create the compressed skin mesh, optionally with only the vertices it uses.
+
+    With `_reindex`, the vertices are reindexed, so the triangles refer to
+    positions in the reduced vertex list instead of the complete head model.
+    Without it, the vertices of the complete head model are kept.
+
+    The artifact, its sidecar and its encoded variants are written to a
+    temporary directory first and then moved into place, the .zlib file last.
+    A reader therefore either finds no artifact or a complete one, even if
+    several processes create it at the same time.
+
+    Parameters
+    ----------
+    _vertices : array_like
+        The vertex coordinates of the complete mesh (n x 3).
+    _triangles : array_like
+        The skin triangles as indices into `_vertices` (m x 3).
+    _compressed_path : Path
+        A Path object where the compressed skin mesh should be saved.
+    _reindex : bool, optional
+        If True (default), only the vertices used by the skin are kept.
+
+    Returns
+    -------
+    dict
+        The metadata that was written to the sidecar.
+    """
+    triangles = np.asarray(_triangles, dtype=np.int64).reshape(-1, 3)
+
+    if _reindex:
+        used_vertices, reindexed_triangles = np.unique(triangles, return_inverse=True)
+        skin_data = {
+            "vertices": np.asarray(_vertices)[used_vertices].tolist(),
+            "triangles": reindexed_triangles.reshape(-1, 3).tolist(),
+        }
+    else:
+        skin_data = {
+            "vertices": np.asarray(_vertices).tolist(),
+            "triangles": triangles.tolist(),
+        }
+
+    with tempfile.TemporaryDirectory(dir=_compressed_path.parent, prefix=".skin-") as staging_dir:
+        staged_path = Path(staging_dir) / _compressed_path.name
+        metadata = utils.save_compressed_json(skin_data, staged_path)
+        for staged_file in Path(staging_dir).iterdir():
+            if staged_file != staged_path:
+                os.replace(staged_file, _compressed_path.with_name(staged_file.name))
+        os.replace(staged_path, _compressed_path)
+
+    return metadata
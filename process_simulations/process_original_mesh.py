@@ -10,22 +10,18 @@ Functions
 
 Dependencies
 ------------
-    - json : For reading and writing JSON files.
     - os : For file and directory operations.
-    - zlib : For compressing data.
     - numpy : For numerical operations and statistics.
     - database_params : Custom module for database parameters and paths.
     - simnibs.mesh_tools : For reading mesh files.
     - process_simulations.process_helper_functions : Custom module for creating tag lookup tables.
 """
-import json
-import zlib
-
 import numpy as np
 from simnibs import mesh_tools
 
 import utils
 from process_simulations.process_helper_functions import (
+    create_skin_artifact,
     create_tag_look_up_table_default,
 )
 
@@ -79,6 +75,12 @@ def convert_mesh_to_json(mesh: mesh_tools.Msh, _patient_id: str) -> None:
     # Save skin mesh to JSON file
     utils.save_json(meshes_dict["1005"], save_path / f"{_patient_id}_skin_mesh.json")
 
+    # Save compressed skin mesh with reindexed vertices, and with the vertices of the complete head model
+    create_skin_artifact(vertices, meshes_dict["1005"], save_path / f"{_patient_id}_compressed_skin_mesh.zlib")
+    create_skin_artifact(
+        vertices, meshes_dict["1005"], save_path / f"{_patient_id}_compressed_skin_mesh_full.zlib", _reindex=False
+    )
+
     # Combine all data into a single dictionary
     merged_data = {
         "vertices": vertices.tolist(),
@@ -86,22 +88,17 @@ def convert_mesh_to_json(mesh: mesh_tools.Msh, _patient_id: str) -> None:
         "mesh_tags": unique_tag_list.tolist(),
         "mesh_descriptions": mesh_descriptions
     }
-    # Save combined data to a single JSON file
-    utils.save_json(merged_data, save_path / f"{_patient_id}_original_3d_data.json")
-
     #print("Checking for ndarrays...")
     #check_for_ndarrays(merged_data)
 
-    # Compress JSON data with zlib
+    # Save combined data to a single, zlib-compressed JSON file
     print("Compressing JSON...")
-    try:
-        compressed_data = zlib.compress(json.dumps(merged_data).encode())
-        # Save compressed data to a file
-        compressed_file = save_path / f"{_patient_id}_original_compressed_3d_data.zlib"
-        compressed_file.write_bytes(compressed_data)
-        print(f"Successfully compressed to zlib in: {str(compressed_file)}")
-    except Exception:
-        raise
+    utils.save_compressed_json(
+        merged_data,
+        save_path / f"{_patient_id}_original_compressed_3d_data.zlib",
+        save_path / f"{_patient_id}_original_3d_data.json",
+        keep_json=utils.KEEP_UNCOMPRESSED_JSON
+    )
 
     print("Done!")
 
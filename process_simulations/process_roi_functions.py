@@ -19,22 +19,19 @@ Functions
 
 Dependencies
 ------------
-    - json : For reading and writing JSON files.
     - os : For file and directory operations.
-    - zlib : For compressing data.
     - collections.Counter : For counting occurrences of values.
     - numpy : For numerical operations and statistics.
     - database_params : Custom module for database parameters and paths.
 """
 
-import json
-import zlib
 from collections import Counter
 
 import numpy as np
 from scipy.spatial import Delaunay
 
 import utils
+from process_simulations.process_helper_functions import create_electrode_artifacts
 
 
 def is_cuboid(points):
@@ -209,7 +206,9 @@ def create_roi_mask(_config_id: str, _patient_id: str, _roi_id: str) -> None:
     path_roi.mkdir(parents=True, exist_ok=True)
 
     print("Loading vertices...")
-    geometry_data = utils.load_json(path / f"{_config_id}_3d_data.json")
+    geometry_data = utils.load_compressed_json(
+        path / f"{_config_id}_compressed_3d_data.zlib", path / f"{_config_id}_3d_data.json"
+    )
     vertices = np.array(geometry_data["vertices"])
     meshes = geometry_data["meshes"]
     volumes_raw = geometry_data["volumes_raw"]
@@ -342,8 +341,7 @@ def map_data_to_roi(_config_id: str, _patient_id: str, _roi_id: str) -> None:
     path_roi = path / _roi_id
 
     print("Loading data ...")
-    data_file_path = path / f"{_config_id}_data.json"
-    data_dict = utils.load_json(data_file_path)
+    data_dict = utils.load_compressed_json(path / f"{_config_id}_compressed_data.zlib", path / f"{_config_id}_data.json")
 
     print("Loading roi_indices ...")
     roi_indices_path = path_roi / f"{_roi_id}_indices_per_tag_in_roi.json"
@@ -380,15 +378,31 @@ def map_data_to_roi(_config_id: str, _patient_id: str, _roi_id: str) -> None:
     mesh_vertex_tag_index_mapping = utils.load_json(path_roi / f"{_roi_id}_mesh_vertex_tag_index_mapping.json")
     roi_data_dict.setdefault("Mesh_Vertex_Tag_Mapping", mesh_vertex_tag_index_mapping)
 
-    print("Creating JSON ...")
-    utils.save_json(roi_data_dict, path_roi / f"{_roi_id}_roi_data.json")
-
-    print("Compressing JSON ...")
-    # Compress JSON data with zlib
-    compressed_data = zlib.compress(json.dumps(roi_data_dict).encode())
-    # Save compressed data to a file
-    compressed_file = path_roi / f"{_roi_id}_compressed_roi_data.zlib"
-    compressed_file.write_bytes(compressed_data)
+    print("Creating and compressing JSON ...")
+    utils.save_compressed_json(
+        roi_data_dict,
+        path_roi / f"{_roi_id}_compressed_roi_data.zlib",
+        path_roi / f"{_roi_id}_roi_data.json",
+        keep_json=utils.KEEP_UNCOMPRESSED_JSON
+    )
+
+    print("Creating per-electrode files ...")
+    create_electrode_artifacts(path_roi / f"{_roi_id}_electrodes", merge_data_dict)
+
+    if utils.WRITE_BINARY_ARTIFACTS:
+        print("Creating binary container ...")
+        arrays = utils.tag_arrays("Index_Mapping", roi_indices_dict, "uint32")
+        for electrode, electrode_data in merge_data_dict.items():
+            arrays.update(utils.tag_arrays(f"{electrode}/Magnitude", electrode_data["Magnitude"], "float32"))
+            arrays.update(utils.tag_arrays(f"{electrode}/Vectorfield", electrode_data["Vectorfield"], "float32"))
+        # The vertex tag mappings are nested dictionaries and stay JSON
+        metadata = {
+            "Electrodes": list(merge_data_dict.keys()),
+            "Tag_Length": tag_length_dict,
+            "Volume_Vertex_Tag_Mapping": volume_vertex_tag_index_mapping,
+            "Mesh_Vertex_Tag_Mapping": mesh_vertex_tag_index_mapping,
+        }
+        utils.save_compressed_binary(arrays, metadata, path_roi / f"{_roi_id}_compressed_roi_data.bin.zlib")
 
 
 def build_vertex_tag_index_structure(_vertex_indices_data: dict, _indices_per_tag_in_roi: dict, bIsTetra=True) -> dict:
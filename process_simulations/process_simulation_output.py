@@ -5,6 +5,7 @@ and map simulation data to regions of interest (ROIs).
 
 Functions
 ---------
+    - process_electrode_output : Convert the simulation output of a single electrode to JSON format, as soon as it is available.
     - convert_to_data_and_3d : Convert simulation output to 3D data and JSON format for a given configuration and patient.
     - convert_to_3d : Convert simulation output to 3D data for a given configuration and patient.
     - convert_to_data_for_reference : Convert reference simulation output to JSON format.
@@ -26,7 +27,7 @@ Dependencies
 from simnibs import mesh_tools
 
 import utils
-from process_simulations.process_3d_functions import create_3d_data
+from process_simulations.process_3d_functions import create_3d_data, get_3d_data_source
 from process_simulations.process_data_functions import (
     convert_data_to_json,
     create_one_json_data_file,
@@ -39,16 +40,55 @@ from process_simulations.validate_simulation_output import (
 )
 
 
-def convert_to_data_and_3d(_config_id: str, _patient_id: str) -> None:
+def process_electrode_output(_config_id: str, _patient_id: str, _electrode_index: int, _create_3d: bool = False) -> tuple:
+    """
+    Convert the simulation output of a single electrode to JSON format.
+
+    This is the part of the post-processing that only needs the electrode's
+    own simulation, so it can run while the other electrodes are still being
+    simulated.
+
+    Parameters
+    ----------
+    _config_id : str
+        Configuration ID.
+    _patient_id : str
+        Patient ID.
+    _electrode_index : int
+        Index of the electrode (Electrode_<index>).
+    _create_3d : bool, optional
+        Whether to create the 3D data from this electrode's mesh as well.
+
+    Returns
+    -------
+    tuple
+        Median, mean, and 95th percentile of the combined magnitudes.
+    """
+    mesh_raw = mesh_tools.read_msh(utils.get_sim_mesh_path(_config_id, str(_electrode_index)))
+
+    if _create_3d:
+        create_3d_data(_config_id, mesh_raw, _patient_id, _electrode_index)
+    return convert_data_to_json(mesh_raw, _config_id, f"Electrode_{_electrode_index}", _patient_id)
+
+
+def convert_to_data_and_3d(_config_id: str, _patient_id: str, _processed: dict = None) -> None:
     """
     Convert simulation output to 3D data and JSON format for a given configuration and patient.
 
+    Electrodes already converted while the simulations were running (see
+    process_electrode_output) are not converted again; only their statistics
+    are added to the validation results. The 3D data is created from the
+    first successful electrode, unless it already was (see
+    process_3d_functions.get_3d_data_source).
+
     Parameters
     ----------
     _config_id : str
         Configuration ID.
     _patient_id : str
         Patient ID.
+    _processed : dict, optional
+        Median, mean, and 95th percentile of the already converted electrodes, by index.
 
     Returns
     -------
@@ -62,17 +102,20 @@ def convert_to_data_and_3d(_config_id: str, _patient_id: str) -> None:
         return
 
     successful_indices = validation_results['successful_simulation_indices']
-
-    data_3d_created = False
-
-    for i in successful_indices:
-        mesh_raw = mesh_tools.read_msh(utils.get_sim_mesh_path(_config_id, str(i)))
-
-        if not data_3d_created:
-            create_3d_data(_config_id, mesh_raw, _patient_id)
-            data_3d_created = True
-        median_magnitude, mean_magnitude, percentile_95 = convert_data_to_json(mesh_raw, _config_id,
-                                                                               f"Electrode_{i}", _patient_id)
+    processed = _processed or {}
+    index_3d = get_3d_data_source(_config_id, _patient_id)
+
+    for position, i in enumerate(successful_indices):
+        create_3d = position == 0 and index_3d != i
+
+        if i in processed:
+            if create_3d:
+                create_3d_data(_config_id, mesh_tools.read_msh(utils.get_sim_mesh_path(_config_id, str(i))), _patient_id, i)
+            median_magnitude, mean_magnitude, percentile_95 = processed[i]
+        else:
+            median_magnitude, mean_magnitude, percentile_95 = process_electrode_output(
+                _config_id, _patient_id, i, create_3d
+            )
         validation_results[f'Electrode_{i}']['median_magnitude'] = median_magnitude
         validation_results[f'Electrode_{i}']['mean_magnitude'] = mean_magnitude
         validation_results[f'Electrode_{i}']['percentile_95'] = percentile_95
@@ -86,6 +129,9 @@ def convert_to_3d(_config_id: str, _patient_id: str) -> None:
     """
     Convert simulation output to 3D data for a given configuration and patient.
 
+    The 3D data is created from the first successful electrode; nothing is
+    done if it already was (see process_3d_functions.get_3d_data_source).
+
     Parameters
     ----------
     _config_id : str
@@ -104,8 +150,12 @@ def convert_to_3d(_config_id: str, _patient_id: str) -> None:
         print(f"Error, no validation results at {(path / f'{_config_id}_validation_results.json').as_posix()}")
         return
 
-    mesh_raw = mesh_tools.read_msh(utils.get_sim_mesh_path(_config_id, str(validation_results['successful_simulation_indices'][0])))
-    create_3d_data(_config_id, mesh_raw, _patient_id)
+    successful_indices = validation_results['successful_simulation_indices']
+    if not successful_indices or get_3d_data_source(_config_id, _patient_id) == successful_indices[0]:
+        return
+
+    mesh_raw = mesh_tools.read_msh(utils.get_sim_mesh_path(_config_id, str(successful_indices[0])))
+    create_3d_data(_config_id, mesh_raw, _patient_id, successful_indices[0])
 
 
 def convert_to_data_for_reference(_config_id: str, _patient_id: str) -> None:
@@ -127,7 +177,7 @@ def convert_to_data_for_reference(_config_id: str, _patient_id: str) -> None:
     convert_data_to_json(mesh_raw, "REFERENCE_V000", "REFERENCE", "NO_NAME")
 
 
-def process_simulation_output(_config_id: str, _patient_id: str) -> None:
+def process_simulation_output(_config_id: str, _patient_id: str, _processed: dict = None) -> None:
     """
     Process simulation output for a given configuration and patient.
     This includes validating simulation success, converting data to 3D, and validating results.
@@ -138,6 +188,9 @@ def process_simulation_output(_config_id: str, _patient_id: str) -> None:
         Configuration ID.
     _patient_id : str
         Patient ID.
+    _processed : dict, optional
+        Median, mean, and 95th percentile of the electrodes already converted
+        while the simulations were running, by index (see convert_to_data_and_3d).
 
     Returns
     -------
@@ -147,7 +200,7 @@ def process_simulation_output(_config_id: str, _patient_id: str) -> None:
     validate_simulations_success(_config_id, _patient_id)
 
     print(f'=== Process Simulation Output for {_patient_id}: {_config_id} ===')
-    convert_to_data_and_3d(_config_id, _patient_id)
+    convert_to_data_and_3d(_config_id, _patient_id, _processed)
 
     print(f'=== Validate Simulations Result (2/2) for {_patient_id}: {_config_id} ===')
     validate_simulations_result(_config_id, _patient_id)
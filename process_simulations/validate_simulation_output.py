@@ -120,17 +120,18 @@ def collect_validation_results(_config_id: str, _patient_id: str):
 
     print(f"Collecting validation results for {_patient_id}: {_config_id}")
     data_file_path = utils.DATABASE_PATHS["process"] / _patient_id / _config_id / f"{_config_id}_data.json"
+    compressed_file_path = data_file_path.with_name(f"{_config_id}_compressed_data.zlib")
     validation_file_path = utils.DATABASE_PATHS["process"] / _patient_id / _config_id
 
     validation_results = utils.load_json(validation_file_path / f"{_config_id}_validation_results.json")
 
     # Check if the data file exists
-    if not data_file_path.exists():
-        print(f"File {data_file_path} does not exist.")
+    if not compressed_file_path.exists():
+        print(f"File {compressed_file_path} does not exist.")
         return
 
     # Load the JSON data file
-    data = utils.load_json(data_file_path)
+    data = utils.load_compressed_json(compressed_file_path, data_file_path)
 
     # Iterate over all electrodes and collect magnitude values
     for electrode, electrode_data in data['Electrodes'].items():
@@ -174,16 +175,17 @@ def collect_validation_results_for_roi(_config_id: str, _patient_id: str, _roi_i
 
     print(f"Collecting validation results for {_patient_id}: {_config_id} : {_roi_id}")
     data_file_path = utils.DATABASE_PATHS["process"] / _patient_id / _config_id / _roi_id / f"{_roi_id}_roi_data.json"
+    compressed_file_path = data_file_path.with_name(f"{_roi_id}_compressed_roi_data.zlib")
     validation_file_path = utils.DATABASE_PATHS["process"] / _patient_id / _config_id / _roi_id
 
     validation_results = {}  # Initialize validation_results
 
-    if not data_file_path.exists():
-        print(f"File {data_file_path} does not exist.")
+    if not compressed_file_path.exists():
+        print(f"File {compressed_file_path} does not exist.")
         raise FileNotFoundError
 
     # Load the JSON data file
-    data = utils.load_json(data_file_path)
+    data = utils.load_compressed_json(compressed_file_path, data_file_path)
 
     volume_tags = {"1", "2", "3", "6", "8", "9", "10"}
     # mesh_tags = {"1001", "1002", "1003", "1006", "1008", "1009", "1010"}
@@ -7,28 +7,105 @@ This script:
     - Parses command-line arguments for patient/config/ROI info.
     - Validates necessary files (electrode positions, ROI data).
     - Loads simulation settings from an .ini file.
-    - Spawns Docker containers to run simulations concurrently for each electrode.
+    - Spawns Docker containers to run simulations concurrently for each electrode,
+      sharing the host with concurrent ensembles by priority and fair share.
     - Performs post-processing steps (mapping simulations to ROI, generating 3D data, validation).
 """
 
 
 import argparse
+import concurrent.futures
 import configparser
+import importlib
 import json
+import os
+import queue
+import re
+import shutil
 import subprocess
 import sys
+import tempfile
+import threading
 import time
+import traceback
+import uuid
+from collections import deque
+from pathlib import Path
 
 from process_simulations.process_simulation_output import (
     collect_validation_results_for_roi,
     convert_to_3d,
     map_simulation_to_roi,
+    process_electrode_output,
     process_simulation_output,
 )
 from process_simulations.validate_simulation_output import (
     collect_validation_results
 )
-from utils import DATABASE_PATHS, SIMULATION_BASE, set_mesh_name, DATA_PATH
+from utils import (
+    DATABASE_PATHS,
+    CODE_PATH,
+    DATA_PATH,
+    JOB_POST_PROCESSING,
+    JOB_PRIORITIES,
+    SIMULATION_BASE,
+    PARAM_FILE_PATH,
+    JobQueue,
+    SlotScheduler,
+    cancel_worker_jobs,
+    collect_worker_results,
+    count_pending_worker_jobs,
+    get_live_workers,
+    fingerprint_file,
+    fingerprint_mesh,
+    get_sim_mesh_path,
+    get_sim_output_path,
+    hash_simulation_inputs,
+    load_json,
+    load_simulation_inputs,
+    read_msh_counts,
+    requeue_stale_worker_jobs,
+    save_simulation_inputs,
+    set_mesh_name,
+    submit_worker_job,
+)
+
+# Exit code of a container killed for running out of memory (128 + SIGKILL). Any
+# SIGKILL (e.g. `docker kill`) results in it, so Docker is asked whether it was an OOM kill
+OOM_EXIT_CODE = 137
+
+# Rough memory model of one simulation container, in bytes: a fixed base plus
+# a share per node and element of the head mesh. Calibrated so that the
+# ernie head mesh (about 0.9M nodes, 4.9M elements) needs about 20 GB
+CONTAINER_BASE_MEMORY = 2 * 1024 ** 3
+MEMORY_PER_NODE = 2 * 1024
+MEMORY_PER_ELEMENT = 3.5 * 1024
+
+# Factor by which the memory limit of a container is raised after it ran out of memory
+OOM_MEMORY_FACTOR = 1.5
+
+# Names of the warm worker containers are this prefix plus an index
+WORKER_NAME_PREFIX = "planningtool_worker"
+
+# Command of the warm worker containers, replacing the CMD of the image
+WORKER_COMMAND = ["conda", "run", "--no-capture-output", "-n", "simnibs_env", "python", "/app/Docker_Sim/worker.py"]
+
+# Seconds between two looks for the results of the worker jobs, and between two checks that workers are running
+WORKER_RESULT_INTERVAL = 0.5
+WORKER_CHECK_INTERVAL = 15
+
+# Seconds after which the container slots and the slot request of an ensemble
+# expire unless they are renewed, which frees the slots of a process that died
+SLOT_TTL = 60
+
+# Seconds between two attempts to take a container slot while other ensembles hold all of them
+SLOT_POLL_INTERVAL = 1
+
+# Seconds between two looks for electrodes that finished simulating, to start their post-processing
+PIPELINE_POLL_INTERVAL = 2
+
+# Electrode names of the form the post-processing expects, with the electrode index
+ELECTRODE_NAME_PATTERN = re.compile(r"Electrode_(\d+)")
 
 
 def parse_arguments():
@@ -39,7 +116,7 @@ def parse_arguments():
     -------
     argparse.Namespace
         An object containing PatientID, ConfigID, and ROIID (all required),
-        or exits if any are missing.
+        JobID (optional), Force and Priority, or exits if any are missing.
     """
     sentinel = object()
     argument_parser = argparse.ArgumentParser(
@@ -59,6 +136,18 @@ def parse_arguments():
         "--ROIID", type=str, default=sentinel,
         help="Region of interest (ROI) ID (typically set in the frontend)"
     )
+    argument_parser.add_argument(
+        "--JobID", type=int, default=None,
+        help="ID of the job in the server's job queue, whose state is updated (optional)"
+    )
+    argument_parser.add_argument(
+        "--Force", action="store_true",
+        help="Simulate all electrodes, even those whose inputs did not change since their last simulation"
+    )
+    argument_parser.add_argument(
+        "--Priority", type=str, default="normal", choices=list(JOB_PRIORITIES),
+        help="Priority of the ensemble when containers or workers are shared with other ensembles (default: normal)"
+    )
     args = argument_parser.parse_args()
     args_dict = vars(args)
     required_args = ["PatientID", "ConfigID", "ROIID"]
@@ -90,8 +179,8 @@ def get_settings(config, args):
     """
     Retrieve and set the simulation settings from config.ini and command-line args.
 
-    This function extracts values such as max_containers, image_name, and mesh_name
-    from the config. If any are set to "default", it uses fallback values.
+    This function extracts values such as max_containers, image_name, mesh_name and
+    launch_interval from the config. If any are set to "default", it uses fallback values.
 
     Parameters
     ----------
@@ -103,18 +192,202 @@ def get_settings(config, args):
     Returns
     -------
     tuple
-        A tuple (max_containers, image_name, mesh_name).
+        A tuple (max_containers, image_name, mesh_name, launch_interval).
     """
     max_containers = config["Settings"]["max_containers"]
     image_name = config["Settings"]["image_name"]
     mesh_name = config["Settings"]["mesh_name"]
+    launch_interval = config["Settings"].get("launch_interval", "default")
 
     max_containers = 1 if max_containers == "default" else int(max_containers)
     image_name = "simnibs_simulation:latest" if image_name == "default" else image_name
     mesh_name = args.PatientID if mesh_name == "default" else mesh_name
+    launch_interval = 0.0 if launch_interval == "default" else float(launch_interval)
 
     set_mesh_name(mesh_name)
-    return max_containers, image_name, mesh_name
+    return max_containers, image_name, mesh_name, launch_interval
+
+
+def find_head_mesh(mesh_name):
+    """
+    Find the head mesh the containers will simulate on.
+
+    The containers search the whole data directory for `<mesh_name>.msh`;
+    the `requirements` directory is checked first, as that is where the mesh
+    is expected.
+
+    Parameters
+    ----------
+    mesh_name : str
+        Name of the mesh (without extension).
+
+    Returns
+    -------
+    Path or None
+        The path of the mesh file, or None if it was not found.
+    """
+    for directory in (DATA_PATH / "requirements", DATA_PATH):
+        for path in directory.rglob(f"{mesh_name}.msh"):
+            if path.is_file():
+                return path
+    return None
+
+
+def estimate_container_memory(mesh_path):
+    """
+    Estimate the memory a simulation container needs from the size of the head mesh.
+
+    Only the header of the mesh is read (see utils.read_msh_counts()).
+
+    Parameters
+    ----------
+    mesh_path : Path
+        The path of the head mesh.
+
+    Returns
+    -------
+    int
+        The estimated memory in bytes.
+    """
+    nodes, elements = read_msh_counts(mesh_path)
+    memory = int(CONTAINER_BASE_MEMORY + MEMORY_PER_NODE * nodes + MEMORY_PER_ELEMENT * elements)
+    print(f"{mesh_path.name}: {nodes} nodes, {elements} elements, "
+          f"estimated container memory {memory / 1024 ** 3:.1f} GB")
+    return memory
+
+
+def get_docker_host_resources():
+    """
+    Return the memory and CPUs available to Docker (e.g. the WSL VM on Windows).
+
+    Returns
+    -------
+    tuple
+        (total memory in bytes, number of CPUs), or (None, None) if Docker
+        cannot be reached.
+    """
+    try:
+        result = subprocess.run(
+            ["docker", "info", "--format", "{{.MemTotal}} {{.NCPU}}"],
+            capture_output=True, text=True, timeout=30, check=True
+        )
+        mem_total, ncpu = result.stdout.split()
+        return int(mem_total), int(ncpu)
+    except (OSError, subprocess.SubprocessError, ValueError) as e:
+        print(f"Warning: Unable to read the resources of the Docker host. {str(e)}")
+        return None, None
+
+
+def get_local_host_resources():
+    """
+    Return the memory and CPUs of this host, for simulations running without Docker.
+
+    Returns
+    -------
+    tuple
+        (total memory in bytes or None if unknown, number of CPUs or None).
+    """
+    try:
+        mem_total = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        # Not available on Windows
+        mem_total = None
+    return mem_total, os.cpu_count()
+
+
+def get_container_resources(config, mesh_name, max_containers, backend="docker"):
+    """
+    Determine the resource limits of the containers and the admission mode.
+
+    Reads container_admission, container_memory, container_cpus,
+    docker_memory_fraction, oom_retries and electrodes_per_container from config.ini:
+        - container_memory: explicit memory limit per container in GB, or
+          "default" to estimate it from the head mesh in "memory" admission
+          mode and to set no limit otherwise.
+        - container_cpus: CPUs per container, or "default" to split the CPUs
+          of the Docker host between max_containers containers.
+        - container_admission: "memory" starts a container only if its memory
+          limit fits into docker_memory_fraction of the Docker host's memory,
+          next to the limits of the running containers of all ensembles
+          (reserved with the container slots, see utils.SlotScheduler).
+          "fixed" (default) only uses max_containers.
+        - oom_retries: how often a container killed for running out of memory
+          is restarted (default 2).
+        - electrodes_per_container: how many electrodes one container
+          simulates one after another (default 1).
+
+    Parameters
+    ----------
+    config : configparser.ConfigParser
+        An instance with loaded config.ini data.
+    mesh_name : str
+        Name of the head mesh.
+    max_containers : int
+        Maximum number of Docker containers to run concurrently.
+    backend : str, optional
+        The simulation backend. Except for "docker" (default), the resources
+        of this host are used instead of those of the Docker host.
+
+    Returns
+    -------
+    dict
+        The keyword arguments memory_limit, memory_budget, cpus, oom_retries
+        and electrodes_per_container of run_simulations().
+    """
+    settings = config["Settings"]
+    admission = settings.get("container_admission", "default")
+    container_memory = settings.get("container_memory", "default")
+    container_cpus = settings.get("container_cpus", "default")
+    memory_fraction = settings.get("docker_memory_fraction", "default")
+    oom_retries = settings.get("oom_retries", "default")
+    electrodes_per_container = settings.get("electrodes_per_container", "default")
+
+    admission = "fixed" if admission == "default" else admission
+    memory_fraction = 0.9 if memory_fraction == "default" else float(memory_fraction)
+    oom_retries = 2 if oom_retries == "default" else int(oom_retries)
+    electrodes_per_container = 1 if electrodes_per_container == "default" else max(1, int(electrodes_per_container))
+
+    mem_total, ncpu = get_docker_host_resources() if backend == "docker" else get_local_host_resources()
+
+    if container_memory != "default":
+        memory_limit = int(float(container_memory) * 1024 ** 3)
+    elif admission != "memory":
+        # The estimate is only a heuristic; without memory-aware admission, Docker sets no limit
+        memory_limit = None
+    else:
+        mesh_path = find_head_mesh(mesh_name)
+        try:
+            memory_limit = estimate_container_memory(mesh_path) if mesh_path is not None else None
+        except (OSError, ValueError) as e:
+            print(f"Warning: Unable to read the header of {mesh_path}. {str(e)}")
+            memory_limit = None
+        if memory_limit is None:
+            print(f"Warning: Unable to estimate the memory of the containers from {mesh_name}.msh.")
+
+    if container_cpus != "default":
+        cpus = float(container_cpus)
+    else:
+        cpus = max(1.0, ncpu / max_containers) if ncpu is not None else None
+
+    memory_budget = None
+    if admission == "memory":
+        if memory_limit is None or mem_total is None:
+            print("Warning: Memory-aware admission is not possible, falling back to max_containers.")
+        else:
+            memory_budget = int(mem_total * memory_fraction)
+            if memory_limit > memory_budget:
+                # A single container may use everything Docker has
+                memory_limit = memory_budget
+            print(f"Memory-aware admission: {memory_budget / 1024 ** 3:.1f} GB for up to "
+                  f"{min(max_containers, memory_budget // memory_limit)} containers")
+
+    return {
+        "memory_limit": memory_limit,
+        "memory_budget": memory_budget,
+        "cpus": cpus,
+        "oom_retries": oom_retries,
+        "electrodes_per_container": electrodes_per_container,
+    }
 
 
 def validate_files(args):
@@ -246,31 +519,617 @@ def validate_args_vs_json(args, config_json_content, roi_json_content):
     return electrodes, config_id_json, patient_id_json, roi_id_json
 
 
-def run_simulations(electrodes, max_containers, image_name, mesh_name, code_path, config_id_json, patient_id_json):
+def get_electrode_batch(electrodes, batch):
+    """
+    Return the names and positions of a batch of electrodes, as expected by the containers.
+
+    Parameters
+    ----------
+    electrodes : dict
+        A dict of electrode data from the configuration JSON.
+    batch : tuple
+        The names of the electrodes.
+
+    Returns
+    -------
+    list
+        A dict with the keys name, X, Y and Z per electrode.
+    """
+    return [
+        {
+            "name": electrode,
+            "X": electrodes[electrode].get("X", 0),
+            "Y": electrodes[electrode].get("Y", 0),
+            "Z": electrodes[electrode].get("Z", 0),
+        }
+        for electrode in batch
+    ]
+
+
+def get_simulation_environment(electrodes, batch, config_id_json, mesh_name, volume_path):
+    """
+    Return the environment variables a simulation of a batch of electrodes expects.
+
+    This is the contract of Docker_Sim/sim_controller.py, the same for every
+    executor: ENSEMBLE_NAME, MESH_NAME and VOLUME_PATH, plus the electrode
+    as ELECTRODE_NAME and ELECTRODE_POSITION_X/Y/Z or, for several
+    electrodes, ELECTRODE_BATCH (a JSON list of {"name", "X", "Y", "Z"}).
+
+    Parameters
+    ----------
+    electrodes : dict
+        A dict of electrode data from the configuration JSON.
+    batch : tuple
+        The names of the electrodes to simulate.
+    config_id_json : str
+        A string ID for the current configuration (from JSON).
+    mesh_name : str
+        Name of the mesh used for the simulation (e.g., patient ID).
+    volume_path : str
+        The data directory as seen by the simulation.
+
+    Returns
+    -------
+    dict
+        The environment variables, by name.
+    """
+    environment = {"ENSEMBLE_NAME": config_id_json, "MESH_NAME": mesh_name, "VOLUME_PATH": volume_path}
+    electrode_batch = get_electrode_batch(electrodes, batch)
+    if len(electrode_batch) == 1:
+        electrode = electrode_batch[0]
+        environment.update({
+            "ELECTRODE_POSITION_X": str(electrode["X"]),
+            "ELECTRODE_POSITION_Y": str(electrode["Y"]),
+            "ELECTRODE_POSITION_Z": str(electrode["Z"]),
+            "ELECTRODE_NAME": electrode["name"],
+        })
+    else:
+        environment["ELECTRODE_BATCH"] = json.dumps(electrode_batch)
+    return environment
+
+
+def get_exit_code(returncode):
+    """Return the exit code of a local process like Docker does (128 + signal if it was killed)."""
+    return 128 - returncode if returncode < 0 else returncode
+
+
+class SimulationExecutor:
+    """
+    Interface of the executors starting the simulations of run_simulations().
+
+    Subclasses set `name` (the simulation_backend in config.ini) and
+    `volume_path` and implement fingerprint(), start() and wait(); they
+    override ran_out_of_memory() and close() if needed.
+    """
+    #: The simulation_backend in config.ini
+    name = None
+
+    #: The data directory as seen by the simulation
+    volume_path = None
+
+    def fingerprint(self):
+        """Return an identifier of the simulation software, part of the input hashes."""
+        raise NotImplementedError
+
+    def start(self, environment, memory=None):
+        """
+        Start a simulation.
+
+        Parameters
+        ----------
+        environment : dict
+            The environment variables of the simulation (see get_simulation_environment).
+        memory : int, optional
+            Memory limit in bytes, if the executor can enforce one.
+
+        Returns
+        -------
+        object
+            A handle of the simulation, passed to wait().
+
+        Raises
+        ------
+        OSError
+            If the simulation cannot be started.
+        """
+        raise NotImplementedError
+
+    def wait(self, handle):
+        """Wait until the simulation started by start() exits and return its exit code."""
+        raise NotImplementedError
+
+    def ran_out_of_memory(self, handle, exit_code):
+        """Return whether a finished simulation was killed, most likely by the OOM killer."""
+        return exit_code == OOM_EXIT_CODE
+
+    def close(self):
+        """Release the resources of the executor."""
+
+
+class DockerExecutor(SimulationExecutor):
+    """
+    Run each simulation in its own Docker container (`docker run`).
+
+    Parameters
+    ----------
+    image_name : str
+        Name (and tag) of the Docker image to run.
+    code_path : Path
+        Path to the local code directory (mounted into the container).
+    cpus : float, optional
+        CPU limit of each container (`docker run --cpus`).
+    """
+    name = "docker"
+
+    #: The data directory as seen by the simulation
+    volume_path = "/data"
+
+    def __init__(self, image_name, code_path, cpus=None):
+        self.image_name = image_name
+        self.code_path = code_path
+        self.cpus = cpus
+        # `docker run --cidfile` writes the ID of each container here, by process
+        self.cid_dir = Path(tempfile.mkdtemp(prefix="planningtool-cid-"))
+        self.cid_files = {}
+
+    def fingerprint(self):
+        """Return an identifier of the simulation software, the ID of the image."""
+        return get_image_id(self.image_name)
+
+    def start(self, environment, memory=None):
+        """
+        Start a simulation.
+
+        Parameters
+        ----------
+        environment : dict
+            The environment variables of the simulation (see get_simulation_environment).
+        memory : int, optional
+            Memory limit in bytes (`docker run --memory`).
+
+        Returns
+        -------
+        subprocess.Popen
+            The `docker run` process, passed to wait().
+
+        Raises
+        ------
+        OSError
+            If the simulation cannot be started.
+        """
+        limits = []
+        if memory is not None:
+            limits += ["--memory", str(memory)]
+        if self.cpus is not None:
+            limits += ["--cpus", f"{self.cpus:g}"]
+
+        variables = []
+        for name, value in environment.items():
+            variables += ["-e", f"{name}={value}"]
+
+        cid_file = self.cid_dir / f"{uuid.uuid4().hex}.cid"
+        process = subprocess.Popen([
+            "docker", "run",
+            "--cidfile", str(cid_file),
+            *limits,
+            "-v", f"{self.code_path.parent}:/app",
+            "-v", f"{DATA_PATH}:/data",
+            *variables,
+            self.image_name
+        ])
+        self.cid_files[process] = cid_file
+        return process
+
+    def wait(self, handle):
+        """Wait until the simulation started by start() exits and return its exit code."""
+        return handle.wait()
+
+    def ran_out_of_memory(self, handle, exit_code):
+        """
+        Return whether a finished simulation was killed for running out of memory.
+
+        A container exits with OOM_EXIT_CODE for every SIGKILL, e.g. also
+        after a `docker stop` timeout, so the OOMKilled state of the
+        container is checked as well.
+
+        Parameters
+        ----------
+        handle : subprocess.Popen
+            The handle returned by start().
+        exit_code : int
+            The exit code returned by wait().
+
+        Returns
+        -------
+        bool
+            True if Docker killed the container for exceeding its memory limit.
+        """
+        cid_file = self.cid_files.pop(handle, None)
+        if exit_code != OOM_EXIT_CODE or cid_file is None:
+            return False
+        try:
+            container_id = cid_file.read_text().strip()
+            result = subprocess.run(
+                ["docker", "inspect", "-f", "{{.State.OOMKilled}}", container_id],
+                capture_output=True, text=True, timeout=30, check=True
+            )
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"Warning: Unable to check whether the container ran out of memory. {str(e)}")
+            return False
+        return result.stdout.strip() == "true"
+
+    def close(self):
+        """Release the resources of the executor."""
+        shutil.rmtree(self.cid_dir, ignore_errors=True)
+
+
+class SubprocessExecutor(SimulationExecutor):
+    """
+    Run each simulation as a local Python process, without Docker.
+
+    The Python interpreter must have the simulation libraries (simnibs,
+    gmsh, meshlib, scipy) installed, e.g. on an HPC node. Memory and CPU
+    limits are not enforced.
+
+    Parameters
+    ----------
+    python : str
+        The Python interpreter running Docker_Sim/sim_controller.py.
+    """
+    name = "subprocess"
+
+    #: The data directory as seen by the simulation
+    volume_path = str(DATA_PATH)
+
+    def __init__(self, python):
+        self.python = python
+
+    def fingerprint(self):
+        """Return an identifier of the simulation software, the path of the interpreter."""
+        return f"{self.name}:{self.python}"
+
+    def start(self, environment, memory=None):
+        """Start a simulation, see SimulationExecutor.start(). `memory` is ignored."""
+        return subprocess.Popen(
+            [self.python, str(SIMULATION_BASE / "sim_controller.py")],
+            env={**os.environ, "PYTHONPATH": str(CODE_PATH), **environment},
+            cwd=CODE_PATH
+        )
+
+    def wait(self, handle):
+        """Wait until the simulation started by start() exits and return its exit code."""
+        return get_exit_code(handle.wait())
+
+
+def run_sim_controller(environment):
+    """
+    Run Docker_Sim/sim_controller.py in the current process with the given environment.
+
+    Used by ProcessPoolSimulationExecutor in its worker processes. The
+    simulation modules are imported once per worker process; param.py is
+    reloaded for every simulation to read the new environment.
+
+    Parameters
+    ----------
+    environment : dict
+        The environment variables of the simulation (see get_simulation_environment).
+
+    Returns
+    -------
+    int
+        The exit code of sim_controller.main().
+    """
+    os.environ.update({"PYTHONPATH": str(CODE_PATH), **environment})
+    if environment.get("ELECTRODE_BATCH") is None:
+        os.environ.pop("ELECTRODE_BATCH", None)
+    # sim_controller reads ./logging.conf
+    os.chdir(CODE_PATH)
+    if str(SIMULATION_BASE) not in sys.path:
+        sys.path.insert(0, str(SIMULATION_BASE))
+
+    try:
+        param = importlib.import_module("param")
+        importlib.reload(param)
+        importlib.import_module("sim_controller").main()
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else 1
+    except Exception:
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+class ProcessPoolSimulationExecutor(SimulationExecutor):
+    """
+    Run the simulations in a pool of local Python processes, without Docker.
+
+    Like SubprocessExecutor, but the worker processes are reused, so the
+    simulation libraries are imported only once per process. The current
+    Python interpreter must have the simulation libraries installed.
+
+    Every worker process has a pool of its own. A process killed (e.g. by the
+    OOM killer) therefore only fails its own simulation; with one shared
+    pool, all running simulations would fail with it.
+
+    Parameters
+    ----------
+    max_workers : int
+        Number of worker processes, i.e. of simulations running at the same time.
     """
-    Run Docker-based simulations for each electrode concurrently up to max_containers limit.
+    name = "process_pool"
+
+    #: The data directory as seen by the simulation
+    volume_path = str(DATA_PATH)
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        # Single-process pools without a running simulation, reused by the next one
+        self.idle_pools = []
+        self.lock = threading.Lock()
+
+    def fingerprint(self):
+        """Return an identifier of the simulation software, the path of the interpreter."""
+        return f"{self.name}:{sys.executable}"
+
+    def start(self, environment, memory=None):
+        """
+        Start a simulation, see SimulationExecutor.start(). `memory` is ignored.
+
+        Returns
+        -------
+        tuple
+            The pool running the simulation and the future of
+            run_sim_controller(), passed to wait().
+        """
+        with self.lock:
+            pool = self.idle_pools.pop() if self.idle_pools else None
+        if pool is None:
+            pool = concurrent.futures.ProcessPoolExecutor(max_workers=1)
+        return pool, pool.submit(run_sim_controller, environment)
+
+    def wait(self, handle):
+        """Wait until the simulation started by start() finishes and return its exit code."""
+        pool, future = handle
+        try:
+            exit_code = future.result()
+        except concurrent.futures.BrokenExecutor:
+            # The process of this simulation was killed, e.g. by the OOM killer
+            print("Error: A simulation process terminated abruptly.")
+            pool.shutdown(wait=False)
+            return OOM_EXIT_CODE
+        with self.lock:
+            self.idle_pools.append(pool)
+        return exit_code
+
+    def close(self):
+        """Shut the worker processes down."""
+        with self.lock:
+            pools, self.idle_pools = self.idle_pools, []
+        for pool in pools:
+            pool.shutdown()
+
+
+#: Executors by the name used in config.ini (simulation_backend)
+SIMULATION_EXECUTORS = {
+    executor.name: executor for executor in (DockerExecutor, SubprocessExecutor, ProcessPoolSimulationExecutor)
+}
+
+
+def get_simulation_backend(config):
+    """
+    Retrieve the backend running the simulations from config.ini.
+
+    Reads simulation_backend: "docker" (default) starts one container per
+    simulation, "subprocess" one local Python process and "process_pool"
+    uses a pool of max_containers local processes.
+
+    Parameters
+    ----------
+    config : configparser.ConfigParser
+        An instance with loaded config.ini data.
+
+    Returns
+    -------
+    str
+        A key of SIMULATION_EXECUTORS.
+
+    Raises
+    ------
+    SystemExit
+        Exits if the backend is unknown.
+    """
+    backend = config["Settings"].get("simulation_backend", "default")
+    backend = "docker" if backend == "default" else backend
+
+    if backend not in SIMULATION_EXECUTORS:
+        print(f"Error: Unknown simulation_backend '{backend}', expected one of {', '.join(SIMULATION_EXECUTORS)}.")
+        sys.exit(1)
+    return backend
+
+
+def get_simulation_executor(backend, config, image_name, code_path, max_containers, cpus=None):
+    """
+    Create the executor running the simulations.
+
+    Reads local_python from config.ini: the interpreter of the "subprocess"
+    backend, or "default" for the interpreter running this script.
 
-    For each electrode:
-    1. Await available container slots if max_containers is reached.
+    Parameters
+    ----------
+    backend : str
+        A key of SIMULATION_EXECUTORS (see get_simulation_backend).
+    config : configparser.ConfigParser
+        An instance with loaded config.ini data.
+    image_name : str
+        Name (and tag) of the Docker image to run.
+    code_path : Path
+        Path to the local code directory (mounted into the containers).
+    max_containers : int
+        Maximum number of simulations to run concurrently.
+    cpus : float, optional
+        CPU limit of each container.
+
+    Returns
+    -------
+    SimulationExecutor
+        The executor (DockerExecutor, SubprocessExecutor or ProcessPoolSimulationExecutor).
+    """
+    python = config["Settings"].get("local_python", "default")
+    python = sys.executable if python == "default" else python
+
+    if backend == "subprocess":
+        return SubprocessExecutor(python)
+    if backend == "process_pool":
+        return ProcessPoolSimulationExecutor(max_containers)
+    return DockerExecutor(image_name, code_path, cpus)
+
+
+def wait_for_container(executor, handle, batch, finished):
+    """
+    Block until a container exits and report it. Runs in its own thread.
+
+    Parameters
+    ----------
+    executor : SimulationExecutor
+        The executor that started the container.
+    handle : object
+        The handle returned by executor.start().
+    batch : tuple
+        The names of the electrodes simulated in the container.
+    finished : queue.Queue
+        The queue receiving (batch, exit code, whether it ran out of memory)
+        when the container exits.
+
+    Returns
+    -------
+    None
+    """
+    exit_code = executor.wait(handle)
+    finished.put((batch, exit_code, executor.ran_out_of_memory(handle, exit_code)))
+
+
+def is_electrode_finished(electrode, config_id_json, since):
+    """
+    Check whether an electrode was simulated successfully.
+
+    An electrode counts as finished if its sim_info file reports success and
+    was written after `since`, so results of earlier runs are not mistaken
+    for new ones.
+
+    Parameters
+    ----------
+    electrode : str
+        The name of the electrode.
+    config_id_json : str
+        A string ID for the current configuration (from JSON).
+    since : float
+        The time the simulation was started (time.time()).
+
+    Returns
+    -------
+    bool
+        True if the electrode was simulated successfully.
+    """
+    sim_info_file = get_sim_output_path(config_id_json) / f"sim_info_{electrode}.json"
+    try:
+        return sim_info_file.stat().st_mtime >= since and bool(json.loads(sim_info_file.read_text())["success"])
+    except (OSError, ValueError, KeyError):
+        return False
+
+
+def get_unfinished_electrodes(batch, config_id_json, since):
+    """
+    Return the electrodes of a batch that were not simulated successfully.
+
+    Parameters
+    ----------
+    batch : tuple
+        The names of the electrodes simulated in the container.
+    config_id_json : str
+        A string ID for the current configuration (from JSON).
+    since : float
+        The time the container was started (time.time()).
+
+    Returns
+    -------
+    tuple
+        The names of the unfinished electrodes, in the order of the batch.
+    """
+    return tuple(electrode for electrode in batch if not is_electrode_finished(electrode, config_id_json, since))
+
+
+def run_simulations(executor, electrodes, max_containers, mesh_name, config_id_json, patient_id_json,
+                    launch_interval=0.0, memory_limit=None, memory_budget=None, oom_retries=0,
+                    electrodes_per_container=1, scheduler=None, priority=0, fair_share=True):
+    """
+    Run simulations for each electrode concurrently up to max_containers limit.
+
+    For each electrode (or batch of electrodes):
+    1. Await available container slots if max_containers is reached (and,
+       with a memory budget, until the container's memory limit fits).
     2. Extract the electrode position (X, Y, Z).
-    3. Spin up a Docker container passing environment variables.
+    3. Spin up a Docker container (or, depending on the executor, a local
+       process) passing environment variables.
+
+    With `electrodes_per_container` > 1, the electrodes are split into
+    batches, which are passed to the container as JSON in ELECTRODE_BATCH.
+    The container simulates them one after another and reads and prepares
+    the head mesh only once.
+
+    Every container is awaited by its own thread, which puts the container
+    into a queue as soon as it exits. The next container is therefore started
+    the moment a slot becomes free, instead of after a fixed polling delay.
+
+    A container killed for running out of memory (see
+    SimulationExecutor.ran_out_of_memory()) is restarted up to `oom_retries`
+    times for the electrodes it did not finish, with a memory limit raised by
+    OOM_MEMORY_FACTOR, and from then on one container less runs at the same time.
+
+    With a `scheduler`, every container also needs one of max_containers
+    slots shared by all ensembles running on the host (see
+    utils.SlotScheduler), so concurrent ensembles take turns by priority and
+    fair share instead of the first one occupying the host until it is done.
+    The slots also reserve the memory limits of the containers, so the memory
+    budget is shared by all ensembles on the host. The time spent waiting for
+    slots is reported.
 
     Parameters
     ----------
+    executor : SimulationExecutor
+        The executor starting the simulations (see get_simulation_executor).
     electrodes : dict
         A dict of electrode data from the configuration JSON.
     max_containers : int
         Maximum number of Docker containers to run concurrently.
-    image_name : str
-        Name (and tag) of the Docker image to run.
     mesh_name : str
         Name of the mesh used for the simulation (e.g., patient ID).
-    code_path : Path
-        Path to the local code directory (mounted into the container).
     config_id_json : str
         A string ID for the current configuration (from JSON).
     patient_id_json : str
         A string ID for the current patient (from JSON).
+    launch_interval : float, optional
+        Minimum number of seconds between two container starts, e.g. to
+        stagger the memory peaks of loading the mesh (default 0, no limit).
+    memory_limit : int, optional
+        Memory limit of each container in bytes (`docker run --memory`).
+    memory_budget : int, optional
+        Total memory in bytes the limits of all running containers may add up
+        to, including those of other ensembles if there is a `scheduler`.
+        Without a budget, only max_containers limits the concurrency.
+    oom_retries : int, optional
+        How often a container that ran out of memory is restarted (default 0).
+    electrodes_per_container : int, optional
+        Number of electrodes simulated one after another in one container (default 1).
+    scheduler : utils.SlotScheduler, optional
+        The scheduler sharing the container slots with concurrent ensembles.
+        Without, the ensemble starts up to max_containers containers of its own.
+    priority : int, optional
+        The priority of the ensemble at the scheduler, one of the values of
+        utils.JOB_PRIORITIES (default 0, normal).
+    fair_share : bool, optional
+        Whether the max_containers slots of the `scheduler` are shared with
+        the other ensembles (default). Otherwise, only the memory budget is
+        shared and the ensemble starts up to max_containers containers of its own.
 
     Returns
     -------
@@ -281,56 +1140,718 @@ def run_simulations(electrodes, max_containers, image_name, mesh_name, code_path
     SystemExit
         Exits if a container fails to start.
     """
-    # Keep track of running processes
-    running_containers = []
-    for electrode, position in electrodes.items():
-        # Wait until the number of running containers is less than max_containers
-        while len(running_containers) >= max_containers:
-            # Check the status of running containers
-            for p in running_containers[:]:
-                if p.poll() is not None:  # Check if the process has finished
-                    running_containers.remove(p)
-            time.sleep(10)
-
-        # Extract XYZ coordinates for the current electrode
-        X = position.get("X", 0)
-        Y = position.get("Y", 0)
-        Z = position.get("Z", 0)
-
-        # Start a Docker container for the simulation
+    # Exit codes of the finished containers, in the order they exit
+    finished = queue.Queue()
+    names = list(electrodes)
+    pending = deque(
+        tuple(names[index:index + electrodes_per_container]) for index in range(0, len(names), electrodes_per_container)
+    )
+    memory_limits = {batch: memory_limit for batch in pending}
+    attempts = dict.fromkeys(pending, 0)
+    launched_at = {}
+    # Memory reserved by the running containers, by batch
+    running_containers = {}
+    concurrency = max_containers
+    last_launch = None
+    # Slots of the running containers at the scheduler, by batch
+    slots = {}
+    # Time since which the next container waits for a slot held by another ensemble
+    blocked_since = None
+    blocked_time = 0.0
+
+    try:
+        while pending or running_containers:
+            while pending and len(running_containers) < concurrency:
+                batch = pending[0]
+                memory = memory_limits[batch]
+                reserved = sum(running_containers.values())
+                # A container that does not fit next to the running ones waits; alone, it always starts
+                if scheduler is None and memory_budget is not None and running_containers \
+                        and reserved + memory > memory_budget:
+                    break
+
+                slot = None
+                if scheduler is not None:
+                    slot = scheduler.acquire(
+                        config_id_json, priority, max_containers, SLOT_TTL, memory or 0, memory_budget, fair_share
+                    )
+                    if slot is None:
+                        blocked_since = blocked_since if blocked_since is not None else time.monotonic()
+                        break
+                    if blocked_since is not None:
+                        waited = time.monotonic() - blocked_since
+                        blocked_time += waited
+                        blocked_since = None
+                        print(f"Got a container slot after waiting {waited:.1f} seconds")
+                pending.popleft()
+
+                if launch_interval > 0 and last_launch is not None:
+                    time.sleep(max(0.0, last_launch + launch_interval - time.monotonic()))
+
+                # Start a Docker container (or local process) for the simulation
+                environment = get_simulation_environment(
+                    electrodes, batch, config_id_json, mesh_name, executor.volume_path
+                )
+                try:
+                    handle = executor.start(environment, memory)
+                except (subprocess.CalledProcessError, OSError) as e:
+                    print(f"Error: Failed to start the simulation ({executor.name}). {str(e)}")
+                    if slot is not None:
+                        scheduler.release(slot)
+                    sys.exit(1)
+
+                last_launch = time.monotonic()
+                launched_at[batch] = time.time()
+                attempts[batch] += 1
+                running_containers[batch] = memory or 0
+                slots[batch] = slot
+                threading.Thread(
+                    target=wait_for_container, args=(executor, handle, batch, finished), daemon=True
+                ).start()
+
+            timeout = None
+            if scheduler is not None:
+                # Only ensembles that could start a container right now compete for slots
+                if blocked_since is None:
+                    scheduler.withdraw(config_id_json)
+                scheduler.renew(config_id_json, SLOT_TTL)
+                timeout = SLOT_POLL_INTERVAL if blocked_since is not None else SLOT_TTL / 3
+
+            # Wait until any container exits (with a scheduler, renewing the slots meanwhile)
+            try:
+                finished_batch, exit_code, out_of_memory = finished.get(timeout=timeout)
+            except queue.Empty:
+                continue
+            running_at_exit = len(running_containers)
+            del running_containers[finished_batch]
+            slot = slots.pop(finished_batch)
+            if slot is not None:
+                scheduler.release(slot)
+            print(f"Container of {', '.join(finished_batch)} exited with code {exit_code}")
+
+            if out_of_memory and attempts[finished_batch] <= oom_retries:
+                retry = get_unfinished_electrodes(finished_batch, config_id_json, launched_at[finished_batch])
+                if not retry:
+                    continue
+                concurrency = max(1, min(concurrency, running_at_exit) - 1)
+                memory = memory_limits[finished_batch]
+                if memory is not None:
+                    memory = int(memory * OOM_MEMORY_FACTOR)
+                    memory = min(memory, memory_budget) if memory_budget else memory
+                memory_limits[retry] = memory
+                attempts[retry] = attempts[finished_batch]
+                print(f"Container of {', '.join(retry)} ran out of memory, retrying with at most "
+                      f"{concurrency} containers at a time")
+                pending.appendleft(retry)
+    finally:
+        if scheduler is not None:
+            scheduler.withdraw(config_id_json)
+            for slot in slots.values():
+                if slot is not None:
+                    scheduler.release(slot)
+
+    if scheduler is not None:
+        print(f"Waited {blocked_time:.1f} seconds in total for container slots")
+
+
+def get_worker_pool_settings(config):
+    """
+    Retrieve the settings of the warm worker pool from config.ini.
+
+    Reads worker_pool, worker_idle_timeout, distributed and worker_timeout:
+        - worker_pool: number of warm worker containers, or "default" (0) to
+          start one container per electrode (or batch) instead.
+        - worker_idle_timeout: seconds without jobs after which a worker
+          exits, or "default" (1800).
+        - distributed: "true" to queue the electrodes for workers on any
+          node sharing the data directory, even without local workers.
+          "default" is "false".
+        - worker_timeout: seconds without a heartbeat after which a worker
+          counts as dead and its job is requeued, or "default" (120).
+
+    Parameters
+    ----------
+    config : configparser.ConfigParser
+        An instance with loaded config.ini data.
+
+    Returns
+    -------
+    tuple
+        A tuple (worker_count, idle_timeout, distributed, worker_timeout).
+    """
+    worker_count = config["Settings"].get("worker_pool", "default")
+    idle_timeout = config["Settings"].get("worker_idle_timeout", "default")
+    distributed = config["Settings"].get("distributed", "default")
+    worker_timeout = config["Settings"].get("worker_timeout", "default")
+
+    worker_count = 0 if worker_count == "default" else int(worker_count)
+    idle_timeout = 1800.0 if idle_timeout == "default" else float(idle_timeout)
+    distributed = distributed != "default" and distributed.lower() in ("true", "yes", "1")
+    worker_timeout = 120.0 if worker_timeout == "default" else float(worker_timeout)
+    return worker_count, idle_timeout, distributed, worker_timeout
+
+
+def get_scheduling_settings(config, args, electrode_count):
+    """
+    Retrieve the priority of the ensemble and whether containers are shared fairly.
+
+    Reads fair_share and preview_electrodes from config.ini:
+        - fair_share: "false" lets every ensemble start up to max_containers
+          containers of its own. "default" ("true") takes the containers from
+          max_containers slots shared by all ensembles (see utils.SlotScheduler).
+        - preview_electrodes: ensembles with at most this many electrodes to
+          simulate are run with the "preview" priority, so small interactive
+          runs overtake large batch studies. 0 disables it; "default" uses 4.
+    Otherwise the priority is taken from the command-line argument --Priority.
+
+    Parameters
+    ----------
+    config : configparser.ConfigParser
+        An instance with loaded config.ini data.
+    args : argparse.Namespace
+        An object containing command-line arguments.
+    electrode_count : int
+        The number of electrodes to simulate.
+
+    Returns
+    -------
+    tuple
+        A tuple (priority, fair_share), with priority one of the values of
+        utils.JOB_PRIORITIES.
+    """
+    fair_share = config["Settings"].get("fair_share", "default")
+    preview_electrodes = config["Settings"].get("preview_electrodes", "default")
+
+    fair_share = fair_share == "default" or fair_share.lower() in ("true", "yes", "1")
+    preview_electrodes = 4 if preview_electrodes == "default" else int(preview_electrodes)
+
+    priority = JOB_PRIORITIES[args.Priority]
+    if 0 < electrode_count <= preview_electrodes and priority < JOB_PRIORITIES["preview"]:
+        print(f"Running the {electrode_count} electrode(s) with preview priority")
+        priority = JOB_PRIORITIES["preview"]
+    return priority, fair_share
+
+
+def get_running_workers():
+    """
+    Return the names of the running warm worker containers.
+
+    Returns
+    -------
+    set or None
+        The container names, or None if Docker cannot be queried.
+    """
+    try:
+        output = subprocess.run(
+            ["docker", "ps", "--filter", f"name=^{WORKER_NAME_PREFIX}_", "--format", "{{.Names}}"],
+            capture_output=True, text=True, check=True, timeout=30
+        ).stdout
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError) as e:
+        print(f"Warning: Unable to list the worker containers. {str(e)}")
+        return None
+    return set(output.split())
+
+
+def start_worker_pool(worker_count, image_name, code_path, idle_timeout, memory_limit=None, cpus=None, oom_retries=0):
+    """
+    Start the warm worker containers that are not running yet.
+
+    Workers keep running after the simulations of this request, so the next
+    request finds them warm. They exit after `idle_timeout` seconds without
+    jobs. A worker killed for running out of memory is restarted by Docker
+    up to `oom_retries` times, and puts its unfinished job back into the queue.
+
+    Parameters
+    ----------
+    worker_count : int
+        Number of worker containers.
+    image_name : str
+        Name (and tag) of the Docker image to run.
+    code_path : Path
+        Path to the local code directory (mounted into the containers).
+    idle_timeout : float
+        Seconds without jobs after which a worker exits (0 for never).
+    memory_limit : int, optional
+        Memory limit of each worker in bytes (`docker run --memory`).
+    cpus : float, optional
+        CPU limit of each worker (`docker run --cpus`).
+    oom_retries : int, optional
+        How often Docker restarts a failed worker (default 0).
+
+    Returns
+    -------
+    None
+
+    Raises
+    ------
+    SystemExit
+        Exits if a worker container fails to start.
+    """
+    running = get_running_workers() or set()
+
+    limits = []
+    if memory_limit is not None:
+        limits += ["--memory", str(memory_limit)]
+    if cpus is not None:
+        limits += ["--cpus", f"{cpus:g}"]
+    restart = f"on-failure:{oom_retries}" if oom_retries > 0 else "no"
+
+    for index in range(worker_count):
+        name = f"{WORKER_NAME_PREFIX}_{index}"
+        if name in running:
+            continue
+
+        # Remove a stopped worker of an earlier request, so its name can be reused
+        subprocess.run(["docker", "rm", "-f", name], capture_output=True)
         try:
-            process = subprocess.Popen([
-                "docker", "run",
+            subprocess.run([
+                "docker", "run", "-d",
+                "--name", name,
+                "--restart", restart,
+                *limits,
                 "-v", f"{code_path.parent}:/app",
                 "-v", f"{DATA_PATH}:/data",
-                "-e", f"ELECTRODE_POSITION_X={X}",
-                "-e", f"ELECTRODE_POSITION_Y={Y}",
-                "-e", f"ELECTRODE_POSITION_Z={Z}",
-                "-e", f"ENSEMBLE_NAME={config_id_json}",
-                "-e", f"ELECTRODE_NAME={electrode}",
-                "-e", f"MESH_NAME={mesh_name}",
-                image_name
-            ])
-            running_containers.append(process)
-        except subprocess.CalledProcessError as e:
-            print(f"Error: Failed to start Docker container. {str(e)}")
+                "-e", f"WORKER_NAME={name}",
+                "-e", f"WORKER_IDLE_TIMEOUT={idle_timeout:g}",
+                image_name,
+                *WORKER_COMMAND
+            ], capture_output=True, check=True)
+        except (subprocess.CalledProcessError, OSError) as e:
+            print(f"Error: Failed to start worker container {name}. {str(e)}")
             sys.exit(1)
+        print(f"Started worker container {name}")
+
+
+def run_on_worker_pool(electrodes, mesh_name, config_id_json, electrodes_per_job=1, worker_timeout=120.0,
+                       local_workers=True, priority=0):
+    """
+    Simulate the electrodes on the warm worker pool and wait for the results.
+
+    The electrodes are submitted to the queue of the workers in jobs of
+    `electrodes_per_job` electrodes (see utils.worker_pool). The workers serve
+    the jobs of concurrent ensembles by priority and fair share, and the time
+    every job waited in the queue is reported. While waiting,
+    every WORKER_CHECK_INTERVAL seconds:
+        - Jobs whose worker sent no heartbeat for `worker_timeout` seconds
+          are put back into the queue for the other workers.
+        - With `local_workers`, if neither a local worker container is
+          running nor any worker sends heartbeats, the jobs no worker has
+          taken are cancelled. Without, the coordinator waits for workers on
+          other nodes to join.
+
+    Parameters
+    ----------
+    electrodes : dict
+        A dict of electrode data from the configuration JSON.
+    mesh_name : str
+        Name of the mesh used for the simulation (e.g., patient ID).
+    config_id_json : str
+        A string ID for the current configuration (from JSON).
+    electrodes_per_job : int, optional
+        Number of electrodes per job (default 1).
+    worker_timeout : float, optional
+        Seconds without a heartbeat after which a worker counts as dead (default 120).
+    local_workers : bool, optional
+        Whether warm worker containers were started on this host (default True).
+    priority : int, optional
+        The priority of the jobs, one of the values of utils.JOB_PRIORITIES (default 0, normal).
+
+    Returns
+    -------
+    None
+
+    Raises
+    ------
+    SystemExit
+        Exits if no local worker is running while jobs are left.
+    """
+    names = list(electrodes)
+    waiting = set()
+    for index in range(0, len(names), electrodes_per_job):
+        batch = names[index:index + electrodes_per_job]
+        waiting.add(submit_worker_job(mesh_name, config_id_json, get_electrode_batch(electrodes, batch), priority))
+    print(f"Submitted {len(waiting)} job(s) to the worker pool, {count_pending_worker_jobs()} pending in total")
+
+    # Seconds every finished job waited in the queue
+    waits = []
+    last_check = time.monotonic()
+    while waiting:
+        for job_id, result in collect_worker_results(waiting).items():
+            waiting.discard(job_id)
+            waited = result.get("waited")
+            if waited is not None:
+                waits.append(waited)
+            waited = f" after {waited:.1f} seconds in the queue" if waited is not None else ""
+            if result.get("success"):
+                print(f"Job {job_id} finished on {result.get('worker')}{waited}")
+            else:
+                failed = ", ".join(result.get("failed") or []) or result.get("error")
+                print(f"Job {job_id} failed on {result.get('worker')}{waited}: {failed}")
+        if not waiting:
+            break
+
+        if time.monotonic() - last_check >= WORKER_CHECK_INTERVAL:
+            last_check = time.monotonic()
+            for job_id in requeue_stale_worker_jobs(worker_timeout):
+                print(f"Job {job_id} lost its worker, requeued")
+
+            live_workers = get_live_workers(worker_timeout)
+            if local_workers and not live_workers and get_running_workers() == set():
+                cancelled = cancel_worker_jobs(waiting)
+                print(f"Error: No worker container is running, cancelled {len(cancelled)} pending job(s).")
+                sys.exit(1)
+            if not live_workers:
+                print("Waiting for workers, none sent a heartbeat recently...")
+            else:
+                hosts = sorted({str(status.get("host")) for status in live_workers.values()})
+                print(f"{len(waiting)} job(s) left, {len(live_workers)} worker(s) alive on {', '.join(hosts)}")
+        time.sleep(WORKER_RESULT_INTERVAL)
+
+    if waits:
+        print(f"Jobs waited {sum(waits) / len(waits):.1f} seconds on average in the queue, at most {max(waits):.1f}")
+
+
+def get_incremental_runs(config, args):
+    """
+    Check whether electrodes with unchanged inputs are skipped.
+
+    Reads incremental_runs from config.ini ("default" is "true"). The
+    command-line argument --Force simulates all electrodes regardless.
+
+    Parameters
+    ----------
+    config : configparser.ConfigParser
+        An instance with loaded config.ini data.
+    args : argparse.Namespace
+        An object containing command-line arguments.
+
+    Returns
+    -------
+    bool
+        True if unchanged electrodes are skipped.
+    """
+    incremental_runs = config["Settings"].get("incremental_runs", "default")
+    incremental_runs = incremental_runs == "default" or incremental_runs.lower() in ("true", "yes", "1")
+    return incremental_runs and not args.Force
+
+
+def get_image_id(image_name):
+    """
+    Return the ID of a Docker image, which changes whenever the image is rebuilt.
+
+    Parameters
+    ----------
+    image_name : str
+        Name (and tag) of the Docker image.
+
+    Returns
+    -------
+    str
+        The image ID, or the image name if Docker cannot be queried.
+    """
+    try:
+        return subprocess.run(
+            ["docker", "image", "inspect", "--format", "{{.Id}}", image_name],
+            capture_output=True, text=True, check=True, timeout=30
+        ).stdout.strip() or image_name
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError) as e:
+        print(f"Warning: Unable to inspect the image {image_name}. {str(e)}")
+        return image_name
+
+
+def get_input_hashes(electrodes, mesh_name, executor):
+    """
+    Hash the inputs of each electrode's simulation (see utils.simulation_inputs).
+
+    Parameters
+    ----------
+    electrodes : dict
+        A dict of electrode data from the configuration JSON.
+    mesh_name : str
+        Name of the mesh used for the simulation (e.g., patient ID).
+    executor : SimulationExecutor
+        The executor running the simulations, which identifies the simulation software.
+
+    Returns
+    -------
+    dict
+        The input hash of each electrode, by electrode name.
+    """
+    mesh_fingerprint = fingerprint_mesh(find_head_mesh(mesh_name))
+    param_fingerprint = fingerprint_file(PARAM_FILE_PATH)
+    image_id = executor.fingerprint()
+    return {
+        entry["name"]: hash_simulation_inputs(entry, mesh_fingerprint, param_fingerprint, image_id)
+        for entry in get_electrode_batch(electrodes, tuple(electrodes))
+    }
+
+
+def get_unchanged_electrodes(electrodes, config_id_json, input_hashes):
+    """
+    Return the electrodes whose last successful simulation had the same inputs.
+
+    An electrode is unchanged if its recorded input hash matches, its
+    sim_info file reports success and its result mesh still exists.
+
+    Parameters
+    ----------
+    electrodes : dict
+        A dict of electrode data from the configuration JSON.
+    config_id_json : str
+        A string ID for the current configuration (from JSON).
+    input_hashes : dict
+        The current input hash of each electrode, by electrode name.
+
+    Returns
+    -------
+    list
+        The names of the unchanged electrodes.
+    """
+    recorded = load_simulation_inputs(config_id_json)
+    indices = get_electrode_indices(electrodes)
+    unchanged = []
+    for electrode in electrodes:
+        if electrode not in indices or recorded.get(electrode) != input_hashes[electrode]:
+            continue
+        if is_electrode_finished(electrode, config_id_json, 0) and \
+                get_sim_mesh_path(config_id_json, str(indices[electrode])).exists():
+            unchanged.append(electrode)
+    return unchanged
+
+
+def get_previous_statistics(unchanged, config_id_json, patient_id_json):
+    """
+    Return the statistics of the unchanged electrodes from the previous post-processing.
+
+    Only electrodes whose converted data is still in the current version of
+    the per-electrode files ('<config>_electrodes/') are returned, since the
+    merge takes their data from there; the others are converted again.
+
+    Parameters
+    ----------
+    unchanged : list
+        The names of the unchanged electrodes.
+    config_id_json : str
+        A string ID for the current configuration (from JSON).
+    patient_id_json : str
+        A string ID for the current patient (from JSON).
 
-        time.sleep(5)
+    Returns
+    -------
+    dict
+        Median, mean, and 95th percentile of the combined magnitudes, by electrode index.
+    """
+    save_path = DATABASE_PATHS["process"] / patient_id_json / config_id_json
+    validation_file = save_path / f"{config_id_json}_validation_results.json"
+    if not unchanged or not validation_file.exists():
+        return {}
+    try:
+        validation_results = load_json(validation_file)
+    except (OSError, ValueError):
+        return {}
 
-    # Wait for all remaining containers to finish
-    for process in running_containers:
-        process.wait()
+    electrode_dir = save_path / f"{config_id_json}_electrodes"
+    try:
+        electrode_index = load_json(electrode_dir / "index.json")
+    except (OSError, ValueError):
+        return {}
+    version_dir = electrode_dir / electrode_index.get("version", "")
+
+    statistics = {}
+    for electrode, index in get_electrode_indices(unchanged).items():
+        entry = validation_results.get(electrode)
+        if not isinstance(entry, dict) or entry.get("success") != "true" or \
+                electrode not in electrode_index.get("electrodes", []) or not (version_dir / electrode).is_dir():
+            continue
+        try:
+            statistics[index] = (entry["median_magnitude"], entry["mean_magnitude"], entry["percentile_95"])
+        except KeyError:
+            continue
+    return statistics
 
 
-def post_processing(config_id_json, patient_id_json, roi_id_json):
+def record_input_hashes(electrodes, config_id_json, input_hashes, since):
+    """
+    Record the input hashes of the electrodes simulated successfully since `since`.
+
+    The hashes of failed electrodes and of electrodes no longer in the
+    configuration are removed, so they are simulated again next time.
+
+    Parameters
+    ----------
+    electrodes : dict
+        The electrodes simulated in this run.
+    config_id_json : str
+        A string ID for the current configuration (from JSON).
+    input_hashes : dict
+        The input hash of each electrode of the configuration, by electrode name.
+    since : float
+        The time the simulations were started (time.time()).
+
+    Returns
+    -------
+    None
+    """
+    recorded = {
+        electrode: value for electrode, value in load_simulation_inputs(config_id_json).items()
+        if electrode in input_hashes
+    }
+    for electrode in electrodes:
+        if is_electrode_finished(electrode, config_id_json, since):
+            recorded[electrode] = input_hashes[electrode]
+        else:
+            recorded.pop(electrode, None)
+    save_simulation_inputs(config_id_json, recorded)
+
+
+def get_post_processing_workers(config):
+    """
+    Retrieve the number of processes post-processing electrodes while the simulations run.
+
+    Reads post_processing_workers from config.ini; "default" uses 1, and 0
+    waits for all simulations before post-processing any electrode.
+
+    Parameters
+    ----------
+    config : configparser.ConfigParser
+        An instance with loaded config.ini data.
+
+    Returns
+    -------
+    int
+        The number of post-processing processes.
+    """
+    workers = config["Settings"].get("post_processing_workers", "default")
+    return 1 if workers == "default" else max(0, int(workers))
+
+
+def get_electrode_indices(electrodes):
+    """
+    Return the indices of the electrodes named like the post-processing expects (Electrode_<index>).
+
+    Parameters
+    ----------
+    electrodes : dict
+        A dict of electrode data from the configuration JSON.
+
+    Returns
+    -------
+    dict
+        The index of each electrode, by electrode name.
+    """
+    indices = {}
+    for electrode in electrodes:
+        match = ELECTRODE_NAME_PATTERN.fullmatch(electrode)
+        if match is not None:
+            indices[electrode] = int(match.group(1))
+    return indices
+
+
+def watch_finished_electrodes(electrodes, config_id_json, patient_id_json, since, executor, futures, stop):
+    """
+    Submit the post-processing of every electrode as soon as its simulation succeeded.
+
+    Runs in its own thread while the simulations run. The sim_info files of
+    the electrodes are checked every PIPELINE_POLL_INTERVAL seconds; when
+    `stop` is set, they are checked a last time and the thread returns.
+    The 3D data is created together with the first electrode; the final
+    post-processing recreates it if that electrode is not the first
+    successful one of the configuration.
+
+    Parameters
+    ----------
+    electrodes : dict
+        A dict of electrode data from the configuration JSON.
+    config_id_json : str
+        A string ID for the current configuration (from JSON).
+    patient_id_json : str
+        A string ID for the current patient (from JSON).
+    since : float
+        The time the simulations were started (time.time()).
+    executor : concurrent.futures.Executor
+        The executor running process_electrode_output().
+    futures : dict
+        Receives the future of each submitted electrode, by electrode index.
+    stop : threading.Event
+        Set when all simulations have finished.
+
+    Returns
+    -------
+    None
+    """
+    remaining = get_electrode_indices(electrodes)
+    first_index = min(remaining.values(), default=None)
+
+    while True:
+        stopping = stop.is_set()
+        for electrode, index in list(remaining.items()):
+            if is_electrode_finished(electrode, config_id_json, since):
+                print(f"Post-processing {electrode} while the simulations continue")
+                futures[index] = executor.submit(
+                    process_electrode_output, config_id_json, patient_id_json, index, index == first_index
+                )
+                del remaining[electrode]
+        if stopping or not remaining:
+            return
+        stop.wait(PIPELINE_POLL_INTERVAL)
+
+
+def collect_processed_electrodes(futures):
+    """
+    Wait for the post-processing of the submitted electrodes and return the results.
+
+    Electrodes whose post-processing failed are left out, so the final
+    post-processing converts them again.
+
+    Parameters
+    ----------
+    futures : dict
+        The future of each submitted electrode, by electrode index.
+
+    Returns
+    -------
+    dict
+        Median, mean, and 95th percentile of the combined magnitudes, by electrode index.
+    """
+    processed = {}
+    for index, future in futures.items():
+        try:
+            processed[index] = future.result()
+        except Exception as e:
+            print(f"Warning: Post-processing of Electrode_{index} failed, it is repeated at the end. {str(e)}")
+    return processed
+
+
+def report_stage(job_id, stage):
+    """
+    Record the current post-processing step in the server's job queue.
+
+    Parameters
+    ----------
+    job_id : int or None
+        The job ID, or None if the script was not started by the job queue.
+    stage : str
+        The name of the step.
+
+    Returns
+    -------
+    None
+    """
+    print(f"Post-processing: {stage}...")
+    if job_id is not None:
+        JobQueue().set_stage(job_id, stage)
+
+
+def post_processing(config_id_json, patient_id_json, roi_id_json, job_id=None, processed=None):
     """
     Perform post-processing tasks once all simulations are complete.
 
     These tasks include:
-    - Aggregating simulation outputs (process_simulation_output).
+    - Aggregating simulation outputs (process_simulation_output), skipping the
+      electrodes already converted while the simulations were running.
     - Mapping results to the ROI (map_simulation_to_roi).
-    - Converting final data to 3D (convert_to_3d).
+    - Converting final data to 3D (convert_to_3d), unless the 3D data was
+      already created from the first successful electrode.
     - Collecting validation results for this ROI and in general.
 
     Parameters
@@ -341,14 +1862,23 @@ def post_processing(config_id_json, patient_id_json, roi_id_json):
         The patient ID from JSON metadata.
     roi_id_json : str
         The ROI ID from JSON metadata.
+    job_id : int, optional
+        The ID of the job in the server's job queue, which is updated with
+        the current step.
+    processed : dict, optional
+        Median, mean, and 95th percentile of the already converted electrodes, by index.
 
     Returns
     -------
     None
     """
-    process_simulation_output(config_id_json, patient_id_json)
+    report_stage(job_id, "process_simulation_output")
+    process_simulation_output(config_id_json, patient_id_json, processed)
+    report_stage(job_id, "map_simulation_to_roi")
     map_simulation_to_roi(config_id_json, patient_id_json, roi_id_json)
+    report_stage(job_id, "convert_to_3d")
     convert_to_3d(config_id_json, patient_id_json)
+    report_stage(job_id, "collect_validation_results")
     collect_validation_results_for_roi(config_id_json, patient_id_json, roi_id_json)
     collect_validation_results(config_id_json, patient_id_json)
 
@@ -362,8 +1892,19 @@ def main():
     2. Load config.ini for container/image settings.
     3. Validate existence of required files (electrode config, ROI data).
     4. Compare CLI args with JSON metadata, warn if mismatched.
-    5. Launch Docker containers for each electrode, respecting max concurrency.
-    6. Run post-processing tasks (mapping to ROI, creating 3D data, validation).
+       Electrodes whose inputs (mesh, position, param.py, image) did not change
+       since their last successful simulation are skipped, unless --Force is passed.
+    5. Launch Docker containers (or, with the subprocess and process_pool
+       backends, local processes) for each electrode, respecting max concurrency
+       and, in memory-aware admission mode, the memory of the Docker host.
+       Containers are shared with concurrent ensembles by priority (--Priority,
+       or "preview" for small ensembles) and fair share.
+       With a warm worker pool or in distributed mode, the electrodes are
+       queued for the workers instead, which may run on several nodes.
+       Meanwhile, every electrode is converted as soon as its simulation succeeded.
+    6. Run the remaining post-processing tasks (merging the electrodes, mapping
+       to ROI, creating 3D data, validation), after reporting the stage to the
+       job queue if a JobID was passed.
 
     Returns
     -------
@@ -377,13 +1918,76 @@ def main():
     args = parse_arguments()
     config = load_config()
 
-    max_containers, image_name, mesh_name = get_settings(config, args)
+    max_containers, image_name, mesh_name, launch_interval = get_settings(config, args)
     config_file_path, roi_file_path, code_path = validate_files(args)
     config_json_content, roi_json_content = load_json_content(config_file_path, roi_file_path)
     electrodes, config_id_json, patient_id_json, roi_id_json = validate_args_vs_json(args, config_json_content, roi_json_content)
-
-    run_simulations(electrodes, max_containers, image_name, mesh_name, code_path, config_id_json, patient_id_json)
-    post_processing(config_id_json, patient_id_json, roi_id_json)
+    backend = get_simulation_backend(config)
+    resources = get_container_resources(config, mesh_name, max_containers, backend)
+    cpus = resources.pop("cpus")
+    simulation_executor = get_simulation_executor(backend, config, image_name, code_path, max_containers, cpus)
+    worker_count, idle_timeout, distributed, worker_timeout = get_worker_pool_settings(config)
+    post_processing_workers = get_post_processing_workers(config)
+    if worker_count > 0 and backend != "docker":
+        print(f"Warning: The warm worker pool needs the docker backend, running the simulations with {backend}.")
+        worker_count = 0
+
+    # Skip the electrodes whose inputs did not change since their last successful simulation
+    input_hashes = get_input_hashes(electrodes, mesh_name, simulation_executor)
+    unchanged = get_unchanged_electrodes(electrodes, config_id_json, input_hashes) \
+        if get_incremental_runs(config, args) else []
+    previous_statistics = get_previous_statistics(unchanged, config_id_json, patient_id_json)
+    if unchanged:
+        print(f"Skipping {len(unchanged)} of {len(electrodes)} electrode(s) with unchanged inputs")
+        electrodes = {electrode: value for electrode, value in electrodes.items() if electrode not in unchanged}
+    priority, fair_share = get_scheduling_settings(config, args, len(electrodes))
+
+    # Convert the electrodes while the others are still being simulated
+    since = time.time()
+    futures = {}
+    stop = threading.Event()
+    post_processing_pool = None
+    watcher = None
+    if post_processing_workers > 0:
+        post_processing_pool = concurrent.futures.ProcessPoolExecutor(max_workers=post_processing_workers)
+        watcher = threading.Thread(
+            target=watch_finished_electrodes,
+            args=(electrodes, config_id_json, patient_id_json, since, post_processing_pool, futures, stop),
+            daemon=True
+        )
+        watcher.start()
+
+    if electrodes and (worker_count > 0 or distributed):
+        if worker_count > 0:
+            start_worker_pool(
+                worker_count, image_name, code_path, idle_timeout,
+                resources["memory_limit"], cpus, resources["oom_retries"]
+            )
+        run_on_worker_pool(
+            electrodes, mesh_name, config_id_json, resources["electrodes_per_container"], worker_timeout,
+            local_workers=worker_count > 0, priority=priority
+        )
+    elif electrodes:
+        run_simulations(
+            simulation_executor, electrodes, max_containers, mesh_name, config_id_json, patient_id_json,
+            launch_interval, **resources, priority=priority, fair_share=fair_share,
+            # The slots also share the memory budget with the other ensembles on the host
+            scheduler=SlotScheduler() if fair_share or resources["memory_budget"] is not None else None
+        )
+    simulation_executor.close()
+
+    record_input_hashes(electrodes, config_id_json, input_hashes, since)
+
+    processed = dict(previous_statistics)
+    if post_processing_pool is not None:
+        stop.set()
+        watcher.join()
+        processed.update(collect_processed_electrodes(futures))
+        post_processing_pool.shutdown()
+
+    if args.JobID is not None:
+        JobQueue().set_state(args.JobID, JOB_POST_PROCESSING)
+    post_processing(config_id_json, patient_id_json, roi_id_json, args.JobID, processed)
 
 
 if __name__ == "__main__":
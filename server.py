@@ -18,48 +18,879 @@ Routes Provided:
     - /data/elect_pos/<_patient_id>/<_config_id> (POST/GET): Manages electrode positions
     - /data/validation/<_patient_id>/<_config_id> (GET): Retrieves validation results
     - /data/roi/<_patient_id>/<_roi_id> (POST): Receives ROI data
+    - /data/batch/<_patient_id> (POST/GET): Manages the electrode positions and ROIs of many configurations at once
     - /3d/configuration/skin/<_patient_id> (GET): Retrieves skin mesh data
     - /3d/simulated/<_patient_id>/<_config_id> (GET): Retrieves simulated 3D mesh data
+    - /3d/simulated/<_patient_id>/<_config_id>/vertices (GET): Retrieves the vertices of the simulated 3D mesh
+    - /3d/simulated/<_patient_id>/<_config_id>/tags (GET): Retrieves the tag index or, with ?ids=, the 3D data of selected tags
     - /data/simulated/<_patient_id>/<_config_id>/<_roi_id> (GET): Retrieves simulated data for a specified ROI
+    - /data/simulated/<_patient_id>/<_config_id>[/<_roi_id>]/electrodes (GET): Retrieves the index of the electrodes
+    - /data/simulated/<_patient_id>/<_config_id>[/<_roi_id>]/electrodes/<_electrode_id> (GET): Retrieves the data of one electrode (optionally ?tag=)
     - /data/interpolated/<_patient_id>/<_config_id>/<_roi_id>/<_interpolation_id> (POST): Receives interpolated data
     - /reached (GET): Returns a simple status response
-    - /run_simulations/<_patient_id>/<_config_id>/<_roi_id> (POST): Starts the simulations
+    - /run_simulations/<_patient_id>/<_config_id>/<_roi_id> (POST): Queues the simulations as a job
+    - /jobs (GET): Lists the simulation jobs (optionally ?patient= and ?state=)
+    - /jobs/<_job_id> (GET): Retrieves the state of a simulation job
+    - /jobs/<_job_id>/log (GET): Retrieves the log file of a simulation job
+    - /jobs/<_job_id>/events (GET): Streams the progress of a simulation job as server-sent events
+    - /cache/stats (GET): Returns hit/miss/eviction counts of the artifact cache
+    - /metrics (GET): Returns request, cache and job metrics in the Prometheus text format
+
+The POST routes stream their JSON bodies to disk while validating them, and
+accept bodies compressed with Content-Encoding gzip or deflate.
+
+The .zlib download routes support conditional requests (ETag / Last-Modified),
+single byte ranges (206 Partial Content), a chunked streaming mode (?stream=true)
+and HTTP Content-Encoding negotiated from Accept-Encoding (?native_encoding=true).
 """
 
 #!/usr/bin/env python
 # encoding: utf-8
+import hashlib
+import io
 import json
 import os
 import subprocess
+import tempfile
+import threading
 import time
+import uuid
+import zlib
+from pathlib import Path
+from typing import Iterator, Optional
 
-from flask import Flask, Response, jsonify, request, send_file
+from flask import Flask, Response, g, jsonify, request, send_file
 
 import utils
+from process_simulations.process_helper_functions import create_skin_artifact
 
 app = Flask(__name__)
 
-# File containing the patient IDs and times they were last called
-LOCK_FILE = "./logs/simulation_locks.json"
-
-# Minimum interval between simulations in seconds
+# Seconds a patient lease lasts unless it is renewed. Jobs renew the lease of
+# their patient while they are queued or running and release it when they end
 SIMULATION_LOCK_TIME = 300
 
+# Seconds between two renewals of the patient leases
+LEASE_RENEW_INTERVAL = SIMULATION_LOCK_TIME / 3
+
+# Size of the chunks (in bytes) sent when an artifact is requested with ?stream=true
+ARTIFACT_CHUNK_SIZE = 1024 * 1024
+
+# Media type of the binary (typed-array) variant of the mesh and field data
+BINARY_MIMETYPE = "application/vnd.planningtool.arrays"
+
+# Maximum amount of memory (in MB) used to keep compressed artifacts in memory
+ARTIFACT_CACHE_SIZE = int(utils.get_setting("artifact_cache_size", "1024"))
+
+#: In-memory LRU cache for the .zlib files served by the download routes
+ARTIFACT_CACHE = utils.ArtifactCache(ARTIFACT_CACHE_SIZE * 1024 * 1024)
+
+# Directory for the log files of the simulation jobs
+JOB_LOG_DIR = Path("./logs/jobs")
+
+# Number of ensembles that are simulated at the same time
+SIMULATION_WORKERS = int(utils.get_setting("simulation_workers", "1"))
+
+# Seconds an idle worker waits before it checks the job queue again
+JOB_POLL_INTERVAL = 5
+
+#: Persistent queue of the simulation jobs
+JOB_QUEUE = utils.JobQueue()
+
+#: Leases ensuring that only one ensemble per patient is queued or running
+PATIENT_LEASES = utils.LeaseStore()
+
+# Seconds between two checks for new progress events of a job
+EVENT_POLL_INTERVAL = 1
+
+# Seconds after which an event stream without events sends a keep-alive comment
+EVENT_KEEPALIVE_INTERVAL = 15
+
+# Maximum number of open event streams; each one occupies a server thread for the whole job
+MAX_EVENT_STREAMS = int(utils.get_setting("max_event_streams", "2"))
+
+#: Slots of the open event streams, so they cannot occupy all server threads
+event_streams = threading.BoundedSemaphore(MAX_EVENT_STREAMS)
+
+# Keys of a batch upload and the file names their entries are stored under
+BATCH_FILES = {
+    "electrode_positions": ("electrode", "electrode_positions_{}.json"),
+    "rois": ("roi", "{}_roi_bounds.json"),
+}
+
+# Seconds the metrics endpoint waits for `docker ps` when counting the running containers
+DOCKER_PS_TIMEOUT = 5
+
+#: Metrics served at /metrics
+METRICS = utils.MetricsRegistry()
+
+REQUEST_LATENCY = METRICS.histogram(
+    "planningtool_http_request_duration_seconds",
+    "Time until the response of a request is ready, by route and method.",
+    ("route", "method"), utils.LATENCY_BUCKETS
+)
+REQUEST_COUNT = METRICS.counter(
+    "planningtool_http_requests_total", "Handled requests, by route, method and status code.",
+    ("route", "method", "status")
+)
+RESPONSE_SIZE = METRICS.histogram(
+    "planningtool_http_response_size_bytes",
+    "Size of the response bodies with a known length, by route.",
+    ("route",), utils.SIZE_BUCKETS
+)
+REQUESTS_IN_FLIGHT = METRICS.gauge("planningtool_http_requests_in_flight", "Requests being handled right now.")
+
+# Worker threads running the simulation jobs, started by start_job_workers()
+job_workers = []
+job_workers_lock = threading.Lock()
+job_submitted = threading.Event()
+
+
+def get_job_lease_holder(job_id: int) -> str:
+    """
+    Return the holder name under which a job leases its patient.
+
+    Parameters
+    ----------
+    job_id : int
+        The job ID.
+
+    Returns
+    -------
+    str
+        The holder name, e.g. 'job-12'.
+    """
+    return f"job-{job_id}"
+
+
+def renew_job_leases() -> None:
+    """
+    Renew the patient leases of all queued and active jobs. Runs in its own thread.
+
+    Returns
+    -------
+    None
+    """
+    while True:
+        time.sleep(LEASE_RENEW_INTERVAL)
+        try:
+            for state in (utils.JOB_QUEUED, utils.JOB_RUNNING, utils.JOB_POST_PROCESSING):
+                for job in JOB_QUEUE.list(state=state):
+                    PATIENT_LEASES.renew(job["patient_id"], get_job_lease_holder(job["id"]), SIMULATION_LOCK_TIME)
+        except Exception as e:
+            print(f"Unable to renew the patient leases. {str(e)}")
+
+
+def get_priority_name(priority: int) -> str:
+    """
+    Return the name of a job priority.
+
+    Parameters
+    ----------
+    priority : int
+        The priority, one of the values of utils.JOB_PRIORITIES.
+
+    Returns
+    -------
+    str
+        The name of the priority, e.g. 'preview', or 'normal' for unknown values.
+    """
+    for name, value in utils.JOB_PRIORITIES.items():
+        if value == priority:
+            return name
+    return "normal"
+
+
+def get_job_log_path(job_id: int) -> Path:
+    """
+    Return the path of the log file of a simulation job.
+
+    Parameters
+    ----------
+    job_id : int
+        The job ID.
+
+    Returns
+    -------
+    Path
+        A Path object pointing to the log file.
+    """
+    return JOB_LOG_DIR / f"{job_id}.log"
+
+
+def run_job(job: dict) -> None:
+    """
+    Run the simulations of a job and record the outcome in the job queue.
+
+    The output of run_docker_simulations.py is written to the log file of the
+    job. The script reports the post-processing stage itself.
+
+    Parameters
+    ----------
+    job : dict
+        The job, as returned by JobQueue.claim_next().
+
+    Returns
+    -------
+    None
+    """
+    command = [
+        "python", "run_docker_simulations.py",
+        "--PatientID", job["patient_id"],
+        "--ConfigID", job["config_id"],
+        "--ROIID", job["roi_id"],
+        "--JobID", str(job["id"]),
+        "--Priority", get_priority_name(job["priority"])
+    ]
+    # Do not open a console window on Windows
+    creation_flags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+
+    print(f"Starting job {job['id']}: patient {job['patient_id']}, config {job['config_id']}, ROI {job['roi_id']} "
+          f"after {utils.format_time(job['queue_wait'])} in the queue")
+    try:
+        JOB_LOG_DIR.mkdir(parents=True, exist_ok=True)
+        with get_job_log_path(job["id"]).open("w") as log:
+            process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT, creationflags=creation_flags)
+            exit_code = process.wait()
+    except Exception as e:
+        print(f"Unable to run job {job['id']}. {str(e)}")
+        JOB_QUEUE.set_state(job["id"], utils.JOB_FAILED, error=str(e))
+        return
+    finally:
+        PATIENT_LEASES.release(job["patient_id"], get_job_lease_holder(job["id"]))
+
+    if exit_code == 0:
+        JOB_QUEUE.set_state(job["id"], utils.JOB_DONE, exit_code=exit_code)
+    else:
+        JOB_QUEUE.set_state(job["id"], utils.JOB_FAILED, exit_code=exit_code, error=f"Exited with code {exit_code}")
+    print(f"Finished job {job['id']} with exit code {exit_code}")
+
+
+def job_worker() -> None:
+    """
+    Run queued simulation jobs one after another. Runs in its own thread.
+
+    Returns
+    -------
+    None
+    """
+    while True:
+        job = JOB_QUEUE.claim_next()
+        if job is None:
+            job_submitted.wait(JOB_POLL_INTERVAL)
+            job_submitted.clear()
+            continue
+        run_job(job)
+
+
+def start_job_workers() -> None:
+    """
+    Start SIMULATION_WORKERS worker threads for the job queue, if not running yet.
+
+    Jobs that were still active when the server stopped are marked as failed,
+    since nothing waits for their processes anymore, and their patient leases
+    are released. A further thread renews the leases of the remaining jobs.
+
+    Returns
+    -------
+    None
+    """
+    with job_workers_lock:
+        if job_workers:
+            return
+
+        active_jobs = JOB_QUEUE.list(state=utils.JOB_RUNNING) + JOB_QUEUE.list(state=utils.JOB_POST_PROCESSING)
+        interrupted = JOB_QUEUE.fail_interrupted("The server was stopped while the job was running.")
+        if interrupted:
+            print(f"Marked {interrupted} interrupted simulation job(s) as failed")
+        for job in active_jobs:
+            PATIENT_LEASES.release(job["patient_id"], get_job_lease_holder(job["id"]))
+
+        lease_keeper = threading.Thread(target=renew_job_leases, name="lease-keeper", daemon=True)
+        lease_keeper.start()
+        job_workers.append(lease_keeper)
+
+        for index in range(SIMULATION_WORKERS):
+            worker = threading.Thread(target=job_worker, name=f"job-worker-{index}", daemon=True)
+            worker.start()
+            job_workers.append(worker)
+
+
+def format_event(event: str, data: dict) -> str:
+    """
+    Format a server-sent event.
+
+    Parameters
+    ----------
+    event : str
+        The event type.
+    data : dict
+        The JSON-serializable event data.
+
+    Returns
+    -------
+    str
+        The event in text/event-stream format.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def generate_job_events(job_id: int) -> Iterator[str]:
+    """
+    Yield the progress of a simulation job as server-sent events until it ends.
+
+    The events are:
+        - job : The job (see get_job()), whenever its state or post-processing stage changes.
+        - electrode : The status of one electrode's simulation ({'job_id', 'electrode', 'running', 'success'}),
+          whenever its sim_info_<electrode>.json file is written by the container.
+        - end : The final job, after which the stream is closed.
+
+    Parameters
+    ----------
+    job_id : int
+        The job ID.
+
+    Yields
+    ------
+    str
+        The next event, or a keep-alive comment.
+    """
+    last_job = None
+    sim_info_versions = {}
+    last_event_time = time.time()
+
+    # Tell EventSource clients to reconnect after 5 s if the connection drops
+    yield "retry: 5000\n\n"
+
+    while True:
+        job = JOB_QUEUE.get(job_id)
+        if job != last_job:
+            yield format_event("job", job)
+            last_job = job
+            last_event_time = time.time()
+
+        # Only sim_info files written during this job; older ones belong to previous runs
+        if job["started_at"] is not None:
+            for sim_info_file in sorted(utils.get_sim_output_path(job["config_id"]).glob("sim_info_*.json")):
+                try:
+                    stat = sim_info_file.stat()
+                    if stat.st_mtime < job["started_at"] or sim_info_versions.get(sim_info_file.name) == stat.st_mtime_ns:
+                        continue
+                    sim_info = json.loads(sim_info_file.read_text())
+                except (OSError, json.JSONDecodeError):
+                    # Removed or still being written, try again with the next check
+                    continue
+
+                sim_info_versions[sim_info_file.name] = stat.st_mtime_ns
+                yield format_event("electrode", {
+                    "job_id": job_id,
+                    "electrode": sim_info_file.stem[len("sim_info_"):],
+                    "running": sim_info.get("running", False),
+                    "success": sim_info.get("success", False),
+                })
+                last_event_time = time.time()
+
+        if job["state"] in (utils.JOB_DONE, utils.JOB_FAILED):
+            yield format_event("end", job)
+            return
+
+        if time.time() - last_event_time >= EVENT_KEEPALIVE_INTERVAL:
+            yield ": keep-alive\n\n"
+            last_event_time = time.time()
+
+        time.sleep(EVENT_POLL_INTERVAL)
+
+
+def get_route_label() -> str:
+    """
+    Return the URL rule of the current request, used as metrics label.
+
+    Returns
+    -------
+    str
+        The rule (e.g. '/jobs/<int:_job_id>'), or 'unmatched' for unknown URLs.
+    """
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+
+@app.before_request
+def start_request_metrics() -> None:
+    """Start timing the request and count it as in flight."""
+    g.request_started_at = time.perf_counter()
+    REQUESTS_IN_FLIGHT.inc()
+
+
+@app.after_request
+def record_request_metrics(response: Response) -> Response:
+    """
+    Record the latency, status code and response size of the request.
+
+    The latency ends when the response is ready; the time it takes to send
+    the body is not included. Streamed responses have no known size and are
+    not part of the size histogram.
+    """
+    route = get_route_label()
+    started_at = g.get("request_started_at")
+    if started_at is not None:
+        REQUEST_LATENCY.observe(time.perf_counter() - started_at, route=route, method=request.method)
+    REQUEST_COUNT.inc(route=route, method=request.method, status=response.status_code)
+    if response.content_length is not None:
+        RESPONSE_SIZE.observe(response.content_length, route=route)
+    return response
+
+
+@app.teardown_request
+def finish_request_metrics(_exception: Optional[BaseException] = None) -> None:
+    """Stop counting the request as in flight, even if it failed."""
+    if g.pop("request_started_at", None) is not None:
+        REQUESTS_IN_FLIGHT.dec()
+
+
+def collect_cache_metrics() -> list:
+    """
+    Build the metrics of the artifact cache from its statistics.
+
+    Returns
+    -------
+    list
+        The cache metrics.
+    """
+    stats = ARTIFACT_CACHE.stats()
+    lookups = utils.Counter("planningtool_artifact_cache_lookups_total", "Lookups in the artifact cache.", ("result",))
+    lookups.inc(stats["hits"], result="hit")
+    lookups.inc(stats["misses"], result="miss")
+    evictions = utils.Counter("planningtool_artifact_cache_evictions_total", "Entries evicted from the artifact cache.")
+    evictions.inc(stats["evictions"])
+    invalidations = utils.Counter(
+        "planningtool_artifact_cache_invalidations_total", "Entries dropped because the file changed."
+    )
+    invalidations.inc(stats["invalidations"])
+    hit_ratio = utils.Gauge("planningtool_artifact_cache_hit_ratio", "Share of the lookups that were hits.")
+    total = stats["hits"] + stats["misses"]
+    hit_ratio.set(stats["hits"] / total if total else 0)
+    entries = utils.Gauge("planningtool_artifact_cache_entries", "Artifacts in the cache.")
+    entries.set(stats["entries"])
+    size = utils.Gauge("planningtool_artifact_cache_size_bytes", "Size of the cached artifacts.")
+    size.set(stats["size_bytes"])
+    max_size = utils.Gauge("planningtool_artifact_cache_max_bytes", "Maximum size of the cache.")
+    max_size.set(stats["max_bytes"])
+    return [lookups, evictions, invalidations, hit_ratio, entries, size, max_size]
+
+
+def collect_job_metrics() -> list:
+    """
+    Build the metrics of the job queue: jobs per state, the longest wait of
+    the queued jobs per priority and the stage durations. The time every job
+    waited in the queue is the duration of its 'queued' stage.
+
+    Returns
+    -------
+    list
+        The job metrics.
+    """
+    jobs = utils.Gauge("planningtool_jobs", "Simulation jobs, by state.", ("state",))
+    for state, count in JOB_QUEUE.count_by_state().items():
+        jobs.set(count, state=state)
+
+    queue_wait = utils.Gauge(
+        "planningtool_job_queue_wait_seconds", "Longest time a queued job has been waiting, by priority.",
+        ("priority",)
+    )
+    longest_waits = dict.fromkeys(utils.JOB_PRIORITIES, 0.0)
+    for job in JOB_QUEUE.list(state=utils.JOB_QUEUED):
+        name = get_priority_name(job["priority"])
+        longest_waits[name] = max(longest_waits[name], job["queue_wait"])
+    for name, wait in longest_waits.items():
+        queue_wait.set(wait, priority=name)
+
+    stage_duration = utils.Histogram(
+        "planningtool_job_stage_duration_seconds", "Duration of the finished stages of the simulation jobs.",
+        ("stage",), utils.DURATION_BUCKETS
+    )
+    for stage, duration in JOB_QUEUE.stage_durations():
+        stage_duration.observe(duration, stage=stage)
+    return [jobs, queue_wait, stage_duration]
+
+
+def collect_container_metrics() -> list:
+    """
+    Count the running simulation containers with `docker ps`.
+
+    Returns
+    -------
+    list
+        The container gauge, or an empty list if Docker cannot be reached.
+    """
+    image_name = utils.get_setting("image_name", "simnibs_simulation:latest")
+    try:
+        result = subprocess.run(
+            ["docker", "ps", "--quiet", "--filter", f"ancestor={image_name}"],
+            capture_output=True, text=True, timeout=DOCKER_PS_TIMEOUT
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return []
+    if result.returncode != 0:
+        return []
+
+    containers = utils.Gauge("planningtool_running_containers", "Running simulation containers.")
+    containers.set(len(result.stdout.split()))
+    return [containers]
+
+
+METRICS.add_collector(collect_cache_metrics)
+METRICS.add_collector(collect_job_metrics)
+METRICS.add_collector(collect_container_metrics)
+
+
+def save_request_json(file_path: Path) -> Optional[tuple]:
+    """
+    Stream the JSON body of the current request to a file.
+
+    The body is validated while it is written and may be compressed with
+    `Content-Encoding: gzip` or `deflate` (see utils.save_json_stream()).
+
+    Parameters
+    ----------
+    file_path : Path
+        A Path object where the JSON file should be saved.
+
+    Returns
+    -------
+    tuple or None
+        None if the file was saved, otherwise an error response: 415 for an
+        unsupported Content-Encoding, 413 for a too large and 400 for an
+        invalid body.
+    """
+    content_encoding = request.headers.get('Content-Encoding', 'identity').strip().lower()
+    if content_encoding not in utils.UPLOAD_ENCODINGS:
+        return jsonify({'status': 'error', 'message': f"Unsupported Content-Encoding: {content_encoding}"}), 415
 
-def load_last_execution_times():
     try:
-        with open(LOCK_FILE, 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {}
+        utils.save_json_stream(request.stream, file_path, content_encoding)
+    except utils.UploadTooLargeError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 413
+    except ValueError as e:
+        print(f"Rejected upload for {file_path}: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    return None
+
+
+def stream_artifact(artifact: utils.CachedArtifact) -> Iterator[bytes]:
+    """
+    Yield the content of an artifact in chunks of ARTIFACT_CHUNK_SIZE bytes.
 
-def save_last_execution_times(data):
-    with open(LOCK_FILE, 'w') as f:
-        json.dump(data, f)
+    Parameters
+    ----------
+    artifact : CachedArtifact
+        The artifact to stream, either from memory or from disk.
+
+    Yields
+    ------
+    bytes
+        The next chunk of the artifact.
+    """
+    if artifact.data is not None:
+        for start in range(0, len(artifact.data), ARTIFACT_CHUNK_SIZE):
+            yield artifact.data[start:start + ARTIFACT_CHUNK_SIZE]
+        return
+
+    with artifact.path.open("rb") as file:
+        for chunk in iter(lambda: file.read(ARTIFACT_CHUNK_SIZE), b""):
+            yield chunk
+
+
+def get_decompressed_size(path_zlib: Path, path_json: Optional[Path] = None) -> int:
+    """
+    Determine the size of the uncompressed data of a compressed artifact.
+
+    The size is read from the metadata sidecar written by the post-processing.
+    Artifacts created before the sidecars existed fall back to the size of
+    the uncompressed JSON file.
+
+    Parameters
+    ----------
+    path_zlib : Path
+        A Path object pointing to the compressed .zlib file.
+    path_json : Path, optional
+        A Path object pointing to the uncompressed JSON file.
+
+    Returns
+    -------
+    int
+        The size of the uncompressed data in bytes.
+
+    Raises
+    ------
+    FileNotFoundError
+        If neither the sidecar nor the uncompressed JSON file exists.
+    """
+    path_meta = utils.get_metadata_path(path_zlib)
+    if not path_meta.exists():
+        if path_json is None:
+            raise FileNotFoundError(f"No metadata sidecar for {path_zlib}")
+        return path_json.stat().st_size
+
+    metadata = ARTIFACT_CACHE.get(path_meta)
+    raw = metadata.data if metadata.data is not None else path_meta.read_bytes()
+    return json.loads(raw)["decompressed_size"]
+
+
+def prefers_binary() -> bool:
+    """
+    Check whether the client asked for the binary variant of an artifact.
+
+    Returns
+    -------
+    bool
+        True if the Accept header ranks BINARY_MIMETYPE above JSON.
+    """
+    return request.accept_mimetypes.best_match(['application/json', BINARY_MIMETYPE]) == BINARY_MIMETYPE
+
+
+def wants_native_encoding() -> bool:
+    """
+    Check whether the client asked for an artifact with HTTP Content-Encoding.
+
+    Returns
+    -------
+    bool
+        True if the query parameter `native_encoding` is set to true.
+    """
+    return request.args.get('native_encoding', '').lower() in ('1', 'true', 'yes')
+
+
+def choose_encoding(path_zlib: Path) -> tuple:
+    """
+    Choose the encoded variant of an artifact according to the Accept-Encoding header.
+
+    The pre-encoded variants (zstd, br, gzip) are preferred in this order if the
+    client accepts them equally. The .zlib file itself is a valid 'deflate'
+    coding and is used if no variant exists or none is accepted.
+
+    Parameters
+    ----------
+    path_zlib : Path
+        A Path object pointing to the compressed .zlib file.
+
+    Returns
+    -------
+    tuple
+        A tuple (path, encoding) with the file to send and its content-coding,
+        or (path_zlib, None) if the client accepts none of them.
+    """
+    candidates = {
+        encoding: utils.get_encoded_path(path_zlib, encoding) for encoding in utils.ENCODING_SUFFIXES
+        if utils.get_encoded_path(path_zlib, encoding).exists()
+    }
+    candidates['deflate'] = path_zlib
+
+    encoding = request.accept_encodings.best_match(list(candidates))
+    if encoding is None:
+        return path_zlib, None
+    return candidates[encoding], encoding
+
+
+def send_artifact(path_zlib: Path, path_json: Optional[Path] = None, path_binary: Optional[Path] = None) -> Response:
+    """
+    Send a compressed artifact, serving it from the in-memory cache if possible.
+
+    Artifacts that are too large for the cache are streamed from disk. The
+    response carries a content-hash ETag and a Last-Modified header, so
+    clients can revalidate with If-None-Match or If-Modified-Since and get a
+    304 Not Modified without downloading the artifact again.
+
+    Single byte ranges (`Range: bytes=start-end`) are answered with 206 Partial
+    Content, so large artifacts can be fetched in parallel segments and
+    interrupted downloads can be resumed (using If-Range with the ETag to make
+    sure the artifact did not change in between). With the query parameter
+    `?stream=true` the artifact is instead sent with chunked transfer encoding.
+
+    If `path_binary` is given, the response is content-negotiated: clients
+    sending `Accept: application/vnd.planningtool.arrays` receive the binary
+    container (see utils.binary_format) if it exists, all others the JSON.
+
+    With the query parameter `?native_encoding=true`, the artifact is sent with
+    a 'Content-Encoding' chosen from the client's Accept-Encoding (see
+    choose_encoding()), so browsers decode it themselves. Clients accepting
+    none of the encodings receive the uncompressed data.
+
+    Parameters
+    ----------
+    path_zlib : Path
+        A Path object pointing to the compressed .zlib file.
+    path_json : Path, optional
+        A Path object pointing to the uncompressed JSON file, used to
+        determine the 'Decompressed-Size' of artifacts without sidecar.
+    path_binary : Path, optional
+        A Path object pointing to the compressed binary variant (.bin.zlib).
+
+    Returns
+    -------
+    Response
+        A Flask Response object sending the compressed .zlib file (200), a part
+        of it (206) or an empty 304 response, with the 'Decompressed-Size'
+        header set.
+    """
+    mimetype = None
+    if path_binary is not None and prefers_binary() and path_binary.exists():
+        path_zlib = path_binary
+        mimetype = BINARY_MIMETYPE
+
+    path_sent = path_zlib
+    download_name = path_zlib.name
+    content_encoding = None
+    native_encoding = wants_native_encoding()
+    if native_encoding:
+        path_sent, content_encoding = choose_encoding(path_zlib)
+        download_name = path_zlib.stem if mimetype else f"{path_zlib.stem}.json"
+        mimetype = mimetype or 'application/json'
+
+    artifact = ARTIFACT_CACHE.get(path_sent)
+
+    if native_encoding and content_encoding is None:
+        raw = artifact.data if artifact.data is not None else path_sent.read_bytes()
+        response = send_file(
+            io.BytesIO(zlib.decompress(raw)), mimetype=mimetype, as_attachment=True, download_name=download_name,
+            etag=f"{artifact.etag}-identity", last_modified=artifact.mtime
+        )
+    elif request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        response = Response(
+            stream_artifact(artifact), mimetype=mimetype or 'application/octet-stream', direct_passthrough=True
+        )
+        response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+        response.set_etag(artifact.etag)
+        response.last_modified = artifact.mtime
+        response.cache_control.no_cache = True
+        response = response.make_conditional(request)
+    else:
+        source = path_sent if artifact.data is None else io.BytesIO(artifact.data)
+        response = send_file(
+            source, mimetype=mimetype, as_attachment=True, download_name=download_name,
+            etag=artifact.etag, last_modified=artifact.mtime
+        )
+    response.headers['Decompressed-Size'] = get_decompressed_size(path_zlib, path_json)
+    if content_encoding is not None:
+        response.headers['Content-Encoding'] = content_encoding
+    if native_encoding:
+        response.vary.add('Accept-Encoding')
+    if path_binary is not None:
+        response.vary.add('Accept')
+
+    return response
+
+
+def get_electrode_dir(_patient_id: str, _config_id: str, _roi_id: Optional[str] = None) -> Path:
+    """
+    Return the directory of the per-electrode files of the simulated data or ROI data.
+
+    Parameters
+    ----------
+    _patient_id : str
+        The patient ID.
+    _config_id : str
+        The configuration ID.
+    _roi_id : str, optional
+        The ROI ID.
+
+    Returns
+    -------
+    Path
+        A Path object pointing to the directory with the per-electrode files
+        (see get_artifact_version_dir()).
+    """
+    path = utils.DATABASE_PATHS["process"] / _patient_id / _config_id
+    if _roi_id is None:
+        return path / f"{_config_id}_electrodes"
+    return path / _roi_id / f"{_roi_id}_electrodes"
+
+
+def get_artifact_version_dir(artifact_dir: Path, index: dict) -> Path:
+    """
+    Return the directory of the current version of per-electrode or per-tag artifacts.
+
+    The post-processing writes every run to a new version directory and
+    names it in the index (see process_helper_functions.publish_artifact_version),
+    so files are never replaced while they are being sent.
+
+    Parameters
+    ----------
+    artifact_dir : Path
+        A Path object pointing to the directory with the artifacts.
+    index : dict
+        The content of its index.json.
+
+    Returns
+    -------
+    Path
+        A Path object pointing to the version directory, or `artifact_dir`
+        itself for artifacts written before versions were introduced.
+    """
+    return artifact_dir / index.get("version", "")
+
+
+def send_merged_artifacts(paths: list[Path], download_name: str) -> Response:
+    """
+    Merge several compressed JSON artifacts into one response.
+
+    Every artifact has to contain a JSON object of dictionaries (e.g.
+    {"meshes": {...}}); dictionaries with the same key are merged. The ETag
+    is derived from the ETags of the parts, so revalidation does not require
+    merging them again. `?native_encoding=true` is supported as in
+    send_artifact().
+
+    Parameters
+    ----------
+    paths : list[Path]
+        Path objects pointing to the compressed .zlib files.
+    download_name : str
+        The file name of the merged attachment.
+
+    Returns
+    -------
+    Response
+        A Flask Response object sending the merged, compressed data (200), or
+        an empty 304 response, with the 'Decompressed-Size' header set.
+    """
+    artifacts = [ARTIFACT_CACHE.get(path) for path in paths]
+    etag = hashlib.sha256(" ".join(artifact.etag for artifact in artifacts).encode()).hexdigest()
+    last_modified = max(artifact.mtime for artifact in artifacts)
+
+    # With ?native_encoding=true, the zlib data is sent as 'deflate' coding, or
+    # uncompressed if the client does not accept it
+    native_encoding = wants_native_encoding()
+    use_deflate = not native_encoding or request.accept_encodings.best_match(['deflate']) is not None
+    if native_encoding:
+        etag = f"{etag}-deflate" if use_deflate else f"{etag}-identity"
+        download_name = f"{Path(download_name).stem}.json"
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    merged_data = {}
+    for artifact in artifacts:
+        raw = artifact.data if artifact.data is not None else artifact.path.read_bytes()
+        for key, value in json.loads(zlib.decompress(raw)).items():
+            merged_data.setdefault(key, {}).update(value)
+
+    encoded = json.dumps(merged_data).encode()
+    response = send_file(
+        io.BytesIO(zlib.compress(encoded, 1) if use_deflate else encoded),
+        mimetype='application/json' if native_encoding else None, as_attachment=True,
+        download_name=download_name, etag=etag, last_modified=last_modified
+    )
+    response.headers['Decompressed-Size'] = len(encoded)
+    if native_encoding:
+        if use_deflate:
+            response.headers['Content-Encoding'] = 'deflate'
+        response.vary.add('Accept-Encoding')
+
+    return response
 
 
 @app.route('/3d/configuration/<_patient_id>', methods=['GET'])
-def get_default_mesh(_patient_id: str) -> tuple[Response, int, dict]:
+def get_default_mesh(_patient_id: str) -> Response:
     """
     Retrieves the original 3D mesh data for a given patient.
 
@@ -70,20 +901,18 @@ def get_default_mesh(_patient_id: str) -> tuple[Response, int, dict]:
 
     Returns
     -------
-    tuple
-        A tuple containing:
-            - A Flask Response object sending the compressed .zlib file
-            - An HTTP status code (200 if successful)
-            - A dictionary of headers, here indicating 'Decompressed-Size'
+    Response
+        A Flask Response object sending the compressed .zlib file (or the
+        requested byte range of it), or a 304 response if the client's copy is
+        still up to date. The 'Decompressed-Size' header holds the size of
+        the uncompressed data.
     """
     print(f"Loading original mesh for {_patient_id}...")
     path = utils.DATABASE_PATHS["original"] / _patient_id
     path_json = path / f"{_patient_id}_original_3d_data.json"
     path_zlib = path / f"{_patient_id}_original_compressed_3d_data.zlib"
 
-    decompressed_size = path_json.stat().st_size
-
-    return send_file(path_zlib, as_attachment=True), 200, {'Decompressed-Size': decompressed_size}
+    return send_artifact(path_zlib, path_json)
 
 
 @app.route('/data/elect_pos/<_patient_id>/<_config_id>', methods=['POST'])
@@ -101,14 +930,15 @@ def receive_electrode_positions(_patient_id: str, _config_id: str) -> str:
     Returns
     -------
     str
-        A confirmation message indicating the positions were received.
+        A confirmation message indicating the positions were received, or an
+        error response if the body is not valid JSON (see save_request_json()).
     """
-    json_data = request.get_json()
-
     path = utils.DATABASE_PATHS["electrode"] / _patient_id
     path.mkdir(parents=True, exist_ok=True)
     file_path = path / f"electrode_positions_{_config_id}.json"
-    utils.save_json(json_data, file_path)
+    error = save_request_json(file_path)
+    if error is not None:
+        return error
 
     message = f"Electrode positions for {_patient_id}: {_config_id} received!"
     print(message)
@@ -180,24 +1010,165 @@ def receive_roi_data(_patient_id: str, _roi_id: str) -> str:
     Returns
     -------
     str
-        A confirmation message indicating the ROI data was received.
+        A confirmation message indicating the ROI data was received, or an
+        error response if the body is not valid JSON (see save_request_json()).
     """
-    json_data = request.get_json()
-    print(f"New ROI Data for {_patient_id}: {_roi_id} received!")
-
     path = utils.DATABASE_PATHS["roi"] / _patient_id
     path.mkdir(parents=True, exist_ok=True)
     file_path = path / f"{_roi_id}_roi_bounds.json"
-    utils.save_json(json_data, file_path)
+    error = save_request_json(file_path)
+    if error is not None:
+        return error
+    print(f"New ROI Data for {_patient_id}: {_roi_id} received!")
 
     return f"ROI Data for {_patient_id}: {_roi_id} received!"
 
 
+def get_batch_path(_patient_id: str, _kind: str, _item_id: str) -> Path:
+    """
+    Return the file of one entry of a batch (see BATCH_FILES).
+
+    Parameters
+    ----------
+    _patient_id : str
+        The patient ID.
+    _kind : str
+        'electrode_positions' or 'rois'.
+    _item_id : str
+        The configuration or ROI ID.
+
+    Returns
+    -------
+    Path
+        The path of the JSON file, e.g. '.../electrode_positions_<config>.json'.
+
+    Raises
+    ------
+    ValueError
+        If the ID could leave the directory of the patient.
+    """
+    if not _item_id or _item_id in (".", "..") or "/" in _item_id or "\\" in _item_id:
+        raise ValueError(f"Invalid ID in {_kind}: {_item_id!r}")
+    database, file_name = BATCH_FILES[_kind]
+    return utils.DATABASE_PATHS[database] / _patient_id / file_name.format(_item_id)
+
+
+@app.route('/data/batch/<_patient_id>', methods=['POST'])
+def receive_batch(_patient_id: str):
+    """
+    Receives and saves the electrode positions and ROIs of many configurations at once.
+
+    The body is a JSON object with the optional keys `electrode_positions`
+    (configuration ID -> electrode positions) and `rois` (ROI ID -> ROI data),
+    e.g. `{"electrode_positions": {"c1": {...}, "c2": {...}}, "rois": {"r1": {...}}}`.
+    Each entry is stored in the same file as by the single-item routes. All
+    files are written at once: an invalid body or an error while writing
+    leaves every existing file untouched.
+
+    Parameters
+    ----------
+    _patient_id : str
+        The patient ID.
+
+    Returns
+    -------
+    Response
+        JSON response with the saved configuration and ROI IDs, or an error
+        response if the body is invalid (see save_request_json()).
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        upload_path = Path(directory) / "batch.json"
+        error = save_request_json(upload_path)
+        if error is not None:
+            return error
+        batch = json.loads(upload_path.read_bytes())
+
+    if not isinstance(batch, dict) or not set(batch) <= set(BATCH_FILES) \
+            or not all(isinstance(items, dict) for items in batch.values()):
+        return jsonify({
+            'status': 'error',
+            'message': f"Expected an object with the keys {', '.join(BATCH_FILES)}, each mapping IDs to data."
+        }), 400
+
+    try:
+        files = {
+            get_batch_path(_patient_id, kind, item_id): data
+            for kind, items in batch.items() for item_id, data in items.items()
+        }
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    for file_path in files:
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+    utils.save_json_batch(files)
+
+    saved = {kind: sorted(batch.get(kind, {})) for kind in BATCH_FILES}
+    print(f"Batch for {_patient_id} received: {len(saved['electrode_positions'])} configurations, "
+          f"{len(saved['rois'])} ROIs")
+    return jsonify({'status': 'success', **saved}), 200
+
+
+@app.route('/data/batch/<_patient_id>', methods=['GET'])
+def get_batch(_patient_id: str):
+    """
+    Retrieves the electrode positions and ROIs of many configurations at once.
+
+    The query parameters `configs` and `rois` are comma-separated lists of
+    IDs, e.g. `/data/batch/Ernie?configs=c1,c2&rois=r1`. Without either
+    parameter, all stored configurations and ROIs of the patient are returned.
+
+    Parameters
+    ----------
+    _patient_id : str
+        The patient ID.
+
+    Returns
+    -------
+    Response
+        JSON response with the keys `electrode_positions` and `rois` (ID ->
+        data) and `missing` (the requested IDs without a file).
+    """
+    requested = {"electrode_positions": request.args.get('configs'), "rois": request.args.get('rois')}
+    if all(ids is None for ids in requested.values()):
+        # Everything stored for the patient, recovered from the file names
+        for kind, (database, file_name) in BATCH_FILES.items():
+            prefix, suffix = file_name.split("{}")
+            requested[kind] = ",".join(
+                path.name[len(prefix):-len(suffix)]
+                for path in sorted((utils.DATABASE_PATHS[database] / _patient_id).glob(file_name.format("*")))
+            )
+
+    response = {kind: {} for kind in BATCH_FILES}
+    response["missing"] = {kind: [] for kind in BATCH_FILES}
+    for kind, ids in requested.items():
+        for item_id in filter(None, (ids or "").split(",")):
+            try:
+                file_path = get_batch_path(_patient_id, kind, item_id)
+            except ValueError as e:
+                return jsonify({'status': 'error', 'message': str(e)}), 400
+            try:
+                response[kind][item_id] = utils.load_json(file_path)
+            except FileNotFoundError:
+                response["missing"][kind].append(item_id)
+
+    print(f"Sending batch for {_patient_id}: {len(response['electrode_positions'])} configurations, "
+          f"{len(response['rois'])} ROIs")
+    return jsonify(response), 200
+
+
 @app.route('/3d/configuration/skin/<_patient_id>', methods=['GET'])
 def get_skin(_patient_id: str) -> Response:
     """
     Retrieves the skin mesh data for a given patient.
 
+    By default, the compressed skin mesh with the vertices of the complete
+    head model is sent. With the query parameter `?compact=true`, the
+    compressed skin mesh holding only the vertices used by the skin is sent
+    instead. Both are created by convert_mesh_to_json(); for patients
+    processed before they existed, they are created once from the vertices
+    and skin mesh JSON files (see create_skin_artifact(), which writes them
+    atomically).
+
     Parameters
     ----------
     _patient_id : str
@@ -206,22 +1177,34 @@ def get_skin(_patient_id: str) -> Response:
     Returns
     -------
     Response
-        A Flask Response object (JSON) containing vertices and triangles for the skin mesh.
+        A Flask Response object sending the compressed skin mesh
+        ({'vertices': ..., 'triangles': ...}; with `?compact=true`, the
+        triangles index the skin vertices only), or a 304 response if the
+        client's copy is still up to date. The 'Decompressed-Size' header
+        holds the size of the uncompressed data. 404 if the patient has no
+        skin mesh.
     """
     print(f"Loading skin_mesh for {_patient_id}...")
     path = utils.DATABASE_PATHS["original"] / _patient_id
+    compact = request.args.get('compact', '').lower() in ('1', 'true', 'yes')
+    path_zlib = path / (f"{_patient_id}_compressed_skin_mesh.zlib" if compact
+                        else f"{_patient_id}_compressed_skin_mesh_full.zlib")
 
-    vertices_path = path / f"{_patient_id}_vertices.json"
-    skin_path = path / f"{_patient_id}_skin_mesh.json"
-    vertices = utils.load_json(vertices_path)
-    skin_mesh = utils.load_json(skin_path)
+    if not path_zlib.exists():
+        print(f"Creating compressed skin_mesh for {_patient_id}...")
+        try:
+            vertices = utils.load_json(path / f"{_patient_id}_vertices.json")
+            skin_mesh = utils.load_json(path / f"{_patient_id}_skin_mesh.json")
+        except FileNotFoundError:
+            return jsonify({'status': 'error', 'message': f"No skin mesh for patient: {_patient_id}"}), 404
+        create_skin_artifact(vertices, skin_mesh, path_zlib, compact)
 
-    print(f"Sending skin_mesh for {_patient_id}...")
-    return jsonify({'vertices': vertices, 'triangles': skin_mesh})
+    print(f"Sending compressed skin_mesh for {_patient_id}...")
+    return send_artifact(path_zlib)
 
 
 @app.route('/3d/simulated/<_patient_id>/<_config_id>', methods=['GET'])
-def get_mesh(_patient_id: str, _config_id: str) -> tuple[Response, int, dict]:
+def get_mesh(_patient_id: str, _config_id: str) -> Response:
     """
     Retrieves the simulated 3D mesh data for a given patient and configuration.
 
@@ -234,23 +1217,91 @@ def get_mesh(_patient_id: str, _config_id: str) -> tuple[Response, int, dict]:
 
     Returns
     -------
-    tuple
-        A tuple containing:
-            - A Flask Response object sending the compressed 3D .zlib file
-            - HTTP status code
-            - A header dict containing the 'Decompressed-Size'
+    Response
+        A Flask Response object sending the compressed 3D .zlib file (or the
+        requested byte range of it), or a 304 response if the client's copy is
+        still up to date. The 'Decompressed-Size' header holds the size of
+        the uncompressed data.
+        Clients accepting 'application/vnd.planningtool.arrays' receive the
+        binary container instead, if the post-processing wrote one.
     """
     print(f"Loading mesh for patient id {_patient_id}...")
     path_json = utils.DATABASE_PATHS["process"] / _patient_id / _config_id / f"{_config_id}_3d_data.json"
     path_zlib = utils.DATABASE_PATHS["process"] / _patient_id / _config_id / f"{_config_id}_compressed_3d_data.zlib"
+    path_binary = path_zlib.with_name(f"{_config_id}_compressed_3d_data.bin.zlib")
 
-    decompressed_size = path_json.stat().st_size
+    return send_artifact(path_zlib, path_json, path_binary)
 
-    return send_file(path_zlib, as_attachment=True), 200, {'Decompressed-Size': decompressed_size}
+
+@app.route('/3d/simulated/<_patient_id>/<_config_id>/vertices', methods=['GET'])
+def get_mesh_vertices(_patient_id: str, _config_id: str) -> Response:
+    """
+    Retrieves the vertices of the simulated 3D mesh, which are shared by all tags.
+
+    Parameters
+    ----------
+    _patient_id : str
+        The patient ID.
+    _config_id : str
+        The configuration ID.
+
+    Returns
+    -------
+    Response
+        A Flask Response object sending the compressed vertex list, with the
+        same conditional and range handling as get_mesh().
+    """
+    tag_dir = utils.DATABASE_PATHS["process"] / _patient_id / _config_id / f"{_config_id}_3d_tags"
+    index = utils.load_json(tag_dir / "index.json")
+    return send_artifact(get_artifact_version_dir(tag_dir, index) / "vertices.zlib")
+
+
+@app.route('/3d/simulated/<_patient_id>/<_config_id>/tags', methods=['GET'])
+def get_mesh_tags(_patient_id: str, _config_id: str) -> Response:
+    """
+    Retrieves the simulated 3D mesh data of selected tags (tissues) only.
+
+    Without the query parameter `ids`, the index of the available tags is
+    returned. With `?ids=1002,2`, the 'meshes', 'volumes' and 'volumes_raw'
+    of the requested tags are returned in the same format as in get_mesh().
+    The vertices can be retrieved once with get_mesh_vertices().
+
+    Parameters
+    ----------
+    _patient_id : str
+        The patient ID.
+    _config_id : str
+        The configuration ID.
+
+    Returns
+    -------
+    Response
+        A JSON response with the tag index, or a Flask Response object sending
+        the compressed data of the requested tags (with 'Decompressed-Size'
+        header). 404 if one of the requested tags does not exist.
+    """
+    tag_dir = utils.DATABASE_PATHS["process"] / _patient_id / _config_id / f"{_config_id}_3d_tags"
+    index = utils.load_json(tag_dir / "index.json")
+
+    tag_ids = [tag.strip() for tag in request.args.get('ids', '').split(',') if tag.strip()]
+    if not tag_ids:
+        return jsonify(index)
+
+    unknown_tags = [tag for tag in tag_ids if tag not in index["decompressed_sizes"]]
+    if unknown_tags:
+        return jsonify({'status': 'error', 'message': f"Unknown tags: {', '.join(unknown_tags)}"}), 404
+
+    print(f"Sending tags {', '.join(tag_ids)} for {_patient_id}: {_config_id}...")
+    version_dir = get_artifact_version_dir(tag_dir, index)
+    tag_paths = [version_dir / f"tag_{tag}.zlib" for tag in dict.fromkeys(tag_ids)]
+    if len(tag_paths) == 1:
+        return send_artifact(tag_paths[0])
+
+    return send_merged_artifacts(tag_paths, f"{_config_id}_compressed_3d_tags.zlib")
 
 
 @app.route('/data/simulated/<_patient_id>/<_config_id>/<_roi_id>', methods=['GET'])
-def get_data(_patient_id: str, _config_id: str, _roi_id: str) -> tuple[Response, int, dict]:
+def get_data(_patient_id: str, _config_id: str, _roi_id: str) -> Response:
     """
     Retrieves the simulated data for a given patient, configuration, and ROI.
 
@@ -265,22 +1316,94 @@ def get_data(_patient_id: str, _config_id: str, _roi_id: str) -> tuple[Response,
 
     Returns
     -------
-    tuple
-        A tuple containing:
-            - A Flask Response object sending the compressed ROI .zlib file
-            - HTTP status code
-            - A header dict with the 'Decompressed-Size'
+    Response
+        A Flask Response object sending the compressed ROI .zlib file (or the
+        requested byte range of it), or a 304 response if the client's copy is
+        still up to date. The 'Decompressed-Size' header holds the size of
+        the uncompressed data.
+        Clients accepting 'application/vnd.planningtool.arrays' receive the
+        binary container instead, if the post-processing wrote one.
     """
     print(f"Loading data for patient id {_patient_id}...")
     path_roi = utils.DATABASE_PATHS["process"] / _patient_id / _config_id / _roi_id
 
     path_json = path_roi / f"{_roi_id}_roi_data.json"
     path_zlib = path_roi / f"{_roi_id}_compressed_roi_data.zlib"
+    path_binary = path_roi / f"{_roi_id}_compressed_roi_data.bin.zlib"
 
     print("Sending...")
-    decompressed_size = path_json.stat().st_size
+    return send_artifact(path_zlib, path_json, path_binary)
 
-    return send_file(path_zlib, as_attachment=True), 200, {'Decompressed-Size': decompressed_size}
+
+@app.route('/data/simulated/<_patient_id>/<_config_id>/electrodes', methods=['GET'])
+@app.route('/data/simulated/<_patient_id>/<_config_id>/<_roi_id>/electrodes', methods=['GET'])
+def get_electrode_index(_patient_id: str, _config_id: str, _roi_id: Optional[str] = None) -> Response:
+    """
+    Retrieves the index of the electrodes of the simulated data (or ROI data).
+
+    Parameters
+    ----------
+    _patient_id : str
+        The patient ID.
+    _config_id : str
+        The configuration ID.
+    _roi_id : str, optional
+        The ROI ID. Without ROI, the index of the complete simulated data is returned.
+
+    Returns
+    -------
+    Response
+        A JSON response listing the electrodes, their tags and the
+        decompressed size of every electrode's tag.
+    """
+    return jsonify(utils.load_json(get_electrode_dir(_patient_id, _config_id, _roi_id) / "index.json"))
+
+
+@app.route('/data/simulated/<_patient_id>/<_config_id>/electrodes/<_electrode_id>', methods=['GET'])
+@app.route('/data/simulated/<_patient_id>/<_config_id>/<_roi_id>/electrodes/<_electrode_id>', methods=['GET'])
+def get_electrode_data(_patient_id: str, _config_id: str, _electrode_id: str, _roi_id: Optional[str] = None) -> Response:
+    """
+    Retrieves the simulated data (or ROI data) of a single electrode position.
+
+    With the query parameter `tag` (e.g. `?tag=1002`), only the data of this
+    tag is sent. The data has the format of one entry of 'Electrodes' in
+    get_data(): {"Magnitude": {tag: ...}, "Vectorfield": {tag: ...}}.
+
+    Parameters
+    ----------
+    _patient_id : str
+        The patient ID.
+    _config_id : str
+        The configuration ID.
+    _electrode_id : str
+        The electrode, e.g. 'Electrode_0'.
+    _roi_id : str, optional
+        The ROI ID. Without ROI, the data of the complete mesh is sent.
+
+    Returns
+    -------
+    Response
+        A Flask Response object sending the compressed data (with
+        'Decompressed-Size' header), or a 304 response if the client's copy
+        is still up to date. 404 if the electrode or tag does not exist.
+    """
+    electrode_dir = get_electrode_dir(_patient_id, _config_id, _roi_id)
+    index = utils.load_json(electrode_dir / "index.json")
+
+    tag_sizes = index["decompressed_sizes"].get(_electrode_id)
+    if tag_sizes is None:
+        return jsonify({'status': 'error', 'message': f"Unknown electrode: {_electrode_id}"}), 404
+
+    tag = request.args.get('tag')
+    if tag is not None:
+        if tag not in tag_sizes:
+            return jsonify({'status': 'error', 'message': f"Unknown tag: {tag}"}), 404
+        return send_artifact(get_artifact_version_dir(electrode_dir, index) / _electrode_id / f"tag_{tag}.zlib")
+
+    print(f"Sending {_electrode_id} for {_patient_id}: {_config_id}...")
+    version_dir = get_artifact_version_dir(electrode_dir, index)
+    tag_paths = [version_dir / _electrode_id / f"tag_{tag}.zlib" for tag in tag_sizes]
+    return send_merged_artifacts(tag_paths, f"{_config_id}_compressed_{_electrode_id}.zlib")
 
 
 @app.route('/data/interpolated/<_patient_id>/<_config_id>/<_roi_id>/<_interpolation_id>', methods=['POST'])
@@ -302,16 +1425,16 @@ def receive_interpolated_data(_patient_id: str, _config_id: str, _roi_id: str, _
     Returns
     -------
     str
-        A confirmation message indicating the data was received.
+        A confirmation message indicating the data was received, or an error
+        response if the body is not valid JSON (see save_request_json()).
     """
-    json_data = request.get_json()
-    print("New Interpolated Data received!")
-
     path = utils.DATABASE_PATHS["interpolation"] / _patient_id / _config_id / _roi_id
     path.mkdir(parents=True, exist_ok=True)
 
     file_path = path / f"{_interpolation_id}_interpolated_data.json"
-    utils.save_json(json_data, file_path)
+    error = save_request_json(file_path)
+    if error is not None:
+        return error
 
     print(f"Interpolated Data for {_patient_id}: {_config_id} | {_roi_id} | {_interpolation_id} received!")
     return f"Interpolated Data for {_patient_id}: {_config_id} | {_roi_id} | {_interpolation_id} received!"
@@ -328,11 +1451,49 @@ def reached():
     """
     return jsonify({'status': True}), 200
 
+@app.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """
+    Returns the statistics of the in-memory artifact cache.
+
+    Returns
+    -------
+    Response
+        JSON response with the hit, miss, eviction and invalidation counts,
+        the number of cached entries and their total size in bytes.
+    """
+    return jsonify(ARTIFACT_CACHE.stats()), 200
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Returns the metrics of the server in the Prometheus text exposition format.
+
+    Includes request latencies, response sizes and requests in flight per
+    route, the artifact cache statistics, the number of jobs per state, the
+    durations of the job stages and the number of running containers.
+
+    Returns
+    -------
+    Response
+        Plain-text response with the metrics.
+    """
+    return Response(METRICS.render(), mimetype="text/plain; version=0.0.4"), 200
+
 @app.route('/run_simulations/<_patient_id>/<_config_id>/<_roi_id>', methods=['POST'])
 def run_simulations(_patient_id: str, _config_id: str, _roi_id: str):
     """
     Route to initiate simulations for a given patient, configuration, and ROI.
-    Ensures that only one simulation can be started for each patient within a specified lockout time.
+    Ensures that only one ensemble per patient is queued or running at a time,
+    using a lease on the patient that is released when the job ends (or expires
+    SIMULATION_LOCK_TIME seconds after the server stopped renewing it).
+
+    The simulations are added to the job queue and run by one of the
+    SIMULATION_WORKERS worker threads; their progress can be requested with
+    get_job(). The query parameter `priority` (one of utils.JOB_PRIORITIES,
+    e.g. `?priority=preview` for a small interactive run) lets a job overtake
+    jobs of lower priority, both in the job queue and when containers are
+    handed out (see utils.SlotScheduler).
 
     Parameters
     ----------
@@ -346,50 +1507,150 @@ def run_simulations(_patient_id: str, _config_id: str, _roi_id: str):
     Returns
     -------
     A JSON response indicating the status of the request:
-        - 'success' if the simulation started successfully.
-        - 'warning' if a simulation was recently started and the lockout time has not expired.
-        - 'error' if there was an exception during the process.
+        - 'success' if the simulation was queued, with its 'job_id'.
+        - 'warning' if a simulation for this patient is already queued or running.
+        - 'error' if there was an exception during the process, or 400 for an unknown priority.
     """
     print(f"PatientID:{_patient_id}, ConfigID:{_config_id}, ROIID:{_roi_id}")
 
-    last_execution_times = load_last_execution_times()
-    current_time = time.time()
+    priority = request.args.get('priority', 'normal')
+    if priority not in utils.JOB_PRIORITIES:
+        return jsonify({'status': 'error', 'message': f"Unknown priority: {priority}"}), 400
 
-    # Check if a simulation ran with this patient ID recently
-    if _patient_id in last_execution_times:
-        elapsed_time = current_time - last_execution_times[_patient_id]
-        if elapsed_time < SIMULATION_LOCK_TIME:
-            remaining_time = SIMULATION_LOCK_TIME - elapsed_time
-            print(f"Need to wait {remaining_time} seconds before starting a new simulation for patient {_patient_id}")
-            return jsonify({
-                'status': 'warning',
-                'message': f"Please wait {int(remaining_time)} seconds before starting a new simulation for this patient."
-            }), 429 # HTTP 429 means Too Many Requests
+    start_job_workers()
 
-    # Update last execution time
-    last_execution_times[_patient_id] = current_time
-    save_last_execution_times(last_execution_times)
+    # Lease the patient atomically, so concurrent requests cannot both start an ensemble
+    request_holder = f"request-{uuid.uuid4().hex}"
+    if not PATIENT_LEASES.acquire(_patient_id, request_holder, SIMULATION_LOCK_TIME):
+        lease = PATIENT_LEASES.get(_patient_id)
+        holder = lease["holder"] if lease is not None else "another request"
+        print(f"Simulations for patient {_patient_id} are already queued or running ({holder})")
+        return jsonify({
+            'status': 'warning',
+            'message': f"A simulation for this patient is already queued or running ({holder}). Please wait until it has finished."
+        }), 429 # HTTP 429 means Too Many Requests
 
     try:
-        command = [
-            "python", "run_docker_simulations.py",
-            "--PatientID", _patient_id,
-            "--ConfigID", _config_id,
-            "--ROIID", _roi_id
-        ]
-        # Create detached process on Windows
-        creation_flags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
-
-        # Start subprocess in a new session and redirect its output
-        with open("./logs/simulation_output.log", "w") as out, open("./logs/simulation_error.log", "w") as err:
-            subprocess.Popen(command, stdout=out, stderr=err, creationflags=creation_flags, start_new_session=True)
-
-        print(f"Successfully started simulations for patient {_patient_id}, config {_config_id}, ROI {_roi_id}!")
+        job = JOB_QUEUE.submit(_patient_id, _config_id, _roi_id, utils.JOB_PRIORITIES[priority])
+        PATIENT_LEASES.transfer(_patient_id, request_holder, get_job_lease_holder(job["id"]))
+        job_submitted.set()
+
+        print(f"Queued simulations for patient {_patient_id}, config {_config_id}, ROI {_roi_id} as job {job['id']}!")
         return jsonify({
             'status': 'success',
-            'message': 'Simulation started in background'
+            'message': 'Simulation queued',
+            'job_id': job['id']
         }), 200
 
     except Exception as e:
+        PATIENT_LEASES.release(_patient_id, request_holder)
         print(f"Unable to start simulation for patient {_patient_id}. {str(e)}")
         return jsonify({'status':'error', 'message':str(e)}), 500
+
+
+@app.route('/jobs/<int:_job_id>', methods=['GET'])
+def get_job(_job_id: int):
+    """
+    Returns the state of a simulation job.
+
+    Parameters
+    ----------
+    _job_id : int
+        The job ID, as returned by run_simulations().
+
+    Returns
+    -------
+    Response
+        JSON response with the job (state, IDs, timestamps, exit code and
+        error), or 404 if the job does not exist.
+    """
+    job = JOB_QUEUE.get(_job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': f"Unknown job: {_job_id}"}), 404
+    return jsonify(job), 200
+
+
+@app.route('/jobs/<int:_job_id>/log', methods=['GET'])
+def get_job_log(_job_id: int):
+    """
+    Returns the log file of a simulation job.
+
+    Parameters
+    ----------
+    _job_id : int
+        The job ID.
+
+    Returns
+    -------
+    Response
+        The output of the simulation script as plain text, or 404 if the job
+        has not started yet or does not exist.
+    """
+    log_path = get_job_log_path(_job_id)
+    if not log_path.exists():
+        return jsonify({'status': 'error', 'message': f"No log for job: {_job_id}"}), 404
+    return send_file(log_path.resolve(), mimetype='text/plain', max_age=0)
+
+
+@app.route('/jobs/<int:_job_id>/events', methods=['GET'])
+def get_job_events(_job_id: int):
+    """
+    Streams the progress of a simulation job as server-sent events.
+
+    Instead of polling /data/validation/... until the results exist, clients
+    can subscribe with `new EventSource('/jobs/<job_id>/events')`. See
+    generate_job_events() for the events. The stream ends with the 'end'
+    event once the job is done or failed.
+
+    Every open stream occupies one worker thread of the server (see the
+    --threads option of start_backend.py) until the job ends. At most
+    MAX_EVENT_STREAMS (config.ini: max_event_streams) streams are open at
+    the same time, so the other routes always have threads left; further
+    subscribers get a 503 response and have to poll /jobs/<job_id> instead.
+
+    Parameters
+    ----------
+    _job_id : int
+        The job ID.
+
+    Returns
+    -------
+    Response
+        A text/event-stream response, 404 if the job does not exist, or 503
+        if MAX_EVENT_STREAMS streams are already open.
+    """
+    if JOB_QUEUE.get(_job_id) is None:
+        return jsonify({'status': 'error', 'message': f"Unknown job: {_job_id}"}), 404
+
+    if not event_streams.acquire(blocking=False):
+        response = jsonify({'status': 'error', 'message': "Too many open event streams, poll /jobs/<job_id> instead"})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(EVENT_KEEPALIVE_INTERVAL)
+        return response
+
+    response = Response(generate_job_events(_job_id), mimetype='text/event-stream')
+    # The server closes the response when the stream ends or the client disconnects
+    response.call_on_close(event_streams.release)
+    response.cache_control.no_cache = True
+    # Keep reverse proxies from buffering the events
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@app.route('/jobs', methods=['GET'])
+def get_jobs():
+    """
+    Returns the simulation jobs, newest first.
+
+    The query parameters `patient` and `state` filter the jobs, e.g.
+    `/jobs?patient=Ernie&state=running`.
+
+    Returns
+    -------
+    Response
+        JSON response with the list of jobs.
+    """
+    state = request.args.get('state')
+    if state is not None and state not in utils.JOB_STATES:
+        return jsonify({'status': 'error', 'message': f"Unknown state: {state}"}), 400
+    return jsonify(JOB_QUEUE.list(patient_id=request.args.get('patient'), state=state)), 200
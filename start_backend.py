@@ -3,7 +3,7 @@ Entry point for processing mesh files and optionally starting a Flask-based serv
 
 This script uses command-line arguments to:
     - Convert a mesh file to JSON for a given patient.
-    - Start the web server if requested.
+    - Start the web server if requested (waitress, or an ASGI server with --asgi).
 
 Examples
 --------
@@ -16,6 +16,7 @@ Notes
 Dependencies:
     - argparse for command-line interface
     - waitress for serving the Flask app
+    - uvicorn (optional) for serving the ASGI app with --asgi
     - simnibs.mesh_tools for reading .msh files
     - process_simulations for the JSON conversion logic
 """
@@ -24,6 +25,7 @@ Dependencies:
 import argparse
 from pathlib import Path
 import sys
+from typing import Optional
 
 from simnibs import mesh_tools
 from waitress import serve
@@ -67,6 +69,39 @@ def process(directory: str, filename: str, patient_id: str) -> None:
     convert_mesh_to_json(mesh_raw, patient_id)
 
 
+def serve_asgi(address: str, port: int, threads: Optional[int] = None) -> None:
+    """
+    Serve the REST server through its ASGI entry point with uvicorn.
+
+    Parameters
+    ----------
+    address : str
+        The IP address to bind to.
+    port : int
+        The port to bind to.
+    threads : int, optional
+        The number of threads for dispatching requests and reading files.
+
+    Returns
+    -------
+    None
+
+    Raises
+    ------
+    ImportError
+        If uvicorn is not installed.
+    """
+    try:
+        import uvicorn
+    except ImportError:
+        print("The ASGI mode requires uvicorn, which can be installed with 'pip install uvicorn'.")
+        raise
+
+    from asgi_server import AsgiApp
+
+    uvicorn.run(AsgiApp(server.app, threads, on_startup=server.start_job_workers), host=address, port=port)
+
+
 def main() -> None:
     """
     Parse command-line arguments and orchestrate mesh processing or server startup.
@@ -74,7 +109,7 @@ def main() -> None:
     This function:
         - Defines command-line arguments for directory, filename, patient ID, server address, and port.
         - Processes the mesh file if the required arguments (directory, filename, patient ID) are provided.
-        - Optionally starts the Flask-based server via waitress if the --startserver flag is used.
+        - Optionally starts the Flask-based server via waitress (or uvicorn with --asgi) if the --startserver flag is used.
 
     Returns
     -------
@@ -112,6 +147,16 @@ def main() -> None:
         help="The port to bind to."
     )
 
+    parser.add_argument(
+        "--asgi", action="store_true",
+        help="Serve the app through the ASGI entry point (requires uvicorn) instead of waitress."
+    )
+
+    parser.add_argument(
+        "--threads", type=int,
+        help="The number of worker threads of the server. Default is 4 for waitress."
+    )
+
     args = parser.parse_args()
 
     if args.directory and args.filename and args.patientid:
@@ -137,7 +182,15 @@ def main() -> None:
         try:
             print(f"Server starting at {args.address}:{args.port}...")
             print("The server can be terminated with CTRL + C.")
-            serve(server.app, host=args.address, port=args.port)
+            if args.asgi:
+                # The job workers are started by the ASGI lifespan
+                serve_asgi(args.address, args.port, args.threads)
+            elif args.threads:
+                server.start_job_workers()
+                serve(server.app, host=args.address, port=args.port, threads=args.threads)
+            else:
+                server.start_job_workers()
+                serve(server.app, host=args.address, port=args.port)
         except Exception:
             print(f"Failed to start the server at {args.address}:{args.port}")
             raise
@@ -1,4 +1,16 @@
-from .json_utils import load_json, save_json
+from .file_utils import write_bytes_atomic
+from .json_utils import load_json, save_json, save_json_batch, save_compressed_json, load_compressed_json, get_metadata_path
 from .time_utils import format_time
-from .database_helper import DATABASE_PATHS, SIMULATION_BASE, DATA_PATH, set_mesh_name, get_sim_mesh_path, get_sim_output_path
-# from .logging_utils import MultilineFormatter, CenteredFormatter, register_excepthook, unregister_excepthook
\ No newline at end of file
+from .database_helper import DATABASE_PATHS, SIMULATION_BASE, CODE_PATH, DATA_PATH, set_mesh_name, get_sim_mesh_path, get_sim_output_path, get_setting, KEEP_UNCOMPRESSED_JSON, WRITE_BINARY_ARTIFACTS
+from .artifact_cache import ArtifactCache, CachedArtifact
+from .content_encoding import ARTIFACT_ENCODINGS, ENCODING_SUFFIXES, get_encoded_path
+from .binary_format import pack_arrays, unpack_arrays, save_compressed_binary, tag_arrays
+from .job_queue import JobQueue, JOB_PRIORITIES, JOB_STATES, JOB_QUEUED, JOB_RUNNING, JOB_POST_PROCESSING, JOB_DONE, JOB_FAILED
+from .lease_store import LeaseStore
+from .slot_scheduler import SlotScheduler
+from .json_stream import save_json_stream, JsonValidator, UploadTooLargeError, UPLOAD_ENCODINGS, MAX_UPLOAD_SIZE
+from .metrics import MetricsRegistry, Counter, Gauge, Histogram, LATENCY_BUCKETS, SIZE_BUCKETS, DURATION_BUCKETS
+from .msh_header import read_msh_counts
+from .worker_pool import submit_worker_job, collect_worker_results, cancel_worker_jobs, count_pending_worker_jobs, requeue_stale_worker_jobs, get_live_workers, WORKER_QUEUE_PATH
+from .simulation_inputs import fingerprint_file, fingerprint_mesh, hash_simulation_inputs, load_simulation_inputs, save_simulation_inputs, PARAM_FILE_PATH
+# from .logging_utils import MultilineFormatter, CenteredFormatter, register_excepthook, unregister_excepthook
@@ -0,0 +1,206 @@
+"""
+In-memory cache for the compressed artifacts served by the REST server.
+
+The post-processing writes large `.zlib` files (3D meshes, ROI data) that are
+requested over and over again by the frontend. This module keeps recently
+used artifacts in memory, bounded by a total size in bytes, and evicts the
+least recently used ones first. Entries are invalidated as soon as the
+modification time or size of the file on disk changes.
+
+Every artifact is identified by a SHA-256 hash of its content, which the
+server uses as ETag for conditional requests.
+"""
+
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+# Block size used when hashing files that are streamed from disk
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Maximum number of files too large to be cached whose hashes are remembered
+MAX_UNCACHED_ENTRIES = 1024
+
+
+@dataclass(frozen=True)
+class CachedArtifact:
+    """
+    A single artifact held in memory.
+
+    Attributes
+    ----------
+    path : Path
+        The file the data was read from.
+    data : bytes or None
+        The raw file content, or None if the file is too large to be cached.
+    mtime_ns : int
+        Modification time of the file (in nanoseconds) when it was read.
+    size : int
+        Size of the file in bytes when it was read.
+    etag : str
+        SHA-256 hex digest of the file content.
+    """
+    path: Path
+    data: Optional[bytes]
+    mtime_ns: int
+    size: int
+    etag: str
+
+    @property
+    def mtime(self) -> float:
+        """Modification time of the file in seconds since the epoch."""
+        return self.mtime_ns / 1e9
+
+
+class ArtifactCache:
+    """
+    A thread-safe, size-bounded LRU cache of files.
+
+    Files larger than the cache itself are never stored; `get` returns an
+    artifact without data for them so the caller can stream them from disk
+    instead. Their hashes are still remembered (for the MAX_UNCACHED_ENTRIES
+    most recently requested files), so they are only computed once per
+    version of the file.
+
+    Parameters
+    ----------
+    max_bytes : int
+        The maximum total size of all cached files. 0 disables the cache.
+    """
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CachedArtifact]" = OrderedDict()
+        self._uncached: "OrderedDict[str, CachedArtifact]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, path: Path) -> CachedArtifact:
+        """
+        Return the content of `path`, reading it from disk if necessary.
+
+        Parameters
+        ----------
+        path : Path
+            A Path object pointing to the artifact.
+
+        Returns
+        -------
+        CachedArtifact
+            The cached artifact. Its `data` is None if the file is too large
+            to be cached.
+
+        Raises
+        ------
+        FileNotFoundError
+            If the file does not exist.
+        """
+        stat = path.stat()
+        key = str(path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return entry
+                # The file changed on disk since it was cached
+                self._remove(key)
+                self._invalidations += 1
+            self._misses += 1
+
+        if stat.st_size > self.max_bytes:
+            return self._get_uncached(path, stat)
+
+        data = path.read_bytes()
+        etag = hashlib.sha256(data).hexdigest()
+        entry = CachedArtifact(path, data, stat.st_mtime_ns, len(data), etag)
+
+        # Only keep the data if the file did not change while reading it
+        new_stat = path.stat()
+        if new_stat.st_mtime_ns != stat.st_mtime_ns or new_stat.st_size != len(data):
+            return entry
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._size += entry.size
+            while self._size > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self._evictions += 1
+
+        return entry
+
+    def _get_uncached(self, path: Path, stat) -> CachedArtifact:
+        """Return an artifact without data, hashing the file only if it changed."""
+        key = str(path)
+        with self._lock:
+            entry = self._uncached.get(key)
+            if entry is not None:
+                if entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                    self._uncached.move_to_end(key)
+                    return entry
+                # The file changed on disk, forget the hash of the old version
+                del self._uncached[key]
+
+        digest = hashlib.sha256()
+        with path.open("rb") as file:
+            for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+
+        entry = CachedArtifact(path, None, stat.st_mtime_ns, stat.st_size, digest.hexdigest())
+        with self._lock:
+            self._uncached[key] = entry
+            self._uncached.move_to_end(key)
+            while len(self._uncached) > MAX_UNCACHED_ENTRIES:
+                self._uncached.popitem(last=False)
+        return entry
+
+    def _remove(self, key: str) -> None:
+        """Remove an entry. The caller must hold the lock."""
+        entry = self._entries.pop(key)
+        self._size -= entry.size
+
+    def clear(self) -> None:
+        """
+        Remove all entries from the cache. The counters are kept.
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            self._entries.clear()
+            self._uncached.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        """
+        Return the current cache statistics.
+
+        Returns
+        -------
+        dict
+            A dict with the hit, miss, eviction and invalidation counts as
+            well as the number of entries and their total size in bytes.
+        """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
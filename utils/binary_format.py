@@ -0,0 +1,228 @@
+"""
+Binary container format for meshes and simulated fields.
+
+Serializing large meshes and fields with `.tolist()` and `json.dumps` is slow
+on the server and parsing them is slow in the browser. This module packs
+numpy arrays into a single binary blob that the frontend can map directly
+into typed arrays (Float32Array, Uint32Array).
+
+Layout (all integers little-endian)::
+
+    offset 0   : magic b"PTBA"
+    offset 4   : uint32 format version
+    offset 8   : uint32 length of the JSON header in bytes
+    offset 12  : UTF-8 JSON header
+    ...        : zero padding up to the next multiple of 8
+    ...        : array buffers, each starting at a multiple of 8
+
+The JSON header has the form::
+
+    {
+        "metadata": {...},
+        "arrays": [
+            {"name": "vertices", "dtype": "float32", "shape": [n, 3],
+             "offset": 4096, "nbytes": 12 * n},
+            ...
+        ]
+    }
+
+where `offset` is counted from the start of the blob.
+"""
+
+
+import json
+import struct
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+from .content_encoding import save_encoded_variants
+from .file_utils import write_bytes_atomic
+from .json_utils import save_metadata_sidecar
+
+#: Magic bytes at the start of every binary container
+BINARY_MAGIC = b"PTBA"
+
+#: Version of the binary container layout
+BINARY_FORMAT_VERSION = 1
+
+#: Alignment (in bytes) of the header end and of every array buffer
+BINARY_ALIGNMENT = 8
+
+#: Supported array types and their little-endian numpy dtypes
+BINARY_DTYPES = {
+    "float32": np.dtype("<f4"),
+    "uint32": np.dtype("<u4"),
+}
+
+
+def _padding(length: int) -> int:
+    """Return the number of bytes needed to pad `length` to BINARY_ALIGNMENT."""
+    return -length % BINARY_ALIGNMENT
+
+
+def pack_arrays(arrays: dict, metadata: dict) -> bytes:
+    """
+    Pack named arrays and JSON metadata into a binary container.
+
+    Parameters
+    ----------
+    arrays : dict
+        A dict mapping names (e.g. 'meshes/1002') to tuples (data, dtype), where
+        data is anything numpy can convert to an array and dtype is a key of
+        BINARY_DTYPES.
+    metadata : dict
+        JSON-serializable data describing the arrays (tags, descriptions, ...).
+
+    Returns
+    -------
+    bytes
+        The binary container.
+
+    Raises
+    ------
+    KeyError
+        If an unsupported dtype is requested.
+    """
+    buffers = []
+    entries = []
+    for name, (data, dtype) in arrays.items():
+        array = np.ascontiguousarray(data, dtype=BINARY_DTYPES[dtype])
+        buffers.append(array.tobytes())
+        entries.append({"name": name, "dtype": dtype, "shape": list(array.shape), "nbytes": array.nbytes})
+
+    # The offsets depend on the header length and vice versa, so the header is
+    # built with placeholder offsets first and padded generously
+    def build_header(start: int) -> bytes:
+        offset = start
+        for entry, buffer in zip(entries, buffers):
+            entry["offset"] = offset
+            offset += len(buffer) + _padding(len(buffer))
+        return json.dumps({"metadata": metadata, "arrays": entries}).encode()
+
+    prefix_size = len(BINARY_MAGIC) + 8
+    header = build_header(0)
+    while True:
+        start = prefix_size + len(header) + _padding(prefix_size + len(header))
+        new_header = build_header(start)
+        if len(new_header) <= len(header):
+            header = new_header + b" " * (len(header) - len(new_header))
+            break
+        header = new_header
+
+    parts = [BINARY_MAGIC, struct.pack("<II", BINARY_FORMAT_VERSION, len(header)), header]
+    parts.append(b"\0" * _padding(prefix_size + len(header)))
+    for buffer in buffers:
+        parts.append(buffer)
+        parts.append(b"\0" * _padding(len(buffer)))
+
+    return b"".join(parts)
+
+
+def unpack_arrays(blob: bytes) -> tuple:
+    """
+    Unpack a binary container created by pack_arrays().
+
+    Parameters
+    ----------
+    blob : bytes
+        The binary container.
+
+    Returns
+    -------
+    tuple
+        A tuple (arrays, metadata), where arrays maps names to numpy arrays.
+
+    Raises
+    ------
+    ValueError
+        If the blob is not a binary container of a supported version.
+    """
+    if blob[:len(BINARY_MAGIC)] != BINARY_MAGIC:
+        raise ValueError("Data is not a binary container.")
+
+    version, header_length = struct.unpack_from("<II", blob, len(BINARY_MAGIC))
+    if version != BINARY_FORMAT_VERSION:
+        raise ValueError(f"Unsupported binary container version {version}.")
+
+    header_start = len(BINARY_MAGIC) + 8
+    header = json.loads(blob[header_start:header_start + header_length])
+
+    arrays = {}
+    for entry in header["arrays"]:
+        array = np.frombuffer(
+            blob, dtype=BINARY_DTYPES[entry["dtype"]],
+            count=int(np.prod(entry["shape"], dtype=np.int64)), offset=entry["offset"]
+        )
+        arrays[entry["name"]] = array.reshape(entry["shape"])
+
+    return arrays, header["metadata"]
+
+
+def save_compressed_binary(arrays: dict, metadata: dict, compressed_path: Path) -> dict:
+    """
+    Save arrays as zlib-compressed binary container together with a metadata sidecar.
+
+    The pre-encoded variants for HTTP Content-Encoding are written as well.
+    As in save_compressed_json(), every file is replaced atomically and the
+    .bin.zlib file is published last.
+
+    Parameters
+    ----------
+    arrays : dict
+        A dict mapping names to tuples (data, dtype), see pack_arrays().
+    metadata : dict
+        JSON-serializable data describing the arrays.
+    compressed_path : Path
+        A Path object where the compressed container should be saved
+        (by convention ending in '.bin.zlib').
+
+    Returns
+    -------
+    dict
+        The metadata that was written to the sidecar.
+
+    Raises
+    ------
+    OSError
+        For any underlying I/O error.
+    """
+    blob = pack_arrays(arrays, metadata)
+    compressed = zlib.compress(blob)
+    try:
+        content_encodings = save_encoded_variants(blob, compressed_path)
+        metadata = save_metadata_sidecar(
+            compressed_path, blob, compressed, content_format="binary", content_encodings=content_encodings
+        )
+
+        write_bytes_atomic(compressed_path, compressed)
+        print(f"Successfully saved binary container to: {compressed_path}")
+    except OSError as e:
+        print(f"I/O error({e.errno}): {e.strerror}")
+        raise
+
+    return metadata
+
+
+def tag_arrays(prefix: str, tag_dict: dict, dtype: str) -> dict:
+    """
+    Convert a tag-based dictionary into named arrays for pack_arrays().
+
+    Tags without data (empty lists or dicts) are skipped.
+
+    Parameters
+    ----------
+    prefix : str
+        The prefix of the array names (e.g. 'meshes' results in 'meshes/1002').
+    tag_dict : dict
+        A dict mapping tags to lists of values.
+    dtype : str
+        A key of BINARY_DTYPES.
+
+    Returns
+    -------
+    dict
+        A dict mapping array names to tuples (data, dtype).
+    """
+    return {f"{prefix}/{tag}": (values, dtype) for tag, values in tag_dict.items() if len(values) > 0}
@@ -0,0 +1,131 @@
+"""
+Pre-encoded variants of the compressed artifacts for HTTP Content-Encoding.
+
+The `.zlib` artifacts have to be inflated by the client itself. Next to each
+artifact, the post-processing can also write the same content encoded with
+codecs browsers decode natively (gzip, brotli, zstd). The server then picks a
+variant according to the `Accept-Encoding` header of the client.
+
+The variants share the name of the artifact with a different suffix:
+
+    ..._compressed_3d_data.zlib -> ..._compressed_3d_data.gz / .br / .zst
+
+brotli (`brotli` package) and zstd (`zstandard` package) are optional; codecs
+whose package is not installed are skipped.
+"""
+
+
+import gzip
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .database_helper import get_setting
+from .file_utils import write_bytes_atomic
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+#: File suffixes of the pre-encoded variants, by HTTP content-coding
+ENCODING_SUFFIXES = {
+    "zstd": ".zst",
+    "br": ".br",
+    "gzip": ".gz",
+}
+
+
+def _compress_gzip(data: bytes) -> bytes:
+    """Encode data with gzip. mtime is fixed so equal content results in equal files."""
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def _compress_brotli(data: bytes) -> bytes:
+    """Encode data with brotli at a quality that is still fast for large meshes."""
+    return brotli.compress(data, quality=6)
+
+
+def _compress_zstd(data: bytes) -> bytes:
+    """Encode data with zstd."""
+    return zstandard.ZstdCompressor(level=10).compress(data)
+
+
+#: Available encoders, by HTTP content-coding
+ENCODERS = {"gzip": _compress_gzip}
+if brotli is not None:
+    ENCODERS["br"] = _compress_brotli
+if zstandard is not None:
+    ENCODERS["zstd"] = _compress_zstd
+
+#: The content-codings the post-processing writes next to each artifact (none unless configured)
+ARTIFACT_ENCODINGS = tuple(
+    encoding.strip() for encoding in get_setting("artifact_encodings", "").split(",")
+    if encoding.strip() in ENCODERS
+)
+
+
+def get_encoded_path(compressed_path: Path, encoding: str) -> Path:
+    """
+    Return the path of a pre-encoded variant of a compressed artifact.
+
+    Parameters
+    ----------
+    compressed_path : Path
+        A Path object pointing to the compressed artifact (e.g. '..._compressed_3d_data.zlib').
+    encoding : str
+        The HTTP content-coding, a key of ENCODING_SUFFIXES.
+
+    Returns
+    -------
+    Path
+        A Path object pointing to the variant (e.g. '..._compressed_3d_data.br').
+    """
+    return compressed_path.with_suffix(ENCODING_SUFFIXES[encoding])
+
+
+def save_encoded_variants(encoded: bytes, compressed_path: Path,
+                          encodings: Optional[Iterable[str]] = None) -> dict:
+    """
+    Save the pre-encoded variants of a compressed artifact.
+
+    Variants of codings that are not written (anymore) are removed, so the
+    server never sends a stale variant. Every variant replaces the previous
+    one atomically (see write_bytes_atomic).
+
+    Parameters
+    ----------
+    encoded : bytes
+        The uncompressed content of the artifact.
+    compressed_path : Path
+        A Path object pointing to the compressed artifact.
+    encodings : Iterable[str], optional
+        The content-codings to write. Defaults to ARTIFACT_ENCODINGS.
+
+    Returns
+    -------
+    dict
+        A dict mapping the written content-codings to the sizes of the variants.
+
+    Raises
+    ------
+    OSError
+        For any underlying I/O error.
+    """
+    encodings = ARTIFACT_ENCODINGS if encodings is None else tuple(encodings)
+
+    sizes = {}
+    for encoding in ENCODING_SUFFIXES:
+        path = get_encoded_path(compressed_path, encoding)
+        if encoding not in encodings or encoding not in ENCODERS:
+            path.unlink(missing_ok=True)
+            continue
+        variant = ENCODERS[encoding](encoded)
+        write_bytes_atomic(path, variant)
+        sizes[encoding] = len(variant)
+
+    return sizes
@@ -34,6 +34,32 @@ def set_mesh_name(mesh_name: str) -> None:
     global MESH_NAME
     MESH_NAME = mesh_name
 
+
+def get_setting(option: str, fallback: str) -> str:
+    """
+    Read an option from the [Settings] section of `config.ini`.
+
+    Parameters
+    ----------
+    option : str
+        The name of the option (e.g., 'artifact_cache_size').
+    fallback : str
+        The value to return if the option is missing or set to "default".
+
+    Returns
+    -------
+    str
+        The configured value, or `fallback`.
+    """
+    value = config.get("Settings", option, fallback="default").strip()
+    return fallback if value == "default" else value
+
+#: Whether the post-processing also writes the uncompressed JSON next to each .zlib artifact
+KEEP_UNCOMPRESSED_JSON = get_setting("keep_uncompressed_json", "true").lower() in ("true", "yes", "1")
+
+#: Whether the post-processing also writes the binary (typed-array) variant of each artifact
+WRITE_BINARY_ARTIFACTS = get_setting("write_binary_artifacts", "false").lower() in ("true", "yes", "1")
+
 # Data directory
 data_dir = config["Settings"]["data_dir"]
 if data_dir == "default":
@@ -0,0 +1,48 @@
+"""
+Atomic file writes for artifacts the server may read at the same time.
+"""
+
+
+import os
+import tempfile
+from pathlib import Path
+
+
+def write_bytes_atomic(file_path: Path, data: bytes) -> None:
+    """
+    Write bytes to a file so readers see either the old or the new content.
+
+    The data is written to a temporary file in the target directory, which
+    then replaces the file with os.replace().
+
+    Parameters
+    ----------
+    file_path : Path
+        A Path object where the file should be saved.
+    data : bytes
+        The content of the file.
+
+    Returns
+    -------
+    None
+
+    Raises
+    ------
+    OSError
+        For any underlying I/O error.
+    """
+    with tempfile.NamedTemporaryFile(
+        "wb", dir=file_path.parent, prefix=f".{file_path.name}.", suffix=".tmp", delete=False
+    ) as temp_file:
+        temp_name = temp_file.name
+        try:
+            temp_file.write(data)
+        except OSError:
+            temp_file.close()
+            Path(temp_name).unlink(missing_ok=True)
+            raise
+    try:
+        os.replace(temp_name, file_path)
+    except OSError:
+        Path(temp_name).unlink(missing_ok=True)
+        raise
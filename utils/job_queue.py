@@ -0,0 +1,392 @@
+"""
+Persistent queue of simulation jobs.
+
+Every request to run an ensemble of simulations becomes a job in a small
+SQLite database, so the jobs survive restarts of the server and their
+progress can be queried. The start and end of every stage are kept, so
+stage durations can be exported as metrics. A job moves through the states
+
+    queued -> running -> post-processing -> done
+                      \\-> failed          \\-> failed
+
+Queued jobs are claimed by priority (see JOB_PRIORITIES), and in the order of
+submission within a priority, so a small preview job does not wait behind a
+queue of batch studies. The time a job spent in the queue is recorded as its
+first stage (QUEUED_STAGE).
+
+The server claims queued jobs with a bounded number of worker threads, and
+run_docker_simulations.py reports the post-processing stage of its job.
+SQLite serializes the writers, so the queue can be shared by several threads
+and processes.
+"""
+
+
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .database_helper import DATABASE_PATHS
+
+#: Default location of the job database
+JOB_DATABASE_PATH = DATABASE_PATHS["main"] / "simulation_jobs.sqlite"
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_POST_PROCESSING = "post-processing"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+#: All job states, in the order a successful job passes through them
+JOB_STATES = (JOB_QUEUED, JOB_RUNNING, JOB_POST_PROCESSING, JOB_DONE, JOB_FAILED)
+
+#: States of jobs that are being worked on
+ACTIVE_JOB_STATES = (JOB_RUNNING, JOB_POST_PROCESSING)
+
+#: Priorities of jobs by name; jobs with a higher priority are claimed first
+JOB_PRIORITIES = {"batch": -1, "normal": 0, "preview": 1}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    patient_id TEXT NOT NULL,
+    config_id TEXT NOT NULL,
+    roi_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    exit_code INTEGER,
+    error TEXT,
+    stage TEXT,
+    priority INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, id);
+CREATE INDEX IF NOT EXISTS jobs_patient ON jobs (patient_id, id);
+CREATE TABLE IF NOT EXISTS job_stages (
+    job_id INTEGER NOT NULL,
+    stage TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS job_stages_job ON job_stages (job_id);
+"""
+
+#: Stage recorded for the simulations themselves, before post-processing starts
+SIMULATION_STAGE = "simulations"
+
+#: Stage recorded for the time a job waited in the queue before it was claimed
+QUEUED_STAGE = "queued"
+
+
+class JobQueue:
+    """
+    A persistent priority queue of simulation jobs stored in SQLite.
+
+    Every method opens its own connection, so a JobQueue can be used from
+    several threads at once.
+
+    Parameters
+    ----------
+    db_path : Path, optional
+        The SQLite database file. Defaults to JOB_DATABASE_PATH.
+    """
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = Path(db_path) if db_path is not None else JOB_DATABASE_PATH
+        with self._connect() as connection:
+            connection.executescript(_SCHEMA)
+            # Databases created before the stage column existed
+            columns = {row["name"] for row in connection.execute("PRAGMA table_info(jobs)")}
+            if "stage" not in columns:
+                connection.execute("ALTER TABLE jobs ADD COLUMN stage TEXT")
+            if "priority" not in columns:
+                connection.execute("ALTER TABLE jobs ADD COLUMN priority INTEGER NOT NULL DEFAULT 0")
+            connection.execute("CREATE INDEX IF NOT EXISTS jobs_priority ON jobs (state, priority DESC, id)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection in autocommit mode; transactions are started explicitly."""
+        connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    def submit(self, patient_id: str, config_id: str, roi_id: str, priority: int = 0) -> dict:
+        """
+        Add a new job to the end of the queue of its priority.
+
+        Parameters
+        ----------
+        patient_id : str
+            The patient ID.
+        config_id : str
+            The configuration ID.
+        roi_id : str
+            The ROI ID.
+        priority : int, optional
+            The priority of the job, one of the values of JOB_PRIORITIES (default 0, normal).
+
+        Returns
+        -------
+        dict
+            The new job (see get()).
+        """
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "INSERT INTO jobs (patient_id, config_id, roi_id, state, created_at, priority) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (patient_id, config_id, roi_id, JOB_QUEUED, time.time(), priority)
+            )
+            job_id = cursor.lastrowid
+        return self.get(job_id)
+
+    def claim_next(self) -> Optional[dict]:
+        """
+        Atomically take the oldest queued job of the highest priority and mark it as running.
+
+        The time the job waited in the queue is recorded as the finished
+        stage QUEUED_STAGE.
+
+        Returns
+        -------
+        dict or None
+            The claimed job, or None if no job is queued.
+        """
+        with self._connect() as connection:
+            # BEGIN IMMEDIATE takes the write lock before reading, so two
+            # workers can never claim the same job
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = connection.execute(
+                    "SELECT id, created_at FROM jobs WHERE state = ? ORDER BY priority DESC, id LIMIT 1", (JOB_QUEUED,)
+                ).fetchone()
+                if row is not None:
+                    now = time.time()
+                    connection.execute(
+                        "INSERT INTO job_stages (job_id, stage, started_at, finished_at) VALUES (?, ?, ?, ?)",
+                        (row["id"], QUEUED_STAGE, row["created_at"], now)
+                    )
+                    connection.execute(
+                        "UPDATE jobs SET state = ?, started_at = ?, stage = ? WHERE id = ?",
+                        (JOB_RUNNING, now, SIMULATION_STAGE, row["id"])
+                    )
+                    connection.execute(
+                        "INSERT INTO job_stages (job_id, stage, started_at) VALUES (?, ?, ?)",
+                        (row["id"], SIMULATION_STAGE, now)
+                    )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+        return self.get(row["id"]) if row is not None else None
+
+    def set_state(self, job_id: int, state: str, exit_code: Optional[int] = None,
+                  error: Optional[str] = None) -> bool:
+        """
+        Move an active job to a new state.
+
+        Jobs that are already done or failed are not changed, so a late update
+        of a job that was given up on does not revive it.
+
+        Parameters
+        ----------
+        job_id : int
+            The job ID.
+        state : str
+            The new state, one of JOB_STATES.
+        exit_code : int, optional
+            The exit code of the simulation process, for done or failed jobs.
+        error : str, optional
+            A description of the error, for failed jobs.
+
+        Returns
+        -------
+        bool
+            True if the job was updated.
+
+        Raises
+        ------
+        ValueError
+            If `state` is not a valid job state.
+        """
+        if state not in JOB_STATES:
+            raise ValueError(f"Unknown job state {state}.")
+
+        finished_at = time.time() if state in (JOB_DONE, JOB_FAILED) else None
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET state = ?, finished_at = ?, exit_code = ?, error = ? "
+                "WHERE id = ? AND state NOT IN (?, ?)",
+                (state, finished_at, exit_code, error, job_id, JOB_DONE, JOB_FAILED)
+            )
+            if cursor.rowcount > 0 and finished_at is not None:
+                self._finish_stage(connection, job_id, finished_at)
+            return cursor.rowcount > 0
+
+    @staticmethod
+    def _finish_stage(connection: sqlite3.Connection, job_id: int, finished_at: float) -> None:
+        """Record the end of the open stage of a job."""
+        connection.execute(
+            "UPDATE job_stages SET finished_at = ? WHERE job_id = ? AND finished_at IS NULL", (finished_at, job_id)
+        )
+
+    def set_stage(self, job_id: int, stage: str) -> bool:
+        """
+        Record the current step of an active job (e.g. a post-processing function).
+
+        The previous step of the job ends when the new one starts.
+
+        Parameters
+        ----------
+        job_id : int
+            The job ID.
+        stage : str
+            A short name of the step.
+
+        Returns
+        -------
+        bool
+            True if the job was updated.
+        """
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = connection.execute(
+                    "UPDATE jobs SET stage = ? WHERE id = ? AND state IN (?, ?)", (stage, job_id, *ACTIVE_JOB_STATES)
+                )
+                updated = cursor.rowcount > 0
+                if updated:
+                    self._finish_stage(connection, job_id, now)
+                    connection.execute(
+                        "INSERT INTO job_stages (job_id, stage, started_at) VALUES (?, ?, ?)", (job_id, stage, now)
+                    )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        return updated
+
+    def fail_interrupted(self, error: str) -> int:
+        """
+        Mark all active jobs as failed, e.g. after the server was restarted.
+
+        Parameters
+        ----------
+        error : str
+            A description of the error.
+
+        Returns
+        -------
+        int
+            The number of jobs that were marked as failed.
+        """
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE job_stages SET finished_at = ? WHERE finished_at IS NULL AND job_id IN "
+                "(SELECT id FROM jobs WHERE state IN (?, ?))", (now, *ACTIVE_JOB_STATES)
+            )
+            cursor = connection.execute(
+                "UPDATE jobs SET state = ?, finished_at = ?, error = ? WHERE state IN (?, ?)",
+                (JOB_FAILED, now, error, *ACTIVE_JOB_STATES)
+            )
+            return cursor.rowcount
+
+    def get(self, job_id: int) -> Optional[dict]:
+        """
+        Return a single job.
+
+        Parameters
+        ----------
+        job_id : int
+            The job ID.
+
+        Returns
+        -------
+        dict or None
+            A dict with the columns of the job (id, patient_id, config_id,
+            roi_id, state, created_at, started_at, finished_at, exit_code,
+            error, stage, priority) and queue_wait, the seconds the job waited
+            in the queue (so far, if it is still queued), or None if the job
+            does not exist.
+        """
+        with self._connect() as connection:
+            row = connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_job(row) if row is not None else None
+
+    @staticmethod
+    def _to_job(row: sqlite3.Row) -> dict:
+        """Convert a row of the jobs table to a job dict, adding its queue wait."""
+        job = dict(row)
+        started_at = job["started_at"] if job["started_at"] is not None else time.time()
+        job["queue_wait"] = started_at - job["created_at"]
+        return job
+
+    def list(self, patient_id: Optional[str] = None, state: Optional[str] = None) -> list:
+        """
+        Return all jobs, optionally filtered, newest first.
+
+        Parameters
+        ----------
+        patient_id : str, optional
+            Only return jobs of this patient.
+        state : str, optional
+            Only return jobs in this state.
+
+        Returns
+        -------
+        list
+            A list of job dicts (see get()).
+        """
+        query = "SELECT * FROM jobs"
+        conditions = []
+        parameters = []
+        if patient_id is not None:
+            conditions.append("patient_id = ?")
+            parameters.append(patient_id)
+        if state is not None:
+            conditions.append("state = ?")
+            parameters.append(state)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY id DESC"
+
+        with self._connect() as connection:
+            rows = connection.execute(query, parameters).fetchall()
+        return [self._to_job(row) for row in rows]
+
+    def count_by_state(self) -> dict:
+        """
+        Return the number of jobs in every state.
+
+        Returns
+        -------
+        dict
+            A dict mapping every state of JOB_STATES to its number of jobs.
+        """
+        with self._connect() as connection:
+            rows = connection.execute("SELECT state, COUNT(*) AS count FROM jobs GROUP BY state").fetchall()
+        counts = dict.fromkeys(JOB_STATES, 0)
+        counts.update({row["state"]: row["count"] for row in rows})
+        return counts
+
+    def stage_durations(self) -> list:
+        """
+        Return the durations of all finished stages.
+
+        Returns
+        -------
+        list
+            A list of (stage, seconds) tuples, oldest first.
+        """
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT stage, finished_at - started_at AS duration FROM job_stages "
+                "WHERE finished_at IS NOT NULL ORDER BY rowid"
+            ).fetchall()
+        return [(row["stage"], row["duration"]) for row in rows]
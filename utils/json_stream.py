@@ -0,0 +1,357 @@
+"""
+Streaming ingestion of JSON request bodies.
+
+Parsing an upload with `request.get_json()` and writing it again with
+save_json() keeps the raw body, the parsed objects and the serialized text in
+memory at the same time. For large uploads (e.g. interpolated fields of dense
+ROIs), save_json_stream() instead copies the body to the target file chunk by
+chunk while JsonValidator checks the syntax incrementally. Only one chunk is
+held in memory, and the target file is replaced atomically once the whole
+body has been validated, so readers never see a partial upload.
+
+Bodies may be sent with `Content-Encoding: gzip` or `deflate`; they are
+decompressed on the fly and stored uncompressed.
+"""
+
+
+import codecs
+import os
+import re
+import tempfile
+import zlib
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+from .database_helper import get_setting
+
+#: Size of the chunks (in bytes) read from the request body
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+#: Maximum size (in bytes) of a decompressed upload
+MAX_UPLOAD_SIZE = int(get_setting("max_upload_size", "2048")) * 1024 * 1024
+
+#: Window bits of the zlib decompressor, by HTTP content-coding of the request body
+UPLOAD_ENCODINGS = {
+    "identity": None,
+    "gzip": 16 + zlib.MAX_WBITS,
+    "x-gzip": 16 + zlib.MAX_WBITS,
+    "deflate": zlib.MAX_WBITS,
+}
+
+_WHITESPACE = re.compile(rb"[ \t\n\r]*")
+_STRING_CONTENT = re.compile(rb'[^"\\\x00-\x1f]*')
+_ESCAPE = re.compile(rb'\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4})')
+_NUMBER_CHARACTERS = re.compile(rb"[-+0-9.eE]*")
+_LITERALS = {ord("t"): b"true", ord("f"): b"false", ord("n"): b"null"}
+
+# Fast paths for the bulk of the uploads, lists of numbers and of number
+# arrays (e.g. [[x, y, z], ...]), which are matched in one regex call instead
+# of token by token
+_NUMBER_PATTERN = rb"-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?"
+_NUMBER_ARRAY_PATTERN = rb"\[[ \t\n\r]*(?:%s[ \t\n\r]*,[ \t\n\r]*)*%s[ \t\n\r]*\]" % (_NUMBER_PATTERN, _NUMBER_PATTERN)
+_NUMBER_ARRAY = re.compile(_NUMBER_ARRAY_PATTERN)
+_ELEMENT_RUN = re.compile(rb"(?:[ \t\n\r]*(?:%s|%s)[ \t\n\r]*,)+" % (_NUMBER_PATTERN, _NUMBER_ARRAY_PATTERN))
+_NUMBER = re.compile(_NUMBER_PATTERN)
+
+# What the validator expects next
+_VALUE = "value"
+_VALUE_OR_END = "value or ']'"
+_KEY = "key"
+_KEY_OR_END = "key or '}'"
+_COLON = "':'"
+_COMMA_OR_END = "',' or end of container"
+_DONE = "end of document"
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when a decompressed upload exceeds the maximum upload size."""
+
+
+class JsonValidator:
+    """
+    Incremental syntax check of a JSON document split into chunks.
+
+    The document is checked as it is fed, without building any objects.
+    Tokens may be split across chunks at any position; only the incomplete
+    token at the end of a chunk (at most one number, literal or escape
+    sequence) is kept until the next chunk arrives.
+
+    Examples
+    --------
+    >>> validator = JsonValidator()
+    >>> validator.feed(b'{"Bounds": [[0, 1')
+    >>> validator.feed(b'], [2, 3]]}')
+    >>> validator.close()
+    """
+    def __init__(self):
+        self._stack = []
+        self._expect = _VALUE
+        self._in_string = False
+        self._string_is_key = False
+        self._pending = b""
+        self._offset = 0
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+
+    def _error(self, message: str, position: int) -> ValueError:
+        """Build the error for an invalid document at `position` of the current data."""
+        return ValueError(f"Invalid JSON at byte {self._offset + position}: {message}.")
+
+    def _end_value(self) -> None:
+        """Update the expectation after a complete value."""
+        self._expect = _COMMA_OR_END if self._stack else _DONE
+
+    def feed(self, chunk: bytes, final: bool = False) -> None:
+        """
+        Check the next chunk of the document.
+
+        Parameters
+        ----------
+        chunk : bytes
+            The next bytes of the document.
+        final : bool, optional
+            True if no more data follows, so incomplete tokens are errors.
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        ValueError
+            If the document is not valid JSON.
+        """
+        try:
+            self._utf8.decode(chunk, final)
+        except UnicodeDecodeError as e:
+            raise ValueError(f"Invalid UTF-8 in JSON document. {str(e)}") from None
+
+        data = self._pending + chunk
+        self._pending = b""
+        position = 0
+        end = len(data)
+
+        while position < end:
+            if self._in_string:
+                position = _STRING_CONTENT.match(data, position).end()
+                if position == end:
+                    break
+                character = data[position]
+                if character == ord('"'):
+                    position += 1
+                    self._in_string = False
+                    if self._string_is_key:
+                        self._expect = _COLON
+                    else:
+                        self._end_value()
+                elif character == ord("\\"):
+                    match = _ESCAPE.match(data, position)
+                    if match is not None:
+                        position = match.end()
+                    elif not final and end - position < 6:
+                        self._pending = data[position:]
+                        position = end
+                    else:
+                        raise self._error("invalid escape sequence", position)
+                else:
+                    raise self._error("control character in string", position)
+                continue
+
+            position = _WHITESPACE.match(data, position).end()
+            if position == end:
+                break
+            character = data[position]
+
+            if self._expect in (_VALUE, _VALUE_OR_END):
+                if self._stack and self._stack[-1] == ord("["):
+                    # Complete elements followed by a comma cannot be cut by the chunk boundary
+                    match = _ELEMENT_RUN.match(data, position)
+                    if match is not None:
+                        position = match.end()
+                        self._expect = _VALUE
+                        continue
+                if character == ord("["):
+                    match = _NUMBER_ARRAY.match(data, position)
+                    if match is not None:
+                        position = match.end()
+                        self._end_value()
+                        continue
+
+                if character == ord("]") and self._expect == _VALUE_OR_END:
+                    self._stack.pop()
+                    self._end_value()
+                    position += 1
+                elif character == ord("{"):
+                    self._stack.append(ord("{"))
+                    self._expect = _KEY_OR_END
+                    position += 1
+                elif character == ord("["):
+                    self._stack.append(ord("["))
+                    self._expect = _VALUE_OR_END
+                    position += 1
+                elif character == ord('"'):
+                    self._in_string = True
+                    self._string_is_key = False
+                    position += 1
+                elif character == ord("-") or ord("0") <= character <= ord("9"):
+                    number_end = _NUMBER_CHARACTERS.match(data, position).end()
+                    if number_end == end and not final:
+                        self._pending = data[position:]
+                        position = end
+                        continue
+                    if _NUMBER.fullmatch(data, position, number_end) is None:
+                        raise self._error("invalid number", position)
+                    position = number_end
+                    self._end_value()
+                elif character in _LITERALS:
+                    literal = _LITERALS[character]
+                    if data.startswith(literal, position):
+                        position += len(literal)
+                        self._end_value()
+                    elif not final and literal.startswith(data[position:]):
+                        self._pending = data[position:]
+                        position = end
+                    else:
+                        raise self._error("invalid literal", position)
+                else:
+                    raise self._error(f"expected {self._expect}", position)
+
+            elif self._expect in (_KEY, _KEY_OR_END):
+                if character == ord('"'):
+                    self._in_string = True
+                    self._string_is_key = True
+                    position += 1
+                elif character == ord("}") and self._expect == _KEY_OR_END:
+                    self._stack.pop()
+                    self._end_value()
+                    position += 1
+                else:
+                    raise self._error(f"expected {self._expect}", position)
+
+            elif self._expect == _COLON:
+                if character != ord(":"):
+                    raise self._error(f"expected {self._expect}", position)
+                self._expect = _VALUE
+                position += 1
+
+            elif self._expect == _COMMA_OR_END:
+                container = self._stack[-1]
+                if character == ord(","):
+                    self._expect = _KEY if container == ord("{") else _VALUE
+                elif character == container + 2:
+                    # '}' and ']' follow '{' and '[' two code points later
+                    self._stack.pop()
+                    self._end_value()
+                else:
+                    raise self._error(f"expected {self._expect}", position)
+                position += 1
+
+            else:
+                raise self._error("data after the end of the document", position)
+
+        self._offset += end - len(self._pending)
+
+    def close(self) -> None:
+        """
+        Check that the document is complete.
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        ValueError
+            If the document is incomplete or not valid JSON.
+        """
+        self.feed(b"", final=True)
+        if self._in_string or self._expect != _DONE:
+            raise self._error("unexpected end of document", 0)
+
+
+def _decode_chunks(stream: BinaryIO, content_encoding: str, chunk_size: int) -> Iterator[bytes]:
+    """Read `stream` in chunks and decompress them according to `content_encoding`."""
+    wbits = UPLOAD_ENCODINGS[content_encoding]
+    decompressor = zlib.decompressobj(wbits) if wbits is not None else None
+
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        if decompressor is None:
+            yield chunk
+            continue
+        try:
+            # max_length bounds the memory used for highly compressed chunks
+            data = chunk
+            while data:
+                yield decompressor.decompress(data, chunk_size)
+                data = decompressor.unconsumed_tail
+        except zlib.error as e:
+            raise ValueError(f"Invalid {content_encoding} request body. {str(e)}") from None
+
+    if decompressor is not None and not decompressor.eof:
+        raise ValueError(f"Truncated {content_encoding} request body.")
+
+
+def save_json_stream(stream: BinaryIO, file_path: Path, content_encoding: Optional[str] = None,
+                     max_size: int = MAX_UPLOAD_SIZE, chunk_size: int = UPLOAD_CHUNK_SIZE) -> int:
+    """
+    Validate a JSON document read from a stream and save it at the specified file path.
+
+    The document is written to a temporary file next to `file_path` and moved
+    into place only after it has been read and validated completely; an
+    invalid or interrupted upload leaves an existing file untouched.
+
+    Parameters
+    ----------
+    stream : BinaryIO
+        A file-like object with the document, e.g. `request.stream`.
+    file_path : Path
+        A Path object where the JSON file should be saved.
+    content_encoding : str, optional
+        The content-coding of the stream, a key of UPLOAD_ENCODINGS. Defaults to 'identity'.
+    max_size : int, optional
+        The maximum size of the decompressed document in bytes. Defaults to MAX_UPLOAD_SIZE.
+    chunk_size : int, optional
+        The size of the chunks read from the stream. Defaults to UPLOAD_CHUNK_SIZE.
+
+    Returns
+    -------
+    int
+        The size of the saved document in bytes.
+
+    Raises
+    ------
+    UploadTooLargeError
+        If the decompressed document is larger than `max_size`.
+    ValueError
+        If the content-coding is not supported, the body cannot be
+        decompressed or the document is not valid JSON.
+    OSError
+        For any underlying I/O error.
+    """
+    content_encoding = (content_encoding or "identity").strip().lower()
+    if content_encoding not in UPLOAD_ENCODINGS:
+        raise ValueError(f"Unsupported request Content-Encoding: {content_encoding}")
+
+    validator = JsonValidator()
+    size = 0
+    temp_file = tempfile.NamedTemporaryFile(
+        dir=file_path.parent, prefix=f".{file_path.name}.", suffix=".tmp", delete=False
+    )
+    try:
+        with temp_file:
+            for chunk in _decode_chunks(stream, content_encoding, chunk_size):
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLargeError(f"Upload exceeds the maximum size of {max_size} bytes.")
+                validator.feed(chunk)
+                temp_file.write(chunk)
+            validator.close()
+        os.replace(temp_file.name, file_path)
+    except BaseException:
+        Path(temp_file.name).unlink(missing_ok=True)
+        raise
+
+    print(f"Successfully saved JSON to: {file_path}")
+    return size
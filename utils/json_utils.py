@@ -1,6 +1,16 @@
+import hashlib
 import json
+import os
+import tempfile
+import zlib
 from pathlib import Path
-from typing import Any
+from typing import Any, Optional
+
+from .content_encoding import save_encoded_variants
+from .file_utils import write_bytes_atomic
+
+#: Version of the layout of the compressed artifacts and their metadata sidecars
+ARTIFACT_FORMAT_VERSION = 1
 
 def load_json(file_path: Path) -> dict:
     """
@@ -70,4 +80,214 @@ def save_json(data: Any, file_path: Path) -> None:
         raise
     except OSError as e:
         print(f"I/O error({e.errno}): {e.strerror}")
-        raise
\ No newline at end of file
+        raise
+
+
+def save_json_batch(files: dict) -> None:
+    """
+    Save several objects as JSON files, all or none of them.
+
+    Every file is first written to a temporary file in its target directory.
+    Only when all of them were written, they are moved into place with
+    os.replace(), so a serialization or I/O error leaves all existing files
+    untouched and readers never see a partially written file.
+
+    Parameters
+    ----------
+    files : dict
+        A dict mapping Path objects of the JSON files to the objects to save.
+
+    Returns
+    -------
+    None
+
+    Raises
+    ------
+    TypeError
+        If one of the objects is not JSON-serializable.
+    OSError
+        For any underlying I/O error.
+    """
+    staged = []
+    try:
+        for file_path, data in files.items():
+            with tempfile.NamedTemporaryFile(
+                "w", dir=file_path.parent, prefix=f".{file_path.name}.", suffix=".tmp", delete=False
+            ) as temp_file:
+                staged.append((temp_file.name, file_path))
+                json.dump(data, temp_file)
+        for temp_name, file_path in staged:
+            os.replace(temp_name, file_path)
+    except (TypeError, ValueError, OSError) as e:
+        print(f"Unable to save JSON batch: {e}")
+        for temp_name, _ in staged:
+            Path(temp_name).unlink(missing_ok=True)
+        raise
+
+    print(f"Successfully saved {len(staged)} JSON files")
+
+
+def get_metadata_path(compressed_path: Path) -> Path:
+    """
+    Return the path of the metadata sidecar belonging to a compressed artifact.
+
+    Parameters
+    ----------
+    compressed_path : Path
+        A Path object pointing to the compressed artifact (e.g. '..._compressed_3d_data.zlib').
+
+    Returns
+    -------
+    Path
+        A Path object pointing to the sidecar (e.g. '..._compressed_3d_data.meta.json').
+    """
+    return compressed_path.with_suffix(".meta.json")
+
+
+def save_metadata_sidecar(compressed_path: Path, encoded: bytes, compressed: bytes,
+                          content_format: str = "json", content_encodings: Optional[dict] = None) -> dict:
+    """
+    Save the metadata sidecar of a compressed artifact.
+
+    The sidecar replaces the previous one atomically.
+
+    Parameters
+    ----------
+    compressed_path : Path
+        A Path object pointing to the compressed artifact.
+    encoded : bytes
+        The uncompressed content of the artifact.
+    compressed : bytes
+        The compressed content of the artifact.
+    content_format : str, optional
+        The format of the uncompressed content, "json" (default) or "binary".
+    content_encodings : dict, optional
+        The sizes of the pre-encoded variants, by content-coding (see
+        utils.content_encoding.save_encoded_variants).
+
+    Returns
+    -------
+    dict
+        The metadata that was written to the sidecar.
+    """
+    metadata = {
+        "format_version": ARTIFACT_FORMAT_VERSION,
+        "content_format": content_format,
+        "encoding": "zlib",
+        "decompressed_size": len(encoded),
+        "compressed_size": len(compressed),
+        "sha256": hashlib.sha256(encoded).hexdigest(),
+        "content_encodings": content_encodings or {},
+    }
+    write_bytes_atomic(get_metadata_path(compressed_path), json.dumps(metadata).encode())
+    print(f"Successfully saved JSON to: {get_metadata_path(compressed_path)}")
+
+    return metadata
+
+
+def save_compressed_json(data: Any, compressed_path: Path, json_path: Optional[Path] = None,
+                         keep_json: bool = True) -> dict:
+    """
+    Save data as zlib-compressed JSON together with a small metadata sidecar.
+
+    The data is serialized only once. The sidecar stores the size and SHA-256
+    hash of the uncompressed JSON and the format version, so the uncompressed
+    file does not have to exist to answer questions about it. The pre-encoded
+    variants for HTTP Content-Encoding (gzip, br, zstd) are written as well.
+
+    The server reads the artifact while the post-processing overwrites it, so
+    every file is written to a temporary file and moved into place. The
+    variants, the sidecar and the uncompressed JSON are published first and
+    the .zlib file last; a stale uncompressed JSON is only removed once the
+    new .zlib file exists.
+
+    Parameters
+    ----------
+    data : Any
+        A Python object (e.g., dict or list) to be serialized as JSON.
+    compressed_path : Path
+        A Path object where the compressed .zlib file should be saved.
+    json_path : Path, optional
+        A Path object where the uncompressed JSON file belongs.
+    keep_json : bool, optional
+        If True (default), the uncompressed JSON is written to `json_path`.
+        If False, it is skipped and any stale file at `json_path` is removed.
+
+    Returns
+    -------
+    dict
+        The metadata that was written to the sidecar.
+
+    Raises
+    ------
+    TypeError
+        If `data` is not JSON-serializable.
+    OSError
+        For any underlying I/O error.
+    """
+    try:
+        encoded = json.dumps(data).encode()
+        compressed = zlib.compress(encoded)
+
+        content_encodings = save_encoded_variants(encoded, compressed_path)
+        metadata = save_metadata_sidecar(compressed_path, encoded, compressed, content_encodings=content_encodings)
+
+        if json_path is not None and keep_json:
+            write_bytes_atomic(json_path, encoded)
+            print(f"Successfully saved JSON to: {json_path}")
+
+        write_bytes_atomic(compressed_path, compressed)
+        print(f"Successfully compressed to zlib in: {compressed_path}")
+
+        if json_path is not None and not keep_json:
+            json_path.unlink(missing_ok=True)
+    except TypeError as e:
+        print(f"Data provided is not JSON serializable: {e}")
+        raise
+    except OSError as e:
+        print(f"I/O error({e.errno}): {e.strerror}")
+        raise
+
+    return metadata
+
+
+def load_compressed_json(compressed_path: Path, json_path: Optional[Path] = None) -> Any:
+    """
+    Load JSON content from a compressed artifact.
+
+    If the uncompressed JSON file exists, it is read instead, as that avoids
+    the decompression.
+
+    Parameters
+    ----------
+    compressed_path : Path
+        A Path object pointing to the compressed .zlib file.
+    json_path : Path, optional
+        A Path object pointing to the uncompressed JSON file, if one may exist.
+
+    Returns
+    -------
+    Any
+        The parsed JSON data.
+
+    Raises
+    ------
+    FileNotFoundError
+        If neither file exists.
+    zlib.error
+        If the compressed file is corrupted.
+    """
+    if json_path is not None and json_path.exists():
+        return load_json(json_path)
+
+    print(f"Loading: {compressed_path}")
+    try:
+        data = json.loads(zlib.decompress(compressed_path.read_bytes()))
+        print(f"Successfully read compressed JSON data from: {compressed_path}")
+        return data
+    except FileNotFoundError as e:
+        print(f"File not found: {compressed_path}\nError: {e}")
+        raise
+    except zlib.error as e:
+        print(f"Invalid zlib data in file: {compressed_path}\nError: {e}")
+        raise
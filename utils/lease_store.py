@@ -0,0 +1,182 @@
+"""
+Process-safe leases with expiry, stored in SQLite.
+
+A lease grants one holder exclusive use of a key (e.g. a patient ID) until it
+expires or is released. All operations are single SQLite transactions, so
+leases can be taken concurrently from several threads and processes without
+two of them succeeding for the same key. Holders renew their lease while they
+are working; if a holder dies, its lease expires and the key becomes free
+again.
+"""
+
+
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .job_queue import JOB_DATABASE_PATH
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    acquired_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class LeaseStore:
+    """
+    A table of leases with expiry.
+
+    Every method opens its own connection, so a LeaseStore can be used from
+    several threads at once.
+
+    Parameters
+    ----------
+    db_path : Path, optional
+        The SQLite database file. Defaults to the database of the job queue.
+    """
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = Path(db_path) if db_path is not None else JOB_DATABASE_PATH
+        with self._connect() as connection:
+            connection.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection in autocommit mode; transactions are started explicitly."""
+        connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    def acquire(self, key: str, holder: str, ttl: float) -> bool:
+        """
+        Take the lease of `key` if it is free, expired or already held by `holder`.
+
+        Parameters
+        ----------
+        key : str
+            The key to lease, e.g. a patient ID.
+        holder : str
+            An identifier of the holder.
+        ttl : float
+            Seconds until the lease expires unless it is renewed.
+
+        Returns
+        -------
+        bool
+            True if `holder` holds the lease now.
+        """
+        now = time.time()
+        with self._connect() as connection:
+            # BEGIN IMMEDIATE takes the write lock before reading, so two
+            # callers can never both see the key as free
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = connection.execute("SELECT holder, expires_at FROM leases WHERE key = ?", (key,)).fetchone()
+                acquired = row is None or row["expires_at"] <= now or row["holder"] == holder
+                if acquired:
+                    connection.execute(
+                        "INSERT OR REPLACE INTO leases (key, holder, acquired_at, expires_at) VALUES (?, ?, ?, ?)",
+                        (key, holder, now, now + ttl)
+                    )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        return acquired
+
+    def renew(self, key: str, holder: str, ttl: float) -> bool:
+        """
+        Extend the lease of `key`, if `holder` still holds it.
+
+        Parameters
+        ----------
+        key : str
+            The leased key.
+        holder : str
+            The identifier of the holder.
+        ttl : float
+            Seconds from now until the lease expires.
+
+        Returns
+        -------
+        bool
+            True if the lease was extended.
+        """
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "UPDATE leases SET expires_at = ? WHERE key = ? AND holder = ?", (time.time() + ttl, key, holder)
+            )
+            return cursor.rowcount > 0
+
+    def transfer(self, key: str, holder: str, new_holder: str) -> bool:
+        """
+        Hand the lease of `key` over to another holder, keeping its expiry.
+
+        Parameters
+        ----------
+        key : str
+            The leased key.
+        holder : str
+            The identifier of the current holder.
+        new_holder : str
+            The identifier of the new holder.
+
+        Returns
+        -------
+        bool
+            True if the lease was handed over.
+        """
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "UPDATE leases SET holder = ? WHERE key = ? AND holder = ?", (new_holder, key, holder)
+            )
+            return cursor.rowcount > 0
+
+    def release(self, key: str, holder: str) -> bool:
+        """
+        Give up the lease of `key`, if `holder` holds it.
+
+        Parameters
+        ----------
+        key : str
+            The leased key.
+        holder : str
+            The identifier of the holder.
+
+        Returns
+        -------
+        bool
+            True if the lease was released.
+        """
+        with self._connect() as connection:
+            cursor = connection.execute("DELETE FROM leases WHERE key = ? AND holder = ?", (key, holder))
+            return cursor.rowcount > 0
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Return the current lease of `key`.
+
+        Parameters
+        ----------
+        key : str
+            The leased key.
+
+        Returns
+        -------
+        dict or None
+            A dict with key, holder, acquired_at and expires_at, or None if the
+            key is not leased or the lease has expired.
+        """
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT * FROM leases WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return dict(row) if row is not None else None
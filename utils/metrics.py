@@ -0,0 +1,283 @@
+"""
+Minimal metrics in the Prometheus text exposition format.
+
+The server records counters, gauges and histograms in a MetricsRegistry and
+serves MetricsRegistry.render() at `/metrics`, where a local Prometheus (or
+any other scraper understanding the text format) can read them. Values that
+already exist elsewhere (cache statistics, job counts) are not duplicated;
+collectors registered with MetricsRegistry.add_collector() build them at
+scrape time.
+
+No client library is needed; only the parts of the format the server uses
+are implemented.
+"""
+
+
+import math
+import threading
+from typing import Callable, Iterable, Optional
+
+#: Default histogram buckets for request latencies in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+#: Default histogram buckets for response sizes in bytes
+SIZE_BUCKETS = tuple(float(4 ** exponent) for exponent in range(4, 15))
+
+#: Default histogram buckets for post-processing stage durations in seconds
+DURATION_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0, 7200.0, 14400.0)
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value, including the special values of the format."""
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape_label_value(value: str) -> str:
+    """Escape backslashes, double quotes and line feeds in a label value."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict) -> str:
+    """Format a label set as '{name="value",...}', or '' without labels."""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(str(value))}"' for name, value in labels.items()) + "}"
+
+
+class _Metric:
+    """
+    Base class of all metrics: a name, a help text and values per label set.
+
+    Parameters
+    ----------
+    name : str
+        The metric name, e.g. 'planningtool_http_requests_total'.
+    documentation : str
+        The help text.
+    labelnames : Iterable[str], optional
+        The names of the labels every sample has.
+    """
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        """Return the label values in the order of `labelnames`."""
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects the labels {self.labelnames}, got {tuple(labels)}.")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> Iterable[tuple]:
+        """Yield (suffix, labels, value) for every sample."""
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield "", dict(zip(self.labelnames, key)), value
+
+    def render(self) -> str:
+        """
+        Render the metric in the text exposition format.
+
+        Returns
+        -------
+        str
+            The HELP and TYPE lines followed by one line per sample.
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        for suffix, labels, value in self._samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class Counter(_Metric):
+    """A value that only increases, e.g. the number of requests."""
+    metric_type = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """
+        Increase the counter of a label set.
+
+        Parameters
+        ----------
+        amount : float, optional
+            The non-negative amount to add (default 1).
+        **labels
+            The label values.
+
+        Returns
+        -------
+        None
+        """
+        if amount < 0:
+            raise ValueError("Counters can only increase.")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """A value that can go up and down, e.g. the number of requests in flight."""
+    metric_type = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        """
+        Set the gauge of a label set.
+
+        Parameters
+        ----------
+        value : float
+            The new value.
+        **labels
+            The label values.
+
+        Returns
+        -------
+        None
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Increase the gauge of a label set by `amount` (default 1)."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        """Decrease the gauge of a label set by `amount` (default 1)."""
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """
+    The distribution of observed values in cumulative buckets, e.g. request latencies.
+
+    Parameters
+    ----------
+    name : str
+        The metric name.
+    documentation : str
+        The help text.
+    labelnames : Iterable[str], optional
+        The names of the labels every sample has.
+    buckets : Iterable[float], optional
+        The upper bounds of the buckets. +Inf is added automatically.
+    """
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels) -> None:
+        """
+        Record an observation.
+
+        Parameters
+        ----------
+        value : float
+            The observed value.
+        **labels
+            The label values.
+
+        Returns
+        -------
+        None
+        """
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def _samples(self) -> Iterable[tuple]:
+        with self._lock:
+            items = [(key, (list(counts), total)) for key, (counts, total) in self._values.items()]
+        for key, (counts, total) in items:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield "_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield "_sum", labels, total
+            yield "_count", labels, cumulative
+
+
+class MetricsRegistry:
+    """
+    A collection of metrics rendered together.
+
+    Metrics created with counter(), gauge() and histogram() are kept for the
+    lifetime of the registry. Collectors are called on every render() and
+    return metrics built from the current state of the server.
+    """
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Add a metric to the registry and return it."""
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        """Create and register a Counter."""
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        """Create and register a Gauge."""
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Optional[Iterable[float]] = None) -> Histogram:
+        """Create and register a Histogram."""
+        return self.register(Histogram(name, documentation, labelnames, buckets or LATENCY_BUCKETS))
+
+    def add_collector(self, collector: Callable[[], Iterable[_Metric]]) -> None:
+        """
+        Register a function that returns metrics at scrape time.
+
+        Exceptions raised by the collector are printed and its metrics are
+        skipped, so one failing source does not break the endpoint.
+
+        Parameters
+        ----------
+        collector : Callable
+            A function without arguments returning an iterable of metrics.
+
+        Returns
+        -------
+        None
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        Render all metrics in the text exposition format.
+
+        Returns
+        -------
+        str
+            The text served at `/metrics`.
+        """
+        metrics = list(self._metrics)
+        for collector in self._collectors:
+            try:
+                metrics.extend(collector())
+            except Exception as e:
+                print(f"Unable to collect metrics from {getattr(collector, '__name__', collector)}. {str(e)}")
+        return "".join(metric.render() for metric in metrics)
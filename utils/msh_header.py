@@ -0,0 +1,97 @@
+"""
+Read the node and element counts of a Gmsh .msh file without loading it.
+
+The memory a SimNIBS simulation needs grows with the size of the head mesh.
+Reading the whole mesh with simnibs just to count its nodes and elements
+would itself take several GB, so read_msh_counts() only reads the section
+headers of the file. For binary files of format version 2, the node block is
+skipped with a single seek; otherwise the file is scanned in chunks for the
+start of the element section.
+
+Both format versions 2.x (SimNIBS) and 4.x, ASCII and binary, are supported.
+"""
+
+
+from pathlib import Path
+from typing import BinaryIO
+
+# Size of the chunks read while searching for a section
+_SCAN_CHUNK_SIZE = 16 * 1024 * 1024
+
+
+def _read_line(file: BinaryIO) -> bytes:
+    """Read the next non-empty line, stripped. Raises ValueError at the end of the file."""
+    while True:
+        line = file.readline()
+        if not line:
+            raise ValueError("Unexpected end of .msh file.")
+        line = line.strip()
+        if line:
+            return line
+
+
+def _seek_section(file: BinaryIO, name: bytes) -> None:
+    """Move the file position behind the line starting section `name` (e.g. b'$Elements')."""
+    marker = b"\n" + name
+    overlap = len(marker)
+    buffer = b""
+    while True:
+        chunk = file.read(_SCAN_CHUNK_SIZE)
+        if not chunk:
+            raise ValueError(f"Section {name.decode()} not found in .msh file.")
+        buffer = buffer[-overlap:] + chunk
+        start = file.tell() - len(buffer)
+        index = buffer.find(marker)
+        if index >= 0:
+            file.seek(start + index + len(marker))
+            file.readline()
+            return
+
+
+def _read_count(line: bytes, major_version: int) -> int:
+    """Return the entity count of the first line of a $Nodes or $Elements section."""
+    fields = line.split()
+    # Version 4: numEntityBlocks numNodes/numElements minTag maxTag
+    return int(fields[1] if major_version >= 4 else fields[0])
+
+
+def read_msh_counts(mesh_path: Path) -> tuple:
+    """
+    Return the number of nodes and elements of a .msh file.
+
+    Parameters
+    ----------
+    mesh_path : Path
+        A Path object pointing to the .msh file.
+
+    Returns
+    -------
+    tuple
+        (number of nodes, number of elements).
+
+    Raises
+    ------
+    FileNotFoundError
+        If the file does not exist.
+    ValueError
+        If the file is not a valid .msh file.
+    OSError
+        For any underlying I/O error.
+    """
+    with open(mesh_path, "rb") as file:
+        if _read_line(file) != b"$MeshFormat":
+            raise ValueError(f"{mesh_path} is not a .msh file.")
+        version, file_type, data_size = _read_line(file).split()[:3]
+        major_version = int(float(version))
+        binary = file_type == b"1"
+
+        _seek_section(file, b"$Nodes")
+        nodes = _read_count(_read_line(file), major_version)
+
+        if binary and major_version == 2:
+            # Every node is an int tag followed by three coordinates
+            file.seek(nodes * (4 + 3 * int(data_size)), 1)
+        _seek_section(file, b"$Elements")
+        elements = _read_count(_read_line(file), major_version)
+
+    return nodes, elements
@@ -0,0 +1,153 @@
+"""
+Hashes of the inputs of each electrode's simulation, for incremental re-runs.
+
+A simulation only depends on the head mesh, the electrode position, the
+simulation parameters (Docker_Sim/param.py) and the Docker image. After a
+successful run, the hash of these inputs is recorded per electrode in the
+output directory of the ensemble. When the configuration is submitted again,
+electrodes whose hash is unchanged and whose results still exist are not
+simulated again, so editing one of many positions costs a single solve.
+"""
+
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Optional
+
+from .database_helper import SIMULATION_BASE, get_sim_output_path
+from .json_utils import load_json, save_json
+
+#: Name of the file with the input hashes, in the output directory of an ensemble
+SIMULATION_INPUTS_FILE_NAME = "simulation_inputs.json"
+
+#: Parameter file of the simulations
+PARAM_FILE_PATH = SIMULATION_BASE / "param.py"
+
+# Size of the chunks read while hashing a file
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def fingerprint_file(file_path: Path) -> str:
+    """
+    Return the SHA-256 hash of a file's content.
+
+    Parameters
+    ----------
+    file_path : Path
+        A Path object pointing to the file.
+
+    Returns
+    -------
+    str
+        The hex digest.
+
+    Raises
+    ------
+    OSError
+        If the file cannot be read.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint_mesh(mesh_path: Optional[Path]) -> str:
+    """
+    Return a fingerprint of the head mesh from its name, size and modification time.
+
+    Head meshes are large and only replaced as a whole, so their metadata
+    identifies them without reading several hundred MB on every submission.
+
+    Parameters
+    ----------
+    mesh_path : Path or None
+        A Path object pointing to the .msh file, or None if it was not found.
+
+    Returns
+    -------
+    str
+        The fingerprint, or an empty string if the mesh was not found.
+    """
+    if mesh_path is None:
+        return ""
+    try:
+        stat = mesh_path.stat()
+    except OSError:
+        return ""
+    return f"{mesh_path.name}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def hash_simulation_inputs(electrode: dict, mesh_fingerprint: str, param_fingerprint: str, image_id: str) -> str:
+    """
+    Return the hash of all inputs of an electrode's simulation.
+
+    Parameters
+    ----------
+    electrode : dict
+        The electrode, with the keys name, X, Y and Z.
+    mesh_fingerprint : str
+        The fingerprint of the head mesh (see fingerprint_mesh).
+    param_fingerprint : str
+        The hash of the simulation parameters (see fingerprint_file).
+    image_id : str
+        The ID (or, if unknown, the name) of the Docker image.
+
+    Returns
+    -------
+    str
+        The hex digest.
+    """
+    inputs = {
+        "position": [float(electrode["X"]), float(electrode["Y"]), float(electrode["Z"])],
+        "mesh": mesh_fingerprint,
+        "param": param_fingerprint,
+        "image": image_id,
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def load_simulation_inputs(config_id: str) -> dict:
+    """
+    Return the recorded input hashes of an ensemble's electrodes.
+
+    Parameters
+    ----------
+    config_id : str
+        The configuration (ensemble) ID.
+
+    Returns
+    -------
+    dict
+        The input hash of each successfully simulated electrode, by electrode name.
+    """
+    inputs_file = get_sim_output_path(config_id) / SIMULATION_INPUTS_FILE_NAME
+    if not inputs_file.exists():
+        return {}
+    try:
+        hashes = load_json(inputs_file)
+    except (OSError, ValueError):
+        return {}
+    return hashes if isinstance(hashes, dict) else {}
+
+
+def save_simulation_inputs(config_id: str, hashes: dict) -> None:
+    """
+    Record the input hashes of an ensemble's electrodes.
+
+    Parameters
+    ----------
+    config_id : str
+        The configuration (ensemble) ID.
+    hashes : dict
+        The input hash of each successfully simulated electrode, by electrode name.
+
+    Returns
+    -------
+    None
+    """
+    output_path = get_sim_output_path(config_id)
+    output_path.mkdir(parents=True, exist_ok=True)
+    save_json(hashes, output_path / SIMULATION_INPUTS_FILE_NAME)
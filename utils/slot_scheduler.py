@@ -0,0 +1,247 @@
+"""
+Fair-share scheduling of the simulation containers of concurrent ensembles.
+
+Every run_docker_simulations.py process starts its own containers. Without
+coordination, the ensemble that was submitted first starts containers for all
+of its electrodes, and a second ensemble only gets a container once the host
+is free again. With a SlotScheduler, the processes instead take a slot from a
+shared table before they start a container. A free slot goes to the waiting
+ensemble with the highest priority; among ensembles of equal priority, to the
+one holding the fewest slots, and then to the one that has waited longest. A
+small preview ensemble therefore starts within one container run of a large
+batch study, and concurrent ensembles of equal priority share the host evenly.
+Running containers are never stopped.
+
+In "memory" admission mode, every slot also records the memory limit of its
+container, and a slot is only handed out if its memory fits into the budget
+next to the memory of all slots on the host, whichever ensemble holds them.
+
+Ensembles renew their slots and their request while they run; slots and
+requests of a process that died expire after their time to live.
+"""
+
+
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .job_queue import JOB_DATABASE_PATH
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS slot_requests (
+    ensemble TEXT PRIMARY KEY,
+    priority INTEGER NOT NULL,
+    requested_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS slots (
+    id TEXT PRIMARY KEY,
+    ensemble TEXT NOT NULL,
+    acquired_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    memory INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS slots_ensemble ON slots (ensemble);
+"""
+
+
+class SlotScheduler:
+    """
+    A shared table of container slots, handed out by priority and fair share.
+
+    Every method opens its own connection, so a SlotScheduler can be used from
+    several threads and processes at once.
+
+    Parameters
+    ----------
+    db_path : Path, optional
+        The SQLite database file. Defaults to the database of the job queue.
+    """
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = Path(db_path) if db_path is not None else JOB_DATABASE_PATH
+        with self._connect() as connection:
+            connection.executescript(_SCHEMA)
+            # Databases created before the memory column existed
+            columns = {row["name"] for row in connection.execute("PRAGMA table_info(slots)")}
+            if "memory" not in columns:
+                connection.execute("ALTER TABLE slots ADD COLUMN memory INTEGER NOT NULL DEFAULT 0")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection in autocommit mode; transactions are started explicitly."""
+        connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    def acquire(self, ensemble: str, priority: int, capacity: int, ttl: float, memory: int = 0,
+                memory_budget: Optional[int] = None, shared: bool = True) -> Optional[str]:
+        """
+        Request a slot for `ensemble` and take it if it is the ensemble's turn.
+
+        The request is kept (and renewed by every call) until withdraw(), so
+        the ensemble keeps its place while it waits for a slot.
+
+        With a `memory_budget`, the slot is only taken if `memory` fits next to
+        the memory of all slots on the host; a container alone on the host
+        always gets a slot.
+
+        Parameters
+        ----------
+        ensemble : str
+            The ensemble (configuration ID) the container belongs to.
+        priority : int
+            The priority of the ensemble; higher priorities are served first.
+        capacity : int
+            The number of containers that may run on the host at the same time.
+        ttl : float
+            Seconds until the slot and the request expire unless they are renewed.
+        memory : int, optional
+            The memory limit of the container in bytes (default 0).
+        memory_budget : int, optional
+            Total memory in bytes the slots of all ensembles may add up to.
+            Without a budget, only `capacity` limits the slots.
+        shared : bool, optional
+            Whether `capacity` is shared by all ensembles and slots are handed
+            out by priority and fair share (default). Otherwise, every
+            ensemble has `capacity` slots of its own and only the memory
+            budget is shared.
+
+        Returns
+        -------
+        str or None
+            The ID of the slot, or None if no slot is free, the memory does
+            not fit, or another ensemble comes first.
+        """
+        now = time.time()
+        with self._connect() as connection:
+            # BEGIN IMMEDIATE takes the write lock before reading, so two
+            # processes can never take the last free slot
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute("DELETE FROM slots WHERE expires_at <= ?", (now,))
+                connection.execute("DELETE FROM slot_requests WHERE expires_at <= ?", (now,))
+                if shared:
+                    connection.execute(
+                        "INSERT INTO slot_requests (ensemble, priority, requested_at, expires_at) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT (ensemble) DO UPDATE SET priority = excluded.priority, "
+                        "expires_at = excluded.expires_at",
+                        (ensemble, priority, now, now + ttl)
+                    )
+
+                slot_id = None
+                host_slots, reserved = connection.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(memory), 0) FROM slots"
+                ).fetchone()
+                if shared:
+                    held = host_slots
+                else:
+                    held = connection.execute(
+                        "SELECT COUNT(*) FROM slots WHERE ensemble = ?", (ensemble,)
+                    ).fetchone()[0]
+                # A container that does not fit next to the running ones waits; alone, it always starts
+                fits = memory_budget is None or host_slots == 0 or reserved + memory <= memory_budget
+                if held < capacity and fits:
+                    turn = True
+                    if shared:
+                        row = connection.execute(
+                            "SELECT r.ensemble FROM slot_requests r "
+                            "LEFT JOIN (SELECT ensemble, COUNT(*) AS held FROM slots GROUP BY ensemble) s "
+                            "ON s.ensemble = r.ensemble "
+                            "ORDER BY r.priority DESC, COALESCE(s.held, 0), r.requested_at LIMIT 1"
+                        ).fetchone()
+                        turn = row["ensemble"] == ensemble
+                    if turn:
+                        slot_id = uuid.uuid4().hex
+                        connection.execute(
+                            "INSERT INTO slots (id, ensemble, acquired_at, expires_at, memory) VALUES (?, ?, ?, ?, ?)",
+                            (slot_id, ensemble, now, now + ttl, memory)
+                        )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        return slot_id
+
+    def renew(self, ensemble: str, ttl: float) -> None:
+        """
+        Extend the slots and the request of `ensemble` by `ttl` seconds from now.
+
+        Parameters
+        ----------
+        ensemble : str
+            The ensemble (configuration ID).
+        ttl : float
+            Seconds until the slots and the request expire unless they are renewed again.
+
+        Returns
+        -------
+        None
+        """
+        expires_at = time.time() + ttl
+        with self._connect() as connection:
+            connection.execute("UPDATE slots SET expires_at = ? WHERE ensemble = ?", (expires_at, ensemble))
+            connection.execute("UPDATE slot_requests SET expires_at = ? WHERE ensemble = ?", (expires_at, ensemble))
+
+    def release(self, slot_id: str) -> None:
+        """
+        Free a slot when its container exited.
+
+        Parameters
+        ----------
+        slot_id : str
+            The slot ID returned by acquire().
+
+        Returns
+        -------
+        None
+        """
+        with self._connect() as connection:
+            connection.execute("DELETE FROM slots WHERE id = ?", (slot_id,))
+
+    def withdraw(self, ensemble: str) -> None:
+        """
+        Remove the request of `ensemble`, once it has no more containers to start.
+
+        Parameters
+        ----------
+        ensemble : str
+            The ensemble (configuration ID).
+
+        Returns
+        -------
+        None
+        """
+        with self._connect() as connection:
+            connection.execute("DELETE FROM slot_requests WHERE ensemble = ?", (ensemble,))
+
+    def get_usage(self) -> dict:
+        """
+        Return the slots held and the requests waiting, by ensemble.
+
+        Returns
+        -------
+        dict
+            A dict mapping every ensemble with slots or a request to a dict
+            with the keys slots (the number of held slots), memory (the
+            memory reserved by them in bytes) and priority (the priority of
+            its request, or None without a request).
+        """
+        now = time.time()
+        with self._connect() as connection:
+            slots = connection.execute(
+                "SELECT ensemble, COUNT(*) AS count, SUM(memory) AS memory FROM slots WHERE expires_at > ? "
+                "GROUP BY ensemble", (now,)
+            ).fetchall()
+            requests = connection.execute(
+                "SELECT ensemble, priority FROM slot_requests WHERE expires_at > ?", (now,)
+            ).fetchall()
+        usage = {row["ensemble"]: {"slots": row["count"], "memory": row["memory"], "priority": None} for row in slots}
+        for row in requests:
+            usage.setdefault(row["ensemble"], {"slots": 0, "memory": 0, "priority": None})["priority"] = row["priority"]
+        return usage
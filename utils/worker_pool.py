@@ -0,0 +1,212 @@
+"""
+Coordinator side of the queue of the warm simulation workers.
+
+Warm workers are long-lived simulation containers (or processes) running
+Docker_Sim/worker.py. They take jobs from a queue directory on the data
+volume, so the container start-up and the imports of the simulation
+libraries are paid once per worker instead of once per electrode. Workers on
+several machines can serve the same queue if they share the data directory.
+See Docker_Sim/worker.py for the layout of the queue directory; the directory
+names must match the ones used there.
+
+Workers send heartbeats while they are alive and while they simulate a job.
+The coordinator puts jobs whose worker stopped sending heartbeats back into
+the queue with requeue_stale_worker_jobs(). The heartbeats are file
+modification times, so the clocks of the machines must roughly agree; the
+timeout should be several heartbeat intervals.
+
+Workers serve the jobs of concurrent requests by priority and fair share:
+jobs of a higher priority first, then jobs of the ensemble with the fewest
+jobs being simulated, then the oldest. The result of every job reports how
+long it waited in the queue.
+"""
+
+
+import json
+import os
+import tempfile
+import time
+import uuid
+from typing import Iterable
+
+from .database_helper import DATA_PATH
+
+#: Queue directory of the warm workers (VOLUME_PATH/worker_queue in the containers)
+WORKER_QUEUE_PATH = DATA_PATH / "worker_queue"
+
+#: Directories of the submitted jobs and the results
+WORKER_PENDING_PATH = WORKER_QUEUE_PATH / "pending"
+WORKER_CLAIMED_PATH = WORKER_QUEUE_PATH / "claimed"
+WORKER_DONE_PATH = WORKER_QUEUE_PATH / "done"
+
+#: Directory of the heartbeats of the workers
+WORKER_STATUS_PATH = WORKER_QUEUE_PATH / "workers"
+
+
+def submit_worker_job(mesh_name: str, ensemble_name: str, electrodes: Iterable[dict], priority: int = 0) -> str:
+    """
+    Add a job to the queue of the warm workers.
+
+    The job file is written next to the queue and renamed into it, so the
+    workers never read a partial job.
+
+    Parameters
+    ----------
+    mesh_name : str
+        Name of the head mesh, without the .msh extension.
+    ensemble_name : str
+        Name of the ensemble (configuration ID) the simulations belong to.
+    electrodes : Iterable[dict]
+        The electrodes to simulate, each a dict with the keys name, X, Y and Z.
+    priority : int, optional
+        The priority of the job, one of the values of utils.JOB_PRIORITIES (default 0, normal).
+
+    Returns
+    -------
+    str
+        The ID of the job.
+    """
+    WORKER_PENDING_PATH.mkdir(parents=True, exist_ok=True)
+    WORKER_DONE_PATH.mkdir(parents=True, exist_ok=True)
+
+    # Within a priority and ensemble, workers take jobs in the order of their names, i.e. of submission
+    submitted_at = time.time_ns()
+    job_id = f"{submitted_at}_{uuid.uuid4().hex[:8]}"
+    job = {
+        "job_id": job_id, "mesh_name": mesh_name, "ensemble_name": ensemble_name, "electrodes": list(electrodes),
+        "priority": priority, "submitted_at": submitted_at / 1e9
+    }
+
+    with tempfile.NamedTemporaryFile("w", dir=WORKER_QUEUE_PATH, suffix=".tmp", delete=False) as file:
+        json.dump(job, file, indent=4)
+    os.replace(file.name, WORKER_PENDING_PATH / f"{job_id}.json")
+    return job_id
+
+
+def collect_worker_results(job_ids: Iterable[str]) -> dict:
+    """
+    Return and remove the results of the finished jobs among `job_ids`.
+
+    Parameters
+    ----------
+    job_ids : Iterable[str]
+        The IDs of the jobs to look for.
+
+    Returns
+    -------
+    dict
+        The results of the finished jobs, by job ID. A result has the keys
+        job_id, worker, success, failed (the names of the failed electrodes),
+        error and waited (the seconds the job waited in the queue, or None if
+        unknown).
+    """
+    results = {}
+    for job_id in job_ids:
+        result_file = WORKER_DONE_PATH / f"{job_id}.json"
+        try:
+            results[job_id] = json.loads(result_file.read_text())
+        except FileNotFoundError:
+            continue
+        result_file.unlink(missing_ok=True)
+    return results
+
+
+def cancel_worker_jobs(job_ids: Iterable[str]) -> list:
+    """
+    Remove the jobs among `job_ids` that no worker has taken yet.
+
+    Parameters
+    ----------
+    job_ids : Iterable[str]
+        The IDs of the jobs to cancel.
+
+    Returns
+    -------
+    list
+        The IDs of the removed jobs.
+    """
+    cancelled = []
+    for job_id in job_ids:
+        try:
+            (WORKER_PENDING_PATH / f"{job_id}.json").unlink()
+        except FileNotFoundError:
+            continue
+        cancelled.append(job_id)
+    return cancelled
+
+
+def count_pending_worker_jobs() -> int:
+    """
+    Return the number of jobs no worker has taken yet.
+
+    Returns
+    -------
+    int
+        The number of pending jobs of all requests.
+    """
+    if not WORKER_PENDING_PATH.is_dir():
+        return 0
+    return sum(1 for _ in WORKER_PENDING_PATH.glob("*.json"))
+
+
+def requeue_stale_worker_jobs(timeout: float) -> list:
+    """
+    Put claimed jobs without a heartbeat for `timeout` seconds back into the queue.
+
+    A job whose worker died (e.g. its node failed) is then taken by another
+    worker. Moving the claimed file away revokes the claim of the old
+    worker: if it was only slow, it notices before writing a status or result
+    (see Docker_Sim/worker.py) and discards its results, and each simulation
+    writes to its own Simulation_<i> directory. Only the worker holding the
+    claim reports the job.
+
+    Parameters
+    ----------
+    timeout : float
+        Seconds since the last heartbeat after which a job is requeued.
+
+    Returns
+    -------
+    list
+        The IDs of the requeued jobs.
+    """
+    requeued = []
+    now = time.time()
+    for job_file in WORKER_CLAIMED_PATH.glob("*/*.json"):
+        try:
+            if now - job_file.stat().st_mtime < timeout:
+                continue
+            os.replace(job_file, WORKER_PENDING_PATH / job_file.name)
+        except FileNotFoundError:
+            # Finished in the meantime
+            continue
+        requeued.append(job_file.stem)
+    return requeued
+
+
+def get_live_workers(timeout: float) -> dict:
+    """
+    Return the workers that sent a heartbeat within the last `timeout` seconds.
+
+    Parameters
+    ----------
+    timeout : float
+        Seconds since the last heartbeat after which a worker counts as dead.
+
+    Returns
+    -------
+    dict
+        The last heartbeat of each live worker (with the keys worker, host,
+        job and heartbeat), by worker name.
+    """
+    workers = {}
+    now = time.time()
+    for status_file in WORKER_STATUS_PATH.glob("*.json"):
+        try:
+            if now - status_file.stat().st_mtime >= timeout:
+                continue
+            status = json.loads(status_file.read_text())
+        except (OSError, ValueError):
+            continue
+        workers[status_file.stem] = status
+    return workers